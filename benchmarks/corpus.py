@@ -0,0 +1,318 @@
+"""Synthetic EPUB and FB2 books for benchmarks.
+
+Books are generated from a seeded random generator, so the same spec always
+produces byte-identical files. Chapter count, paragraph count and length,
+section nesting depth, number of images and the script of the text (Cyrillic
+or Latin) are configurable.
+
+Usage:
+    python -m benchmarks.corpus OUTPUT_DIR [--size NAME] [--script NAME]
+                                [--format NAME]
+"""
+
+import argparse
+import base64
+import random
+import struct
+import zipfile
+import zlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+ALPHABETS = {
+    "cyrillic": "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    "latin": "abcdefghijklmnopqrstuvwxyz",
+}
+
+FORMATS = ("epub", "fb2")
+
+# Cover and illustration size in pixels
+IMAGE_SIZE = (600, 800)
+
+
+@dataclass(frozen=True)
+class BookSpec:
+    """Shape of a synthetic book."""
+
+    chapters: int
+    paragraphs: int  # Per chapter, spread over its nesting levels
+    paragraph_words: int
+    depth: int = 1  # Section nesting levels per chapter
+    images: int = 1  # The first one is the cover
+    script: str = "cyrillic"
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.script}-c{self.chapters}-p{self.paragraphs}"
+            f"x{self.paragraph_words}-d{self.depth}-i{self.images}"
+        )
+
+
+# Preset sizes, by name
+SIZES = {
+    "small": BookSpec(chapters=10, paragraphs=20, paragraph_words=40),
+    "medium": BookSpec(
+        chapters=60, paragraphs=60, paragraph_words=60, depth=2, images=5
+    ),
+    "large": BookSpec(
+        chapters=200, paragraphs=120, paragraph_words=80, depth=3, images=20
+    ),
+}
+
+
+def preset(size: str, script: str = "cyrillic") -> BookSpec:
+    """Return a preset spec written in the given script."""
+    return replace(SIZES[size], script=script)
+
+
+class TextGenerator:
+    """Produces pseudo-words, sentences and paragraphs in one script."""
+
+    def __init__(self, script: str, seed: int):
+        self.alphabet = ALPHABETS[script]
+        self.random = random.Random(seed)
+
+    def word(self) -> str:
+        length = min(1 + int(self.random.expovariate(0.25)), 14)
+        return "".join(self.random.choices(self.alphabet, k=length))
+
+    def title(self, words: int = 3) -> str:
+        return " ".join(self.word() for _ in range(words)).capitalize()
+
+    def paragraph(self, words: int) -> str:
+        """A paragraph of sentences, sometimes opened as a dialogue line."""
+        sentences = []
+        remaining = words
+        while remaining > 0:
+            count = min(remaining, self.random.randint(4, 16))
+            remaining -= count
+            sentence = " ".join(self.word() for _ in range(count))
+            end = self.random.choice(".....!?")
+            sentences.append(sentence.capitalize() + end)
+        text = " ".join(sentences)
+        if self.random.random() < 0.2:
+            text = "— " + text
+        return text
+
+
+def make_png(size: tuple[int, int], seed: int) -> bytes:
+    """Encode a gradient image as PNG without any imaging library."""
+    width, height = size
+    shade = random.Random(seed).randrange(256)
+    rows = []
+    for y in range(height):
+        value = (shade + y * 255 // height) % 256
+        rows.append(b"\x00" + bytes((value, 255 - value, shade)) * width)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(b"".join(rows), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _chapter_levels(spec: BookSpec, text: TextGenerator) -> list[tuple[str, list[str]]]:
+    """Titles and paragraphs of each nesting level of one chapter."""
+    levels = []
+    per_level, extra = divmod(spec.paragraphs, spec.depth)
+    for level in range(spec.depth):
+        count = per_level + (1 if level < extra else 0)
+        paragraphs = [text.paragraph(spec.paragraph_words) for _ in range(count)]
+        levels.append((text.title(), paragraphs))
+    return levels
+
+
+def _image_chapters(spec: BookSpec) -> dict[int, int]:
+    """Map chapter index to the illustration shown in it (image 0 is the cover)."""
+    illustrations = range(1, spec.images)
+    if not spec.chapters:
+        return {}
+    return {
+        (i * spec.chapters) // max(len(illustrations), 1): image
+        for i, image in enumerate(illustrations)
+    }
+
+
+def write_epub(path: Path, spec: BookSpec) -> None:
+    """Write an EPUB 3 book with a nested navigation document."""
+    text = TextGenerator(spec.script, spec.seed)
+    book_title = text.title(4)
+    author = f"{text.title(1)} {text.title(1)}"
+    images = _image_chapters(spec)
+
+    documents = []
+    nav_items = []
+    for index in range(spec.chapters):
+        levels = _chapter_levels(spec, text)
+        body = []
+        for depth, (title, paragraphs) in enumerate(levels):
+            tag = f"h{min(depth + 1, 6)}"
+            body.append(f'<section id="s{depth}"><{tag}>{escape(title)}</{tag}>')
+            body.extend(f"<p>{escape(p)}</p>" for p in paragraphs)
+        body.append("</section>" * len(levels))
+        if index in images:
+            body.append(f'<p><img src="images/image{images[index]}.png" alt=""/></p>')
+
+        name = f"chapter{index + 1:04d}.xhtml"
+        documents.append((f"ch{index + 1}", name, "".join(body), levels[0][0]))
+
+        # Nested TOC entries down to the chapter's deepest level
+        entry = ""
+        for depth in reversed(range(len(levels))):
+            fragment = "" if depth == 0 else f"#s{depth}"
+            inner = f"<ol>{entry}</ol>" if entry else ""
+            entry = (
+                f'<li><a href="{name}{fragment}">{escape(levels[depth][0])}</a>'
+                f"{inner}</li>"
+            )
+        nav_items.append(entry)
+
+    manifest = ['<item id="nav" href="nav.xhtml" '
+                'media-type="application/xhtml+xml" properties="nav"/>']
+    manifest += [
+        f'<item id="{item_id}" href="{name}" media-type="application/xhtml+xml"/>'
+        for item_id, name, _, _ in documents
+    ]
+    manifest += [
+        f'<item id="image{i}" href="images/image{i}.png" media-type="image/png"'
+        + (' properties="cover-image"' if i == 0 else "")
+        + "/>"
+        for i in range(spec.images)
+    ]
+    spine = "".join(f'<itemref idref="{item_id}"/>' for item_id, _, _, _ in documents)
+
+    opf = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" '
+        'unique-identifier="id">'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f'<dc:identifier id="id">urn:webbooks:bench:{spec.name}</dc:identifier>'
+        f"<dc:title>{escape(book_title)}</dc:title>"
+        f"<dc:creator>{escape(author)}</dc:creator>"
+        "<dc:language>ru</dc:language>"
+        + ('<meta name="cover" content="image0"/>' if spec.images else "")
+        + "</metadata>"
+        f"<manifest>{''.join(manifest)}</manifest>"
+        f"<spine>{spine}</spine>"
+        "</package>"
+    )
+    nav = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<html xmlns="http://www.w3.org/1999/xhtml" '
+        'xmlns:epub="http://www.idpf.org/2007/ops"><body>'
+        f'<nav epub:type="toc"><ol>{"".join(nav_items)}</ol></nav>'
+        "</body></html>"
+    )
+    container = (
+        '<?xml version="1.0"?>'
+        '<container version="1.0" '
+        'xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+        '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+        'media-type="application/oebps-package+xml"/></rootfiles>'
+        "</container>"
+    )
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("mimetype", "application/epub+zip", zipfile.ZIP_STORED)
+        zf.writestr("META-INF/container.xml", container)
+        zf.writestr("OEBPS/content.opf", opf)
+        zf.writestr("OEBPS/nav.xhtml", nav)
+        for _, name, body, title in documents:
+            zf.writestr(
+                f"OEBPS/{name}",
+                '<?xml version="1.0" encoding="utf-8"?>'
+                '<html xmlns="http://www.w3.org/1999/xhtml">'
+                f"<head><title>{escape(title)}</title></head>"
+                f"<body>{body}</body></html>",
+            )
+        for i in range(spec.images):
+            zf.writestr(
+                f"OEBPS/images/image{i}.png",
+                make_png(IMAGE_SIZE, spec.seed + i),
+                zipfile.ZIP_STORED,
+            )
+
+
+def write_fb2(path: Path, spec: BookSpec) -> None:
+    """Write an FB2 book with nested sections and base64 <binary> images."""
+    text = TextGenerator(spec.script, spec.seed)
+    book_title = text.title(4)
+    first_name, last_name = text.title(1), text.title(1)
+    images = _image_chapters(spec)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<FictionBook xmlns="http://www.gribuser.ru/xml/fictionbook/2.0" '
+            'xmlns:l="http://www.w3.org/1999/xlink">'
+            "<description><title-info>"
+            f"<author><first-name>{escape(first_name)}</first-name>"
+            f"<last-name>{escape(last_name)}</last-name></author>"
+            f"<book-title>{escape(book_title)}</book-title>"
+            + ('<coverpage><image l:href="#image0.png"/></coverpage>'
+               if spec.images else "")
+            + "<lang>ru</lang></title-info></description><body>"
+        )
+        for index in range(spec.chapters):
+            levels = _chapter_levels(spec, text)
+            for title, paragraphs in levels:
+                f.write(f"<section><title><p>{escape(title)}</p></title>")
+                f.write("".join(f"<p>{escape(p)}</p>" for p in paragraphs))
+            if index in images:
+                f.write(f'<image l:href="#image{images[index]}.png"/>')
+            f.write("</section>" * len(levels))
+        f.write("</body>")
+        for i in range(spec.images):
+            data = base64.encodebytes(make_png(IMAGE_SIZE, spec.seed + i))
+            f.write(
+                f'<binary id="image{i}.png" content-type="image/png">'
+                f"{data.decode('ascii')}</binary>"
+            )
+        f.write("</FictionBook>\n")
+
+
+def write_book(directory: Path, spec: BookSpec, book_format: str) -> Path:
+    """Write a book for spec in the given format, returning its path."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{spec.name}.{book_format}"
+    if book_format == "epub":
+        write_epub(path, spec)
+    else:
+        write_fb2(path, spec)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir", type=Path, help="Directory to write books to")
+    parser.add_argument(
+        "--size", choices=sorted(SIZES), default="medium", help="Preset size"
+    )
+    parser.add_argument(
+        "--script", choices=sorted(ALPHABETS), default="cyrillic", help="Text script"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        action="append",
+        help="Book format, may be repeated (default: both)",
+    )
+    args = parser.parse_args()
+
+    spec = preset(args.size, args.script)
+    for book_format in args.format or FORMATS:
+        path = write_book(args.output_dir, spec, book_format)
+        print(f"{path} ({path.stat().st_size / 1024:,.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark pagination throughput in chapters per second.
+
+Runs Paginator.paginate_book over the chapters of real books twice: once with
+textwrap.wrap (the original wrapper) and once with generator.linewrap.wrap,
+and checks that both produce the same pages.
+
+Usage:
+    python -m benchmarks.paginate [BOOK ...] [--repeat N] [--font-size SIZE]
+"""
+
+import argparse
+import textwrap
+import time
+from pathlib import Path
+
+from build import discover_books_by_series, parse_book
+from config import BOOKS_DIR, DEFAULT_FONT_SIZE, FONT_SIZES
+from generator import paginator as paginator_module
+from generator.linewrap import wrap
+from generator.paginator import Paginator
+from parsers.base import Chapter
+
+
+def textwrap_wrap(text: str, width: int) -> list[str]:
+    """The wrapping call Paginator used before generator.linewrap."""
+    return textwrap.wrap(
+        text, width=width, break_long_words=True, break_on_hyphens=True
+    )
+
+
+def time_paginate(
+    chapters: list[Chapter], font_size: str, repeat: int, wrap_func
+) -> tuple[float, list]:
+    """Best-of-N time to paginate all chapters with the given wrap function."""
+    paginator_module.wrap = wrap_func
+    try:
+        paginator = Paginator(font_size)
+        best = float("inf")
+        pages = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pages = paginator.paginate_book(chapters)
+            best = min(best, time.perf_counter() - start)
+        return best, pages
+    finally:
+        paginator_module.wrap = wrap
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "books", nargs="*", type=Path, help="EPUB/FB2 files (default: books/)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per variant (default: 3)"
+    )
+    parser.add_argument(
+        "--font-size",
+        choices=sorted(FONT_SIZES),
+        default=DEFAULT_FONT_SIZE,
+        help=f"Font size profile (default: {DEFAULT_FONT_SIZE})",
+    )
+    args = parser.parse_args()
+
+    paths = args.books or [
+        path
+        for files in discover_books_by_series(BOOKS_DIR).values()
+        for path in files
+    ]
+    chapters: list[Chapter] = []
+    for path in paths:
+        book = parse_book(path)
+        if book:
+            chapters.extend(book.chapters)
+
+    if not chapters:
+        print("No chapters to paginate.")
+        return
+
+    total_chars = sum(len(ch.content) for ch in chapters)
+    print(
+        f"{len(chapters)} chapters, {total_chars:,} characters, "
+        f"font size {args.font_size}"
+    )
+
+    before, old_pages = time_paginate(
+        chapters, args.font_size, args.repeat, textwrap_wrap
+    )
+    after, new_pages = time_paginate(chapters, args.font_size, args.repeat, wrap)
+
+    print(f"  textwrap: {len(chapters) / before:8.1f} chapters/s ({before:.3f}s)")
+    print(f"  linewrap: {len(chapters) / after:8.1f} chapters/s ({after:.3f}s)")
+    print(f"  speedup:  {before / after:.2f}x")
+    print(f"  identical pages: {'yes' if old_pages == new_pages else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
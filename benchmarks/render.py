@@ -0,0 +1,108 @@
+"""Benchmark page rendering throughput in pages per second.
+
+Renders the reader pages of real books twice: once through the full
+page.html template for every page and once through the precomputed page
+shell fast path, and checks that both produce the same HTML. Also reports
+template load time with and without the Jinja bytecode cache.
+
+Usage:
+    python -m benchmarks.render [BOOK ...] [--repeat N]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from build import discover_books_by_series, parse_book
+from config import BOOKS_DIR
+from generator.paginator import Paginator
+from generator.renderer import Renderer
+from parsers.base import Book
+
+
+def time_render(
+    renderer: Renderer, books: list[tuple[Book, list]], repeat: int
+) -> tuple[float, list[str]]:
+    """Best-of-N time to render every page of the given books."""
+    layout = {"profile": renderer.profiles[0], "site_root": "../", "book_root": ""}
+    best = float("inf")
+    html: list[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = []
+        for book, pages in books:
+            chapter_ranges = Paginator().get_chapter_page_ranges(pages)
+            html.extend(
+                page_html
+                for _, page_html in renderer.render_pages(
+                    book, pages, len(pages), book.has_cover, chapter_ranges, layout
+                )
+            )
+        best = min(best, time.perf_counter() - start)
+    return best, html
+
+
+def time_template_load(cache_dir: Path | None) -> float:
+    """Time to create a renderer and load every template."""
+    start = time.perf_counter()
+    renderer = Renderer(cache_dir=cache_dir)
+    for name in renderer.env.list_templates():
+        renderer.env.get_template(name)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "books", nargs="*", type=Path, help="EPUB/FB2 files (default: books/)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per variant (default: 3)"
+    )
+    args = parser.parse_args()
+
+    paths = args.books or [
+        path
+        for files in discover_books_by_series(BOOKS_DIR).values()
+        for path in files
+    ]
+    books: list[tuple[Book, list]] = []
+    for path in paths:
+        book = parse_book(path)
+        if book:
+            books.append((book, Paginator().paginate_book(book.chapters)))
+
+    total_pages = sum(len(pages) for _, pages in books)
+    if not total_pages:
+        print("No pages to render.")
+        return
+
+    print(f"{len(books)} books, {total_pages:,} pages")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        template_time, template_html = time_render(
+            Renderer(cache_dir=cache_dir, fast_pages=False), books, args.repeat
+        )
+        shell_time, shell_html = time_render(
+            Renderer(cache_dir=cache_dir, fast_pages=True), books, args.repeat
+        )
+        cold = time_template_load(None)
+        warm = time_template_load(cache_dir)
+
+    print(
+        f"  template: {total_pages / template_time:9.1f} pages/s "
+        f"({template_time:.3f}s)"
+    )
+    print(f"  shell:    {total_pages / shell_time:9.1f} pages/s ({shell_time:.3f}s)")
+    print(f"  speedup:  {template_time / shell_time:.2f}x")
+    print(f"  identical pages: {'yes' if template_html == shell_html else 'NO'}")
+    print(
+        f"  template load: {cold * 1000:.1f} ms compiled, "
+        f"{warm * 1000:.1f} ms from bytecode cache"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Benchmark every build stage on a synthetic corpus and track regressions.
+
+Generates EPUB and FB2 books (see benchmarks.corpus) for each requested size
+and script, then times, best of N runs:
+
+    parse     EpubParser.parse / Fb2Parser.parse
+    paginate  Paginator.paginate_book (default profile)
+    render    Renderer._render_book into an empty directory (all profiles)
+    total     parse and render together, as a build does
+
+Results are written as JSON. With --compare, they are checked against an
+earlier results file and any stage slower by more than --threshold percent
+is reported as a regression (exit status 1).
+
+Usage:
+    python -m benchmarks.suite [--sizes small,medium] [--scripts ...]
+                               [--formats ...] [--repeat N] [--output PATH]
+                               [--compare BASELINE] [--threshold PCT]
+    python -m benchmarks.suite --results CURRENT --compare BASELINE
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.corpus import ALPHABETS, FORMATS, SIZES, preset, write_book
+from generator.paginator import Paginator
+from generator.renderer import Renderer
+from parsers import EpubParser, Fb2Parser
+
+STAGES = ("parse", "paginate", "render", "total")
+
+# Stage times below this are too noisy to call a regression
+MIN_COMPARED_SECONDS = 0.005
+
+
+def best_time(func: Callable[[], object], repeat: int) -> tuple[float, object]:
+    """Best-of-N wall time of func, and its last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_book(path: Path, repeat: int, work_dir: Path) -> dict:
+    """Time each stage for one book file."""
+    parser = EpubParser() if path.suffix == ".epub" else Fb2Parser()
+    output_dir = work_dir / "site"
+    # No build cache: covers and templates are processed from scratch
+    renderer = Renderer(output_dir=output_dir, cache_dir=None)
+
+    def render(book) -> None:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        book.slug = "book"
+        with contextlib.redirect_stdout(io.StringIO()):
+            renderer._render_book(book)
+
+    def parse_and_render() -> None:
+        render(parser.parse(path))
+
+    parse_time, book = best_time(lambda: parser.parse(path), repeat)
+    paginate_time, pages = best_time(
+        lambda: Paginator().paginate_book(book.chapters), repeat
+    )
+    render_time, _ = best_time(lambda: render(book), repeat)
+    total_time, _ = best_time(parse_and_render, repeat)
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "file_bytes": path.stat().st_size,
+        "chars": sum(len(chapter.content) for chapter in book.chapters),
+        "chapters": len(book.chapters),
+        "pages": len(pages),
+        "seconds": {
+            "parse": parse_time,
+            "paginate": paginate_time,
+            "render": render_time,
+            "total": total_time,
+        },
+    }
+
+
+def run_suite(
+    sizes: list[str], scripts: list[str], formats: list[str], repeat: int
+) -> dict:
+    """Generate the corpus and benchmark every book in it."""
+    cases = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        for size in sizes:
+            for script in scripts:
+                spec = preset(size, script)
+                for book_format in formats:
+                    name = f"{book_format}-{size}-{script}"
+                    path = write_book(work_dir / "books", spec, book_format)
+                    print(f"  {name}...", end="", flush=True)
+                    cases[name] = bench_book(path, repeat, work_dir)
+                    seconds = cases[name]["seconds"]
+                    print(
+                        " "
+                        + ", ".join(f"{s} {seconds[s]:.3f}s" for s in STAGES)
+                        + f" ({cases[name]['pages']} pages)"
+                    )
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Print per-stage changes and return the regressions found.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Slowdown, in percent, that counts as a regression
+    """
+    regressions = []
+    print(f"Compared to baseline (regression threshold {threshold:g}%):")
+    print(f"  {'case':<24}" + "".join(f" {stage:>17}" for stage in STAGES))
+    for name, case in current["cases"].items():
+        old_case = baseline["cases"].get(name)
+        if old_case is None:
+            print(f"  {name:<24} (not in baseline)")
+            continue
+
+        cells = []
+        for stage in STAGES:
+            old = old_case["seconds"].get(stage)
+            new = case["seconds"].get(stage)
+            if old is None or new is None:
+                cells.append(f" {'-':>17}")
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            flag = " "
+            if change > threshold and new - old > MIN_COMPARED_SECONDS:
+                flag = "!"
+                regressions.append(
+                    f"{name} {stage}: {old:.3f}s -> {new:.3f}s ({change:+.1f}%)"
+                )
+            cells.append(f" {new:>7.3f}s {change:>+6.1f}%{flag}")
+        print(f"  {name:<24}" + "".join(cells))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="small,medium",
+        help=f"Comma-separated presets from {', '.join(SIZES)} "
+        "(default: small,medium)",
+    )
+    parser.add_argument(
+        "--scripts",
+        default=",".join(ALPHABETS),
+        help=f"Comma-separated text scripts (default: {','.join(ALPHABETS)})",
+    )
+    parser.add_argument(
+        "--formats",
+        default=",".join(FORMATS),
+        help=f"Comma-separated book formats (default: {','.join(FORMATS)})",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per stage (default: 3)"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("bench-results.json"),
+        help="Where to write results (default: bench-results.json)",
+    )
+    parser.add_argument(
+        "--results",
+        type=Path,
+        help="Compare this results file instead of running the benchmarks",
+    )
+    parser.add_argument(
+        "--compare", type=Path, metavar="BASELINE", help="Results file to compare to"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Slowdown in percent reported as a regression (default: 10)",
+    )
+    args = parser.parse_args()
+
+    if args.results:
+        current = json.loads(args.results.read_text(encoding="utf-8"))
+    else:
+        choices = {"sizes": SIZES, "scripts": ALPHABETS, "formats": FORMATS}
+        selected = {}
+        for option, allowed in choices.items():
+            values = [v for v in getattr(args, option).split(",") if v]
+            unknown = [v for v in values if v not in allowed]
+            if unknown:
+                parser.error(f"unknown {option}: {', '.join(unknown)}")
+            selected[option] = values
+
+        print(f"Benchmarking (best of {args.repeat}):")
+        current = run_suite(repeat=args.repeat, **selected)
+        args.output.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to: {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print()
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print()
+            print(f"{len(regressions)} regression(s):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,69 @@
 WebBooks - Static site generator for reading EPUB/FB2 books on feature phones.
 
 Usage:
-    python build.py [--books-dir PATH] [--output-dir PATH]
+    python build.py [--books-dir PATH] [--output-dir PATH] [--force] [--dry-run]
+                    [--no-parse-cache] [--compress] [--minify] [--jobs N]
+                    [--write-threads N] [--stream] [--output-archive PATH]
+                    [--prefetch] [--chapter-bundles] [--page-budget BYTES]
+                    [--profile [PATH]] [--profile-stage STAGE] [--profile-top N]
+                    [--watch] [--host HOST] [--port PORT]
 
 Example:
     python build.py
     python build.py --books-dir ./my-books --output-dir ./public
+    python build.py --dry-run
+    python build.py --jobs 8
+    python build.py --compress --minify --page-budget 8192
+    python build.py --output-archive site.tar
+    python build.py --stream
+    python build.py --profile --profile-stage render
+    python build.py --watch --port 8000
 """
 
 import argparse
+import contextlib
+import copy
+import functools
+import io
+import os
 import re
 import sys
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from config import BOOKS_DIR, OUTPUT_DIR
+from config import (
+    BOOKS_DIR,
+    CACHE_DIR,
+    OUTPUT_DIR,
+    PAGE_BYTES_BUDGET,
+    PARSE_CACHE_MAX_BYTES,
+    STATIC_DIR,
+    TEMPLATES_DIR,
+    WRITE_THREADS,
+)
 
 
 from parsers import EpubParser, Fb2Parser
-from parsers.base import Book, Series
-from generator import Renderer
+from parsers.base import Book, BookParser, BookStream, Series
+from parsers.cache import BookCache
+from parsers.fb2_parser import is_fb2_zip
+from generator import Renderer, profiling
+from generator.archive import ARCHIVE_SUFFIXES
+from generator.devserver import changed_paths, serve, snapshot
+from generator.scan import FileStat, ScanCache
+from generator.manifest import BookRecord, BuildManifest, BuildPlan, catalog_digest
+from generator.pageweight import PageWeight, measure_book, over_budget
+from generator.slugs import SlugRegistry
+from generator.writer import WriteStats
+
+
+# Book file name endings picked up by discovery (case-insensitive)
+BOOK_SUFFIXES = ('.epub', '.fb2', '.fb2.zip')
+
+# Seconds between checks for changed files in watch mode
+WATCH_INTERVAL = 0.5
 
 
 def natural_sort_key(text: str) -> list:
@@ -29,12 +74,22 @@ def natural_sort_key(text: str) -> list:
     return [int(p) if p.isdigit() else p for p in parts]
 
 
-def discover_books_by_series(books_dir: Path) -> dict[str, list[Path]]:
-    """Find all EPUB and FB2 files, grouped by series (subfolder).
+def discover_books_by_series(
+    books_dir: Path, stats: dict[Path, FileStat] | None = None
+) -> dict[str, list[Path]]:
+    """Find all EPUB, FB2 and FB2.zip files, grouped by series (folder).
+
+    The library is read in a single scandir walk, so folders can nest
+    (Author/Series/). Hidden files and folders are skipped.
+
+    Args:
+        books_dir: Root books directory
+        stats: Filled with the metadata of every book file found
 
     Returns:
-        Dict mapping series name to list of book paths.
-        Empty string key "" means standalone books (in root folder).
+        Dict mapping series name (folder path relative to books_dir, like
+        "Author/Series") to list of book paths. Empty string key "" means
+        standalone books (in root folder).
     """
     series_books: dict[str, list[Path]] = {}
 
@@ -42,47 +97,258 @@ def discover_books_by_series(books_dir: Path) -> dict[str, list[Path]]:
         print(f"Warning: Books directory '{books_dir}' does not exist.")
         return series_books
 
-    # Books in root folder (no series)
-    root_books = []
-    for pattern in ['*.epub', '*.fb2']:
-        root_books.extend(books_dir.glob(pattern))
-    if root_books:
-        root_books.sort(key=lambda p: p.name.lower())
-        series_books[""] = root_books
-
-    # Books in subfolders (series)
-    for subfolder in sorted(books_dir.iterdir()):
-        if subfolder.is_dir() and not subfolder.name.startswith('.'):
-            folder_books = []
-            for pattern in ['*.epub', '*.fb2']:
-                folder_books.extend(subfolder.glob(pattern))
-            if folder_books:
-                folder_books.sort(key=lambda p: p.name.lower())
-                series_books[subfolder.name] = folder_books
-
-    return series_books
-
-
-def parse_book(file_path: Path) -> Book | None:
-    """Parse a book file using the appropriate parser."""
+    visited: set[tuple[int, int]] = set()  # Folders, against symlink loops
+    pending = [('', str(books_dir))]
+    while pending:
+        series_name, directory = pending.pop()
+        try:
+            folder = os.stat(directory)
+            if (folder.st_dev, folder.st_ino) in visited:
+                continue
+            visited.add((folder.st_dev, folder.st_ino))
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"Warning: Could not read '{directory}': {e}")
+            continue
+
+        folder_books = []
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir():
+                name = f"{series_name}/{entry.name}" if series_name else entry.name
+                pending.append((name, entry.path))
+            elif entry.name.lower().endswith(BOOK_SUFFIXES) and entry.is_file():
+                path = Path(entry.path)
+                folder_books.append(path)
+                if stats is not None:
+                    stats[path] = FileStat.from_stat(entry.stat())
+
+        if folder_books:
+            folder_books.sort(key=lambda p: p.name.lower())
+            series_books[series_name] = folder_books
+
+    # Standalone books first, then series in folder order
+    return dict(sorted(series_books.items()))
+
+
+def output_subdirs(output_dir: Path) -> list[str]:
+    """Names of the directories already in the output directory."""
+    try:
+        with os.scandir(output_dir) as it:
+            return [e.name for e in it if e.is_dir() and not e.name.startswith('.')]
+    except OSError:
+        return []
+
+
+def catalog_page_weights(
+    records: list[BookRecord], rendered: dict[str, PageWeight], output_dir: Path
+) -> dict[str, PageWeight]:
+    """Reader page sizes of every book in the catalog, by slug.
+
+    Books rendered by this build were measured as they were written; the
+    others keep the sizes in their records, or are measured in the output
+    directory if their record has none yet. Records are updated, so the
+    manifest carries the sizes on.
+    """
+    weights = {}
+    for record in records:
+        weight = rendered.get(record.slug) or record.page_weight
+        if weight is None:
+            weight = measure_book(output_dir / record.slug)
+        record.set_page_weight(weight)
+        weights[record.slug] = weight
+    return weights
+
+
+def check_page_budget(weights: dict[str, PageWeight], budget: int | None) -> bool:
+    """Report reader pages over budget; False if there are any."""
+    heavy = over_budget(weights, budget) if budget else {}
+    if not heavy:
+        return True
+    # Not recording this build makes the next one check these books again
+    print()
+    print(f"Page budget of {budget:,} bytes exceeded:")
+    for slug, weight in heavy.items():
+        print(f"  - {slug}/{weight.max_page}: {weight.max_bytes:,} bytes")
+    return False
+
+
+def get_parser(file_path: Path) -> BookParser | None:
+    """Return the parser for a book file, or None if the format is unsupported."""
     suffix = file_path.suffix.lower()
+    if suffix == '.epub':
+        return EpubParser()
+    if suffix == '.fb2' or is_fb2_zip(file_path):
+        return Fb2Parser()
+    print(f"  Skipping unsupported format: {file_path.name}")
+    return None
 
+
+def parse_book(file_path: Path, cache: BookCache | None = None) -> Book | None:
+    """Parse a book file using the appropriate parser.
+
+    Args:
+        file_path: Book file
+        cache: Parsed-book cache to read from and fill (None: always parse)
+    """
     try:
-        if suffix == '.epub':
-            parser = EpubParser()
-        elif suffix == '.fb2':
-            parser = Fb2Parser()
-        else:
-            print(f"  Skipping unsupported format: {file_path.name}")
+        key = None
+        if cache is not None:
+            key = cache.key(file_path)
+            with profiling.stage('parse', str(file_path)):
+                book = cache.get(key, file_path)
+            if book is not None:
+                print("      (from parse cache)")
+                return book
+
+        parser = get_parser(file_path)
+        if parser is None:
             return None
 
-        return parser.parse(file_path)
+        with profiling.stage('parse', str(file_path)):
+            book = parser.parse(file_path)
+        if key is not None:
+            cache.put(key, book)
+        return book
+
+    except Exception as e:
+        print(f"  Error parsing {file_path.name}: {e}")
+        return None
+
+
+def open_book(
+    file_path: Path, cache: BookCache | None = None
+) -> BookStream | None:
+    """Open a book file for streaming using the appropriate parser.
+
+    Errors raised while chapters are read are left to the consumer.
+
+    Args:
+        file_path: Book file
+        cache: Parsed-book cache to read from (None: always parse). Streamed
+            books are not added to it, as that would need the whole book in
+            memory at once.
+    """
+    try:
+        if cache is not None:
+            with profiling.stage('parse', str(file_path)):
+                book = cache.get(cache.key(file_path), file_path)
+            if book is not None:
+                print("      (from parse cache)")
+                return BookStream.from_book(book)
+
+        parser = get_parser(file_path)
+        if parser is None:
+            return None
+        return parser.stream(file_path)
 
     except Exception as e:
         print(f"  Error parsing {file_path.name}: {e}")
         return None
 
 
+def stream_records(
+    file_paths: list[Path],
+    books_dir: Path,
+    plan: BuildPlan,
+    slugs: SlugRegistry,
+    cache: BookCache | None = None,
+) -> list[tuple[Path, BookRecord]]:
+    """Create catalog records, with slugs, for books built in streaming mode.
+
+    Books are rendered while they are parsed, so their slugs must be known
+    up front. Books keeping a previous slug are not opened here; for new
+    books only the metadata is read, to get the title.
+
+    Returns:
+        (file path, record) pairs; title, author and cover are filled in
+        once the book has been rendered
+    """
+    records = []
+    for file_path in file_paths:
+        source = file_path.relative_to(books_dir).as_posix()
+        identity = plan.digests[file_path]
+        title = ""
+        if source not in slugs.assigned:
+            # Errors are reported when the book is built
+            with contextlib.redirect_stdout(io.StringIO()):
+                book = open_book(file_path, cache)
+            if book is not None:
+                title = book.title
+                book.close()
+            else:
+                title = file_path.stem
+
+        record = BookRecord(
+            source=source,
+            key=plan.keys[file_path],
+            title=title,
+            author="Unknown",
+            slug=slugs.slug_for(source, identity, title, str(file_path)),
+            identity=identity,
+        )
+        records.append((file_path, record))
+    return records
+
+
+def _parse_book_captured(
+    file_path: Path, cache: BookCache | None = None
+) -> tuple[Book | None, str]:
+    """Parse a book, returning it together with everything it printed."""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        book = parse_book(file_path, cache)
+    return book, log.getvalue()
+
+
+# Per-process parsed-book cache used by parse workers
+_worker_cache: BookCache | None = None
+
+
+def _init_parse_worker(cache: BookCache | None) -> None:
+    """Install the cache once per worker instead of sending it with every book."""
+    global _worker_cache
+    _worker_cache = cache
+
+
+def _parse_book_in_worker(file_path: Path) -> tuple[Book | None, str]:
+    return _parse_book_captured(file_path, _worker_cache)
+
+
+def parse_books(
+    file_paths: list[Path], jobs: int = 1, cache: BookCache | None = None
+) -> Iterator[tuple[Path, Book | None, str]]:
+    """Parse books, optionally in a process pool.
+
+    Results are yielded in the order of file_paths regardless of which worker
+    finishes first, and each book's log output is captured so it can be
+    printed as one block instead of interleaving with other workers.
+
+    Args:
+        file_paths: Book files to parse
+        jobs: Number of worker processes (1 parses in this process)
+        cache: Parsed-book cache (None: always parse)
+
+    Yields:
+        (file_path, book or None, captured log output) tuples
+    """
+    if jobs <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield file_path, *_parse_book_captured(file_path, cache)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(file_paths)),
+        initializer=_init_parse_worker,
+        initargs=(cache,),
+    ) as pool:
+        results = pool.map(_parse_book_in_worker, file_paths)
+        for file_path, (book, log) in zip(file_paths, results):
+            yield file_path, book, log
+
+
 def main():
     """Main entry point for the build script."""
     parser = argparse.ArgumentParser(
@@ -100,32 +366,343 @@ def main():
         default=OUTPUT_DIR,
         help=f'Output directory for generated site (default: {OUTPUT_DIR})',
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Ignore the build manifest and rebuild every book',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Print the rebuild plan without parsing or rendering anything',
+    )
+    parser.add_argument(
+        '--no-parse-cache',
+        action='store_true',
+        help='Always parse books instead of reusing cached parse results',
+    )
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='Also write .gz and .br copies of HTML/CSS/JS files '
+             '(.br needs the brotli package)',
+    )
+    parser.add_argument(
+        '--minify',
+        action='store_true',
+        help='Minify whitespace, attribute quotes and inline scripts of '
+             'every page',
+    )
+    parser.add_argument(
+        '--prefetch',
+        action='store_true',
+        help='Hint browsers to fetch the next page while the current one is '
+             'read',
+    )
+    parser.add_argument(
+        '--chapter-bundles',
+        action='store_true',
+        help='Also write one script per chapter with all its pages, so '
+             'browsers that run it turn pages without a request',
+    )
+    parser.add_argument(
+        '--page-budget',
+        type=int,
+        default=PAGE_BYTES_BUDGET,
+        metavar='BYTES',
+        help='Fail the build if a reader page is larger than this '
+             + (f'(default: {PAGE_BYTES_BUDGET})' if PAGE_BYTES_BUDGET
+                else '(default: no limit)'),
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Render each book while it is parsed, keeping only catalog data '
+             'in memory (for very large libraries)',
+    )
+    parser.add_argument(
+        '--output-archive',
+        type=Path,
+        metavar='PATH',
+        help='Write the whole site into one reproducible .tar or .zip file '
+             'instead of the output directory (always a full build)',
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Number of parse/render worker processes, 0 = one per CPU '
+             '(default: 1)',
+    )
+    parser.add_argument(
+        '--write-threads',
+        type=int,
+        default=WRITE_THREADS,
+        metavar='N',
+        help='Threads writing output files while rendering goes on, per '
+             'render process; 0 writes each page before the next '
+             f'(default: {WRITE_THREADS})',
+    )
+
+    parser.add_argument(
+        '--profile',
+        type=Path,
+        nargs='?',
+        const=Path('build-profile.json'),
+        metavar='PATH',
+        help='Record time, CPU and memory per build stage and per book, and '
+             'write them to a JSON report (default: build-profile.json)',
+    )
+    parser.add_argument(
+        '--profile-stage',
+        choices=profiling.STAGES,
+        help='With --profile, also run this stage under cProfile and save '
+             'its stats next to the report',
+    )
+    parser.add_argument(
+        '--profile-top',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Number of slowest books to list with --profile (default: 10)',
+    )
+
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Build, serve the output over HTTP and rebuild whenever books, '
+             'templates or static files change',
+    )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Address the --watch server listens on (default: 127.0.0.1; '
+             'use 0.0.0.0 to reach it from other devices)',
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='Port of the --watch server (default: 8000)',
+    )
 
     args = parser.parse_args()
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    archive = args.output_archive
+    if archive and archive.suffix.lower() not in ARCHIVE_SUFFIXES:
+        parser.error(
+            f"--output-archive must end in {' or '.join(ARCHIVE_SUFFIXES)}"
+        )
+
+    if args.watch:
+        for option in ('--stream', '--dry-run', '--profile', '--output-archive'):
+            if getattr(args, option[2:].replace('-', '_')):
+                parser.error(f"--watch can not be combined with {option}")
+        watch(args)
+        return
+
+    if args.profile is None:
+        sys.exit(build(args))
+
+    if args.jobs > 1:
+        # Stages running in worker processes would not be measured
+        print("Profiling runs in a single process, ignoring --jobs")
+        args.jobs = 1
+    profiler = profiling.enable(args.profile_stage)
+    try:
+        status = build(args)
+    finally:
+        profiling.disable()
+        print()
+        profiler.print_summary(args.profile_top)
+        print()
+        profiler.write_report(args.profile)
+    sys.exit(status)
+
+
+def watch(args: argparse.Namespace) -> None:
+    """Build, serve the output and rebuild on every change until interrupted.
+
+    Parsed books are kept in memory between builds, keyed by file content.
+    Each rebuild is incremental: a changed book is parsed and rendered on
+    its own and index.html is updated; a template or static file change
+    re-renders every book from memory without parsing any of them.
+    """
+    parsed_books: dict[str, Book] = {}
+    watched = [args.books_dir, TEMPLATES_DIR, STATIC_DIR]
+
+    state = snapshot(watched)
+    _watch_build(args, parsed_books)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    server = serve(args.output_dir, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving {args.output_dir} at http://{host}:{port}/")
+    print("Watching for changes (Ctrl+C to stop)...")
+
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            current = snapshot(watched)
+            changes = changed_paths(state, current)
+            if not changes:
+                continue
+
+            # Wait for files still being copied to settle
+            while True:
+                time.sleep(WATCH_INTERVAL)
+                settled = snapshot(watched)
+                if settled == current:
+                    break
+                current = settled
+            changes = changed_paths(state, current)
+            state = current
+
+            print()
+            names = ', '.join(changes[:5])
+            more = f" and {len(changes) - 5} more" if len(changes) > 5 else ""
+            print(f"Changed: {names}{more}")
+            started = time.perf_counter()
+            _watch_build(args, parsed_books)
+            elapsed = time.perf_counter() - started
+            print(f"Rebuilt in {elapsed:.1f}s, watching for changes...")
+    except KeyboardInterrupt:
+        print()
+        print("Stopped.")
+    finally:
+        server.shutdown()
+
+
+def _watch_build(args: argparse.Namespace, parsed_books: dict[str, Book]) -> None:
+    """Run one build of watch mode, reporting failures instead of exiting."""
+    try:
+        status = build(args, parsed_books)
+    except Exception as e:
+        print(f"Build failed: {e}")
+        return
+    if status:
+        # The reasons were printed by the build
+        print("Build failed, see the errors above.")
 
+
+def build(
+    args: argparse.Namespace, parsed_books: dict[str, Book] | None = None
+) -> int:
+    """Run a build with the parsed command line options.
+
+    Args:
+        args: Command line options
+        parsed_books: Books parsed by earlier builds, by file content hash;
+            used instead of parsing again and updated with this build's
+            books (None: do not keep parsed books)
+
+    Returns:
+        Exit status: 0 when the site was built or there is nothing to
+        build yet, 1 when the build failed
+    """
     print("WebBooks - Static Site Generator")
     print("=" * 40)
     print(f"Books directory: {args.books_dir}")
-    print(f"Output directory: {args.output_dir}")
+    if args.output_archive:
+        print(f"Output archive: {args.output_archive}")
+    else:
+        print(f"Output directory: {args.output_dir}")
     print()
 
     # Discover books grouped by series
     print("Scanning for books...")
-    series_files = discover_books_by_series(args.books_dir)
+    stats: dict[Path, FileStat] = {}
+    with profiling.stage('discover'):
+        series_files = discover_books_by_series(args.books_dir, stats)
 
     if not series_files:
         print("No books found!")
         print(f"Add EPUB or FB2 files to: {args.books_dir}")
-        sys.exit(0)
+        return 0
 
     total_books = sum(len(files) for files in series_files.values())
     print(f"Found {total_books} book(s) in {len(series_files)} series/folder(s)")
     print()
 
-    # Parse books and create series
-    print("Parsing books...")
+    # Compare against the previous build
+    manifest = BuildManifest(args.output_dir)
+    manifest.load()
+    all_files = [path for files in series_files.values() for path in files]
+    scan_cache = ScanCache(CACHE_DIR)
+    scan_cache.load()
+    with profiling.stage('plan'):
+        # Only files whose size, mtime or inode changed are read
+        digests = {path: scan_cache.digest(path, stats[path]) for path in all_files}
+        # An archive is written from scratch, so every book is rendered
+        plan = manifest.plan(
+            args.books_dir,
+            all_files,
+            force=args.force or args.output_archive is not None,
+            digests=digests,
+            options={
+                'minify': args.minify,
+                'prefetch': args.prefetch,
+                'chapter_bundles': args.chapter_bundles,
+            },
+        )
+    scan_cache.save()
+
+    print("Rebuild plan:")
+    plan.print_summary(args.books_dir)
+    print()
+
+    if args.dry_run:
+        return 0
+
+    # Parse changed books and create series
+    print("Parsing and rendering books..." if args.stream else "Parsing books...")
     series_list: list[Series] = []
-    all_books: list[Book] = []
+    books_to_render: list[Book] = []
+    cache = None
+    if not args.no_parse_cache:
+        cache = BookCache(CACHE_DIR, PARSE_CACHE_MAX_BYTES, plan.digests)
+    # Yields in plan.to_parse order, which follows series_files order below
+    remembered = parsed_books if parsed_books is not None else {}
+    to_parse = plan.to_parse
+    if parsed_books is not None:
+        # Each content is parsed once; later files with it reuse that book
+        queued = set(remembered)
+        to_parse = []
+        for path in plan.to_parse:
+            if plan.digests[path] not in queued:
+                queued.add(plan.digests[path])
+                to_parse.append(path)
+    parsing = set(to_parse)
+    parsed = parse_books(to_parse, jobs=args.jobs, cache=cache)
+
+    # Keep every book's previous URL, matched by source path or content
+    slugs = SlugRegistry(manifest.books.values(), output_subdirs(args.output_dir))
+    slugs.reserve(
+        (path.relative_to(args.books_dir).as_posix(), plan.digests[path])
+        for path in all_files
+    )
+
+    renderer = Renderer(
+        output_dir=args.output_dir,
+        jobs=args.jobs,
+        compress=args.compress,
+        write_threads=max(args.write_threads, 0),
+        output_archive=args.output_archive,
+        minify=args.minify,
+        prefetch=args.prefetch,
+        chapter_bundles=args.chapter_bundles,
+    )
+    if args.output_archive and args.jobs > 1:
+        print("  (books are rendered into the archive in one process)")
+    books_streamed: list[BookRecord] = []
+    streamed_stats = WriteStats()
+    if args.stream:
+        # Books go straight from parser to output; only records come back
+        streamed = renderer.render_book_files(
+            stream_records(plan.to_parse, args.books_dir, plan, slugs, cache),
+            functools.partial(open_book, cache=cache),
+        )
 
     for series_name, file_paths in series_files.items():
         if series_name:
@@ -133,34 +710,141 @@ def main():
         else:
             print("  Standalone books:")
 
-        series_books: list[Book] = []
+        series_records: list[BookRecord] = []
         for file_path in file_paths:
+            record = plan.unchanged.get(file_path)
+            if record is not None:
+                print(f"    Unchanged: {file_path.name}")
+                record.identity = plan.digests[file_path]
+                series_records.append(record)
+                continue
+
+            if args.stream:
+                print(f"    Building: {file_path.name}")
+                built_path, record, log, book_stats = next(streamed)
+                assert built_path == file_path
+                print(log, end="")
+                if record:
+                    streamed_stats.add(book_stats)
+                    books_streamed.append(record)
+                    series_records.append(record)
+                    print(f"      - {record.title} by {record.author}")
+                continue
+
             print(f"    Parsing: {file_path.name}")
-            book = parse_book(file_path)
+            if file_path in parsing:
+                parsed_path, book, log = next(parsed)
+                assert parsed_path == file_path
+                print(log, end="")
+                if book and parsed_books is not None:
+                    parsed_books[plan.digests[file_path]] = book
+            else:
+                book = remembered.get(plan.digests[file_path])
+                if book is not None:
+                    # A copy: files with the same content get their own slug
+                    book = copy.copy(book)
+                    print("      (already parsed)")
+                else:
+                    print("      (same content failed to parse)")
             if book:
-                series_books.append(book)
-                all_books.append(book)
+                source = file_path.relative_to(args.books_dir).as_posix()
+                identity = plan.digests[file_path]
+                book.slug = slugs.slug_for(
+                    source, identity, book.title, str(file_path)
+                )
+                series_records.append(
+                    BookRecord.from_book(
+                        book, source, plan.keys[file_path], identity
+                    )
+                )
+                books_to_render.append(book)
                 print(f"      - {book.title} by {book.author}")
                 print(f"      - {book.total_chapters} chapter(s)")
 
-        if series_books:
+        if series_records:
             # Sort books in series by title (natural sort for numbers)
-            series_books.sort(key=lambda b: natural_sort_key(b.title))
-            series_list.append(Series(name=series_name, books=series_books))
+            series_records.sort(key=lambda r: natural_sort_key(r.title))
+            series_list.append(Series(name=series_name, books=series_records))
 
-    if not all_books:
+    if cache is not None:
+        cache.prune()
+
+    if parsed_books is not None:
+        # Forget books that left the library
+        current = set(plan.digests.values())
+        for digest in [d for d in parsed_books if d not in current]:
+            del parsed_books[digest]
+
+    if not series_list:
         print("No books were successfully parsed!")
-        sys.exit(1)
+        return 1
 
     # Sort series alphabetically (standalone books "" come first)
     series_list.sort(key=lambda s: (s.name != "", s.name.lower()))
 
+    catalog = [(s.name, s.books) for s in series_list]
+    index_key = catalog_digest(catalog, plan.env_digest)
+    render_index = (
+        plan.full_rebuild
+        or index_key != manifest.index_key
+        or not (args.output_dir / "index.html").exists()
+    )
+    all_records = [r for _, records in catalog for r in records]
+    current_slugs = {r.slug for r in all_records}
+    removed_slugs = manifest.stale_slugs(current_slugs)
+    if args.output_archive:
+        removed_slugs = []  # The output directory is left alone
+
     print()
 
+    nothing_built = not (books_to_render or books_streamed)
+    if nothing_built and not removed_slugs and not render_index:
+        # A lowered budget still applies to books that were not rendered
+        if not check_page_budget(
+            catalog_page_weights(all_records, {}, args.output_dir), args.page_budget
+        ):
+            return 1
+        print("Site is up to date.")
+        if args.compress:
+            renderer.compress_output()
+        return 0
+
     # Generate site
     print("Generating site...")
-    renderer = Renderer(output_dir=args.output_dir)
-    renderer.render_site(series_list, all_books)
+    write_stats = renderer.render_site(
+        series_list,
+        books_to_render,
+        clean=plan.full_rebuild,
+        removed_slugs=removed_slugs,
+        render_index=render_index,
+        book_stats=streamed_stats,
+    )
+    if write_stats.errors:
+        # The previous manifest still describes what is safely on disk, so
+        # the next build retries everything this one changed
+        print()
+        print(f"{len(write_stats.errors)} file(s) could not be written or deleted, "
+              "keeping the previous build manifest")
+        return 1
+
+    if not check_page_budget(
+        catalog_page_weights(all_records, write_stats.pages, args.output_dir),
+        args.page_budget,
+    ):
+        return 1
+
+    if args.output_archive:
+        # The manifest describes the output directory, which was not touched
+        print()
+        print("Done!")
+        print(f"Deploy {args.output_archive} as it is, e.g. as the GitHub "
+              "Pages artifact.")
+        return 0
+
+    manifest.books = {r.source: r for r in all_records}
+    manifest.index_key = index_key
+    with profiling.stage('manifest'):
+        manifest.save()
 
     print()
     print("Done!")
@@ -170,6 +854,7 @@ def main():
     print("  1. git add docs/")
     print("  2. git commit -m 'Update books'")
     print("  3. git push")
+    return 0
 
 
 if __name__ == '__main__':
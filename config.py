@@ -8,6 +8,19 @@ BOOKS_DIR = ROOT_DIR / "books"
 OUTPUT_DIR = ROOT_DIR / "docs"
 TEMPLATES_DIR = ROOT_DIR / "templates"
 STATIC_DIR = ROOT_DIR / "static"
+CACHE_DIR = ROOT_DIR / ".cache"  # Build caches, safe to delete
+
+# Parsed books kept in CACHE_DIR; least recently used ones are evicted beyond this
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Processed covers kept in CACHE_DIR, evicted the same way beyond this
+COVER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Threads writing rendered files to disk while rendering goes on (0: none)
+WRITE_THREADS = 4
+
+# Largest reader page, in bytes, a build may produce (None: no limit)
+PAGE_BYTES_BUDGET = None
 
 # Screen configurations for Cloud Phone
 SCREENS = {
@@ -16,15 +29,30 @@ SCREENS = {
         "height": 320,
         "content_height": 280,  # Leave space for nav bar
         "padding": 8,
+        "text_height": 240,  # .content height minus padding in style.css
+        # Reader text (px, line height) per font size, as in style.css
+        "reader_fonts": {"small": (12, 1.4), "medium": (16, 1.4), "large": (18, 1.4)},
+        "cover_size": (140, 180),  # .cover-image max size in style.css
     },
     "qqvga": {  # 128x160
         "width": 128,
         "height": 160,
         "content_height": 120,
         "padding": 4,
+        "text_height": 106,
+        "reader_fonts": {"small": (9, 1.2), "medium": (10, 1.2), "large": (12, 1.4)},
+        "cover_size": (72, 92),
     },
 }
 
+# Screen the FONT_SIZES metrics below are tuned for; other screens derive
+# theirs from their text box and reader fonts
+DEFAULT_SCREEN = "qvga"
+
+# Average glyph width of the reader font, in ems (25 characters fill the
+# 224px qvga text box at 16px)
+CHAR_WIDTH_EM = 0.56
+
 # Font size presets
 FONT_SIZES = {
     "small": {
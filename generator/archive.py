@@ -0,0 +1,228 @@
+"""Site output written straight into one .tar or .zip archive.
+
+Deploy pipelines usually pack the output directory into an artifact right
+after the build, which means writing tens of thousands of small files only
+to read them all back. In archive mode the renderer adds every page, cover
+and static file to the archive as it is produced instead.
+
+Archives are reproducible: entries appear in the order the (single-process)
+build renders them, and every entry gets the same timestamp, owner and
+permissions, so identical inputs give byte-identical archives.
+"""
+
+import io
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections.abc import Iterable
+from pathlib import Path, PurePosixPath
+
+from .compress import COMPRESSIBLE_SUFFIXES, CompressStats, compress_bytes
+from .writer import WriteStats
+
+# Archive formats, by file suffix
+ARCHIVE_SUFFIXES = (".tar", ".zip")
+
+# Timestamp of every entry unless SOURCE_DATE_EPOCH is set: 1980-01-01, the
+# earliest date a zip entry can hold
+_DEFAULT_MTIME = 315532800
+
+# Already compressed; stored in zip archives as they are
+_STORED_SUFFIXES = frozenset([".gz", ".br", ".jpg", ".jpeg", ".png", ".gif"])
+
+
+def archive_mtime() -> int:
+    """Timestamp given to archive entries (see reproducible-builds.org)."""
+    try:
+        return max(int(os.environ["SOURCE_DATE_EPOCH"]), _DEFAULT_MTIME)
+    except (KeyError, ValueError):
+        return _DEFAULT_MTIME
+
+
+class SiteArchive:
+    """A .tar or .zip archive receiving the site as it is rendered.
+
+    Entry names are paths relative to the site root. The archive is built
+    in a temporary file next to its destination and only replaces it in
+    close(), so a failed build leaves the previous archive in place.
+    """
+
+    def __init__(
+        self, path: Path, site_root: Path, compress_suffixes: tuple[str, ...] = ()
+    ):
+        """Initialize the archive; nothing is written before the first file.
+
+        Args:
+            path: Archive to create, ending in .tar or .zip
+            site_root: Directory whose files the renderer writes (output_dir)
+            compress_suffixes: Compressed sibling entries (.gz, .br) to add
+                next to every HTML, CSS and JS file
+        """
+        if path.suffix.lower() not in ARCHIVE_SUFFIXES:
+            raise ValueError(
+                f"Unsupported archive type: {path.name} "
+                f"(use {' or '.join(ARCHIVE_SUFFIXES)})"
+            )
+        self.path = path
+        self.site_root = site_root
+        self.compress_suffixes = compress_suffixes
+        self.mtime = archive_mtime()
+        # Compressed sizes per book slug ("" for site-wide files)
+        self.compressed: dict[str, CompressStats] = {}
+        self._dirs: set[str] = set()
+        self._tmp: str | None = None
+        self._file: io.BufferedWriter | None = None
+        self._archive: tarfile.TarFile | zipfile.ZipFile | None = None
+
+    def __enter__(self) -> "SiteArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def writer(self, root: Path) -> "ArchiveWriter":
+        """Return an OutputWriter counterpart for a directory of the site."""
+        return ArchiveWriter(self, root)
+
+    def add(self, path: Path, data: bytes) -> None:
+        """Add a file of the site, and its compressed siblings if enabled."""
+        name = path.relative_to(self.site_root).as_posix()
+        self._add_file(name, data)
+
+        if self.compress_suffixes and path.suffix in COMPRESSIBLE_SUFFIXES:
+            group = name.split("/", 1)[0] if "/" in name else ""
+            stats = self.compressed.setdefault(group, CompressStats())
+            stats.files += 1
+            stats.raw_bytes += len(data)
+            for suffix in self.compress_suffixes:
+                compressed = compress_bytes(data, suffix)
+                self._add_file(name + suffix, compressed)
+                stats.compressed += 1
+                if suffix == ".gz":
+                    stats.gz_bytes += len(compressed)
+                else:
+                    stats.br_bytes += len(compressed)
+
+    def close(self) -> None:
+        """Finish the archive and move it into place."""
+        if self._archive is None:
+            self._open()
+        self._archive.close()
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        self._archive = self._file = self._tmp = None
+
+    def discard(self) -> None:
+        """Drop a partly written archive, leaving any previous one alone."""
+        if self._archive is not None:
+            self._file.close()
+            os.unlink(self._tmp)
+            self._archive = self._file = self._tmp = None
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        # mkstemp creates the file private; give it the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp, 0o666 & ~umask)
+        # Closing the archive does not close a file object it was given
+        self._file = os.fdopen(fd, "wb")
+        if self.path.suffix.lower() == ".zip":
+            self._archive = zipfile.ZipFile(self._file, "w")
+        else:
+            self._archive = tarfile.open(
+                fileobj=self._file, mode="w", format=tarfile.PAX_FORMAT
+            )
+
+    def _add_file(self, name: str, data: bytes) -> None:
+        if self._archive is None:
+            self._open()
+        self._add_dirs(PurePosixPath(name).parents)
+        if isinstance(self._archive, zipfile.ZipFile):
+            info = self._zip_info(name, 0o100644)
+            if PurePosixPath(name).suffix.lower() not in _STORED_SUFFIXES:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            self._archive.writestr(info, data)
+        else:
+            info = self._tar_info(name, tarfile.REGTYPE, 0o644)
+            info.size = len(data)
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def _add_dirs(self, parents: Iterable[PurePosixPath]) -> None:
+        # Parents come deepest first, ending with the root itself (".")
+        missing = [str(p) for p in parents if str(p) not in self._dirs][:-1]
+        for name in reversed(missing):
+            self._dirs.add(name)
+            if isinstance(self._archive, zipfile.ZipFile):
+                info = self._zip_info(name + "/", 0o040755)
+                info.external_attr |= 0x10  # MS-DOS directory flag
+                self._archive.writestr(info, b"")
+            else:
+                self._archive.addfile(self._tar_info(name, tarfile.DIRTYPE, 0o755))
+
+    def _zip_info(self, name: str, mode: int) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, time.gmtime(self.mtime)[:6])
+        info.create_system = 3  # Unix, whatever the building platform
+        info.external_attr = mode << 16
+        return info
+
+    def _tar_info(self, name: str, kind: bytes, mode: int) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.type = kind
+        info.mode = mode
+        info.mtime = self.mtime
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info
+
+
+class ArchiveWriter:
+    """OutputWriter counterpart that adds files to a SiteArchive.
+
+    The archive always holds a complete site, so there is nothing to keep
+    or prune, and no files are compared with earlier output.
+    """
+
+    def __init__(self, archive: SiteArchive, root: Path):
+        self.archive = archive
+        self.root = root
+        self.stats = WriteStats()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        self.archive.add(path, data)
+        self.stats.written += 1
+
+    def write_text(self, path: Path, text: str) -> None:
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def copy_file(self, source: Path, path: Path) -> None:
+        self.write_bytes(path, source.read_bytes())
+
+    def make_dirs(self, directories: Iterable[Path]) -> None:
+        pass  # Directory entries are added with their first file
+
+    def keep(self, path: Path) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def remove_tree(self, path: Path) -> None:
+        pass
+
+    def prune(self) -> None:
+        pass
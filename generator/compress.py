@@ -0,0 +1,193 @@
+"""Precompressed .gz and .br siblings for text files in the output directory.
+
+Hosts that serve precompressed assets (nginx gzip_static/brotli_static,
+Caddy precompressed, most CDNs) can then send them without compressing on
+every request, which matters on the 2G/3G links Cloud Phone readers use.
+"""
+
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from parsers.cache import write_entry
+
+try:
+    import brotli
+except ImportError:  # Optional: pip install webbooks[compress]
+    brotli = None
+
+# File types worth compressing
+COMPRESSIBLE_SUFFIXES = frozenset([".html", ".css", ".js"])
+
+# Sibling suffixes, in the order they are produced
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+# Files compressed per worker task
+_BATCH_SIZE = 256
+
+
+@dataclass
+class CompressStats:
+    """Raw and compressed byte totals for a group of files."""
+
+    files: int = 0
+    compressed: int = 0  # Siblings (re)written
+    up_to_date: int = 0  # Siblings already newer than their source
+    raw_bytes: int = 0
+    gz_bytes: int = 0
+    br_bytes: int = 0
+    errors: list[str] = field(default_factory=list)  # "path: reason" per file
+
+    def add(self, other: "CompressStats") -> None:
+        self.files += other.files
+        self.compressed += other.compressed
+        self.up_to_date += other.up_to_date
+        self.raw_bytes += other.raw_bytes
+        self.gz_bytes += other.gz_bytes
+        self.br_bytes += other.br_bytes
+        self.errors.extend(other.errors)
+
+
+def available_suffixes() -> tuple[str, ...]:
+    """Compressed suffixes that can be produced with installed modules."""
+    return COMPRESSED_SUFFIXES if brotli is not None else (".gz",)
+
+
+def compress_bytes(data: bytes, suffix: str) -> bytes:
+    """Compress data for a sibling suffix, reproducibly (no timestamps)."""
+    if suffix == ".gz":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+
+
+def compress_files(paths: list[str], suffixes: tuple[str, ...]) -> CompressStats:
+    """Write compressed siblings for files whose siblings are missing or stale.
+
+    A sibling is up to date when its mtime is not older than the source's.
+    OutputWriter leaves unchanged files alone, so their mtimes, and with them
+    the existing siblings, survive rebuilds. Siblings are replaced atomically,
+    so an interrupted build never leaves a truncated one that looks fresh,
+    and a file that can not be compressed is recorded in the errors instead
+    of stopping the others.
+    """
+    stats = CompressStats()
+    for path in paths:
+        try:
+            _compress_file(path, suffixes, stats)
+        except OSError as e:
+            stats.errors.append(f"{e.filename or path}: {e.strerror or e}")
+    return stats
+
+
+def _compress_file(path: str, suffixes: tuple[str, ...], stats: CompressStats) -> None:
+    source = os.stat(path)
+    stats.files += 1
+    stats.raw_bytes += source.st_size
+    data = None
+
+    for suffix in suffixes:
+        target = path + suffix
+        try:
+            sibling = os.stat(target)
+            fresh = sibling.st_mtime_ns >= source.st_mtime_ns
+        except FileNotFoundError:
+            fresh = False
+
+        if fresh:
+            size = sibling.st_size
+            stats.up_to_date += 1
+        else:
+            if data is None:
+                with open(path, "rb") as f:
+                    data = f.read()
+            compressed = compress_bytes(data, suffix)
+            write_entry(Path(target), compressed)
+            size = len(compressed)
+            stats.compressed += 1
+
+        if suffix == ".gz":
+            stats.gz_bytes += size
+        else:
+            stats.br_bytes += size
+
+
+def _compress_batch(
+    batch: tuple[str, list[str], tuple[str, ...]],
+) -> tuple[str, CompressStats]:
+    group, paths, suffixes = batch
+    return group, compress_files(paths, suffixes)
+
+
+def compress_site(
+    output_dir: Path, suffixes: tuple[str, ...], jobs: int = 1
+) -> dict[str, CompressStats]:
+    """Compress every HTML, CSS and JS file in the output directory.
+
+    Args:
+        output_dir: Site output directory
+        suffixes: Sibling suffixes to produce (see available_suffixes)
+        jobs: Number of worker processes
+
+    Returns:
+        Dict mapping book slug ("" for site-wide files) to its totals
+    """
+    batches: list[tuple[str, list[str], tuple[str, ...]]] = []
+    for entry in sorted(os.scandir(output_dir), key=lambda e: e.name):
+        if entry.is_dir():
+            group = entry.name
+            paths = [
+                os.path.join(dirpath, name)
+                for dirpath, _, filenames in os.walk(entry.path)
+                for name in filenames
+                if os.path.splitext(name)[1] in COMPRESSIBLE_SUFFIXES
+            ]
+        elif os.path.splitext(entry.name)[1] in COMPRESSIBLE_SUFFIXES:
+            group, paths = "", [entry.path]
+        else:
+            continue
+        for start in range(0, len(paths), _BATCH_SIZE):
+            batches.append((group, paths[start:start + _BATCH_SIZE], suffixes))
+
+    if jobs <= 1 or len(batches) <= 1:
+        done = [_compress_batch(batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as pool:
+            done = list(pool.map(_compress_batch, batches))
+
+    results: dict[str, CompressStats] = {}
+    for group, stats in done:
+        results.setdefault(group, CompressStats()).add(stats)
+    return results
+
+
+def print_compress_summary(
+    results: dict[str, CompressStats], suffixes: tuple[str, ...]
+) -> None:
+    """Print raw vs compressed bytes per book and in total."""
+    total = CompressStats()
+    print("Compressed output:")
+    for group in sorted(results):
+        stats = results[group]
+        total.add(stats)
+        print(f"  - {group or '(site)'}: {_format_sizes(stats, suffixes)}")
+    print(
+        f"  Total: {_format_sizes(total, suffixes)}; "
+        f"{total.compressed} written, {total.up_to_date} up to date"
+    )
+    for error in total.errors:
+        print(f"    Error compressing {error}")
+
+
+def _format_sizes(stats: CompressStats, suffixes: tuple[str, ...]) -> str:
+    parts = [f"{stats.files} files, {_kib(stats.raw_bytes)} raw"]
+    for suffix, size in ((".gz", stats.gz_bytes), (".br", stats.br_bytes)):
+        if suffix in suffixes:
+            ratio = size / stats.raw_bytes if stats.raw_bytes else 0
+            parts.append(f"{_kib(size)} {suffix[1:]} ({ratio:.0%})")
+    return ", ".join(parts)
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:,.0f} KiB"
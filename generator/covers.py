@@ -0,0 +1,146 @@
+"""Cover image processing: downscale and transcode covers per screen."""
+
+import hashlib
+import io
+import os
+from pathlib import Path
+
+from config import COVER_CACHE_MAX_BYTES, SCREENS
+from parsers.cache import prune_entries, write_entry
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional: pip install webbooks[images]
+    Image = None
+
+# JPEG settings for processed covers
+COVER_QUALITY = 80
+
+# Bump when processing changes in a way that alters output
+COVER_VERSION = 1
+
+
+def pipeline_id() -> str:
+    """Identify how covers are produced, for the render environment digest."""
+    if Image is None:
+        return "original"
+    sizes = ",".join(f"{name}={s['cover_size']}" for name, s in sorted(SCREENS.items()))
+    return f"jpeg:{COVER_VERSION}:q{COVER_QUALITY}:{sizes}"
+
+
+def resize_cover(data: bytes, size: tuple[int, int]) -> bytes:
+    """Fit an image into size and encode it as a progressive JPEG.
+
+    Images smaller than size are not enlarged. Transparent areas are
+    flattened onto white.
+
+    Args:
+        data: Source image bytes (any format Pillow reads)
+        size: Maximum (width, height)
+
+    Returns:
+        JPEG bytes
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        out = io.BytesIO()
+        image.save(
+            out, "JPEG", quality=COVER_QUALITY, optimize=True, progressive=True
+        )
+        return out.getvalue()
+
+
+class CoverProcessor:
+    """Produces per-screen covers, cached by source image hash.
+
+    Like the parse cache, reading an entry refreshes its mtime and prune()
+    evicts the least recently used entries beyond max_bytes.
+    """
+
+    def __init__(
+        self, cache_dir: Path | None = None, max_bytes: int = COVER_CACHE_MAX_BYTES
+    ):
+        """Initialize the processor.
+
+        Args:
+            cache_dir: Build cache directory (None: no caching)
+            max_bytes: Total size of cached covers to keep after prune()
+        """
+        self.cache_dir = cache_dir / "covers" if cache_dir is not None else None
+        self.max_bytes = max_bytes
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def screen_covers(self, data: bytes) -> dict[str, bytes] | None:
+        """Resize a cover for every screen in SCREENS.
+
+        Args:
+            data: Source image bytes
+
+        Returns:
+            Dict mapping screen name to JPEG bytes, or None if Pillow is not
+            installed or the image can not be decoded
+        """
+        if Image is None:
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        covers: dict[str, bytes] = {}
+        for screen, settings in SCREENS.items():
+            width, height = settings["cover_size"]
+            key = f"{digest}-{width}x{height}-q{COVER_QUALITY}-v{COVER_VERSION}.jpg"
+            cached = self._cache_get(key)
+            if cached is None:
+                try:
+                    cached = resize_cover(data, (width, height))
+                except (OSError, ValueError, Image.DecompressionBombError) as e:
+                    print(f"  Warning: Could not process cover image: {e}")
+                    return None
+                self._cache_put(key, cached)
+            covers[screen] = cached
+        return covers
+
+    def _cache_get(self, key: str) -> bytes | None:
+        if self.cache_dir is None:
+            return None
+        entry = self.cache_dir / key
+        try:
+            data = entry.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(entry)  # Mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def _cache_put(self, key: str, data: bytes) -> None:
+        if self.cache_dir is None:
+            return
+        # A failed write only costs processing the cover again next time
+        try:
+            write_entry(self.cache_dir / key, data)
+        except OSError as e:
+            print(f"  Warning: Could not write cover cache: {e}")
+
+    def prune(self) -> int:
+        """Evict least recently used covers until the cache fits max_bytes.
+
+        Returns:
+            Number of covers removed
+        """
+        if self.cache_dir is None:
+            return 0
+        return prune_entries(self.cache_dir, self.max_bytes, "cover cache")
@@ -0,0 +1,67 @@
+"""Local preview server and file change polling for watch mode."""
+
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# File state used to notice changes: (mtime in ns, size)
+FileState = tuple[int, int]
+
+
+def snapshot(directories: list[Path]) -> dict[str, FileState]:
+    """Record the state of every file under the given directories.
+
+    Hidden files and directories (editor swap files, .git) are ignored.
+    """
+    files: dict[str, FileState] = {}
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # Deleted while walking
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def changed_paths(
+    before: dict[str, FileState], after: dict[str, FileState]
+) -> list[str]:
+    """Paths added, removed or modified between two snapshots."""
+    return sorted(
+        path
+        for path in before.keys() | after.keys()
+        if before.get(path) != after.get(path)
+    )
+
+
+class _PreviewHandler(SimpleHTTPRequestHandler):
+    """Serves the output directory without caching and without access logs."""
+
+    def end_headers(self) -> None:
+        # Rebuilt pages must show up on the next reload
+        self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(directory: Path, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve a directory over HTTP from a background thread.
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    handler = functools.partial(_PreviewHandler, directory=str(directory))
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,140 @@
+"""Greedy line wrapping for fixed-width pages.
+
+Drop-in replacement for ``textwrap.wrap(text, width, break_long_words=True,
+break_on_hyphens=True)`` that produces identical lines, but is several times
+faster on book text:
+
+- plain prose (single spaces, no hyphens, no word wider than a line) is
+  filled word by word straight from ``str.split``;
+- otherwise whitespace munging (tab expansion and the per-character
+  ``translate``) only runs when the line actually contains tabs or other
+  control whitespace, text is split on spaces with a trivial regex, and
+  textwrap's expensive hyphenation regex is applied only to the words that
+  contain a hyphen;
+- the greedy fill walks the chunk list by index instead of reversing and
+  popping it.
+"""
+
+import re
+import textwrap
+
+# textwrap's chunking regex: splits words after hyphens and around em-dashes
+_WORDSEP_RE = textwrap.TextWrapper.wordsep_re
+
+# After munging, spaces are the only whitespace left
+_SPACES_RE = re.compile(r"( +)")
+
+# Any whitespace other than a plain space
+_OTHER_WS_RE = re.compile(r"[^\S ]")
+
+# Whitespace that textwrap turns into spaces (besides the space itself)
+_CONTROL_WS_RE = re.compile(r"[\t\n\x0b\x0c\r]")
+_CONTROL_WS_TRANS = str.maketrans("\t\n\x0b\x0c\r", "     ")
+
+
+def split_chunks(text: str) -> list[str]:
+    """Split text into the same chunks as textwrap.TextWrapper._split_chunks."""
+    if _CONTROL_WS_RE.search(text):
+        text = text.expandtabs().translate(_CONTROL_WS_TRANS)
+
+    chunks: list[str] = []
+    for part in _SPACES_RE.split(text):
+        if not part:
+            continue
+        if "-" in part and part[0] != " ":
+            chunks.extend(c for c in _WORDSEP_RE.split(part) if c)
+        else:
+            chunks.append(part)
+    return chunks
+
+
+def wrap(text: str, width: int) -> list[str]:
+    """Wrap a single line of text into lines of at most width characters.
+
+    Long words are broken (after a hyphen when possible) and whitespace at
+    line boundaries is dropped, exactly like textwrap.wrap.
+
+    Args:
+        text: Text to wrap
+        width: Maximum line length
+
+    Returns:
+        List of lines, empty if the text is only whitespace
+    """
+    # Fast path: plain words separated by single spaces
+    if (
+        text
+        and text[0] != " "
+        and text[-1] != " "
+        and "-" not in text
+        and "  " not in text
+        and not _OTHER_WS_RE.search(text)
+    ):
+        words = text.split(" ")
+        if max(map(len, words)) <= width:
+            return _fill_words(words, width)
+
+    chunks = split_chunks(text)
+    count = len(chunks)
+    lines: list[str] = []
+    i = 0
+
+    while i < count:
+        # Whitespace at the start of a line is dropped, except on the first line
+        if lines and chunks[i].strip() == "":
+            i += 1
+            if i == count:
+                break
+
+        # Fill the line with whole chunks
+        start = i
+        cur_len = 0
+        while i < count:
+            length = len(chunks[i])
+            if cur_len + length > width:
+                break
+            cur_len += length
+            i += 1
+        cur_line = chunks[start:i]
+
+        # Next chunk is too long for any line: break it
+        if i < count and len(chunks[i]) > width:
+            space_left = width - cur_len if width >= 1 else 1
+            chunk = chunks[i]
+            end = space_left
+            if len(chunk) > space_left:
+                # Break after the last hyphen if there are non-hyphens before it
+                hyphen = chunk.rfind("-", 0, space_left)
+                if hyphen > 0 and chunk[:hyphen].strip("-"):
+                    end = hyphen + 1
+            cur_line.append(chunk[:end])
+            chunks[i] = chunk[end:]
+
+        # Whitespace at the end of a line is dropped
+        if cur_line and cur_line[-1].strip() == "":
+            del cur_line[-1]
+
+        if cur_line:
+            lines.append("".join(cur_line))
+
+    return lines
+
+
+def _fill_words(words: list[str], width: int) -> list[str]:
+    """Greedy fill of words that each fit on a line, joined by single spaces."""
+    lines: list[str] = []
+    line_words: list[str] = []
+    line_len = -1  # Length of the current line, counting a leading separator
+
+    for word in words:
+        length = len(word) + 1
+        if line_len + length > width and line_words:
+            lines.append(" ".join(line_words))
+            line_words = [word]
+            line_len = length - 1
+        else:
+            line_words.append(word)
+            line_len += length
+
+    lines.append(" ".join(line_words))
+    return lines
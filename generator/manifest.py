@@ -0,0 +1,287 @@
+"""Build manifest for incremental site generation."""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from posixpath import basename
+
+from config import (
+    DEFAULT_FONT_SIZE,
+    DEFAULT_SCREEN,
+    FONT_SIZES,
+    NAV_KEYS,
+    SCREENS,
+    STATIC_DIR,
+    TEMPLATES_DIR,
+)
+from parsers.base import Book, file_digest
+
+from .covers import pipeline_id
+from .pageweight import PageWeight
+
+# Manifest file name, stored inside the output directory
+MANIFEST_NAME = ".webbooks-manifest.json"
+
+# Bump when pagination or rendering logic changes in a way that alters output
+RENDER_VERSION = 2
+
+
+@dataclass
+class BookRecord:
+    """Lightweight catalog entry for a rendered book.
+
+    Carries everything index.html needs, so unchanged books can be listed
+    without parsing them again.
+    """
+
+    source: str  # Path relative to the books directory
+    key: str  # Build key: source hash + render environment hash
+    title: str
+    author: str
+    slug: str
+    has_cover: bool = False
+    identity: str = ""  # SHA-256 of the source file, see SlugRegistry
+    # Reader page sizes, see PageWeight (no pages: not measured yet)
+    pages: int = 0
+    page_bytes: int = 0
+    max_page_bytes: int = 0
+    max_page: str = ""
+
+    @classmethod
+    def from_book(
+        cls, book: Book, source: str, key: str, identity: str = ""
+    ) -> "BookRecord":
+        """Create a record for a freshly parsed book."""
+        return cls(
+            source=source,
+            key=key,
+            title=book.title,
+            author=book.author,
+            slug=book.slug,
+            has_cover=book.has_cover,
+            identity=identity,
+        )
+
+    @property
+    def page_weight(self) -> PageWeight | None:
+        """Recorded reader page sizes, or None if never measured."""
+        if not self.pages:
+            return None
+        return PageWeight(
+            self.pages, self.page_bytes, self.max_page_bytes, self.max_page
+        )
+
+    def set_page_weight(self, weight: PageWeight) -> None:
+        self.pages = weight.pages
+        self.page_bytes = weight.total_bytes
+        self.max_page_bytes = weight.max_bytes
+        self.max_page = weight.max_page
+
+
+@dataclass
+class BuildPlan:
+    """What needs to be done to bring the output up to date."""
+
+    to_parse: list[Path] = field(default_factory=list)
+    unchanged: dict[Path, BookRecord] = field(default_factory=dict)
+    removed: list[BookRecord] = field(default_factory=list)
+    # Books found under a new path, which keep their slug: (record, new path)
+    moved: list[tuple[BookRecord, Path]] = field(default_factory=list)
+    keys: dict[Path, str] = field(default_factory=dict)
+    digests: dict[Path, str] = field(default_factory=dict)  # Source file hashes
+    env_digest: str = ""
+    full_rebuild: bool = False
+
+    def print_summary(self, books_dir: Path) -> None:
+        """Print a human-readable rebuild plan."""
+        if self.full_rebuild:
+            print("Full rebuild (no usable manifest)")
+        print(f"  To parse and render: {len(self.to_parse)}")
+        for path in self.to_parse:
+            print(f"    + {path.relative_to(books_dir)}")
+        print(f"  Unchanged: {len(self.unchanged)}")
+        if self.moved:
+            print(f"  Moved: {len(self.moved)}")
+            for record, path in self.moved:
+                print(
+                    f"    > {record.source} -> {path.relative_to(books_dir)} "
+                    f"({record.slug})"
+                )
+        print(f"  Removed: {len(self.removed)}")
+        for record in self.removed:
+            print(f"    - {record.source} ({record.slug})")
+        index_state = "rebuild" if self.catalog_may_change else "unchanged"
+        print(f"  index.html: {index_state}")
+
+    @property
+    def catalog_may_change(self) -> bool:
+        return self.full_rebuild or bool(self.to_parse or self.removed)
+
+
+def render_environment_digest(options: dict | None = None) -> str:
+    """Hash everything besides the source file that affects rendered output.
+
+    Covers templates, static files, screen, font size and navigation key
+    settings, how cover images are processed, and the given render options
+    (e.g. minification).
+    """
+    digest = hashlib.sha256()
+    digest.update(f"render:{RENDER_VERSION}\n".encode())
+
+    for directory in (TEMPLATES_DIR, STATIC_DIR):
+        if not directory.exists():
+            continue
+        for path in sorted(p for p in directory.iterdir() if p.is_file()):
+            digest.update(f"{directory.name}/{path.name}:".encode())
+            digest.update(file_digest(path).encode())
+            digest.update(b"\n")
+
+    settings = {
+        "font_sizes": FONT_SIZES,
+        "default_font_size": DEFAULT_FONT_SIZE,
+        "screens": SCREENS,
+        "default_screen": DEFAULT_SCREEN,
+        "nav_keys": NAV_KEYS,
+        "covers": pipeline_id(),
+        "options": options or {},
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """Records what was rendered into the output directory and from which inputs."""
+
+    def __init__(self, output_dir: Path):
+        self.path = output_dir / MANIFEST_NAME
+        self.books: dict[str, BookRecord] = {}
+        self.index_key = ""
+        self.loaded = False
+
+    def load(self) -> None:
+        """Load the manifest from disk, treating a missing or bad file as empty.
+
+        A manifest from another RENDER_VERSION still provides the books and
+        their slugs, but no render keys, so nothing counts as up to date.
+        """
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        try:
+            self.books = {
+                entry["source"]: BookRecord(**entry) for entry in data["books"]
+            }
+        except (KeyError, TypeError):
+            self.books = {}
+            return
+
+        if data.get("render_version") != RENDER_VERSION:
+            # Everything is rendered again, but books keep their slugs (and
+            # so their URLs and saved reading positions)
+            for record in self.books.values():
+                record.key = ""
+            return
+        self.index_key = data.get("index_key", "")
+        self.loaded = True
+
+    def save(self) -> None:
+        """Write the manifest to disk."""
+        data = {
+            "render_version": RENDER_VERSION,
+            "index_key": self.index_key,
+            "books": [
+                asdict(r) for r in sorted(self.books.values(), key=lambda r: r.source)
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8"
+        )
+
+    def plan(
+        self,
+        books_dir: Path,
+        file_paths: list[Path],
+        force: bool = False,
+        digests: dict[Path, str] | None = None,
+        options: dict | None = None,
+    ) -> BuildPlan:
+        """Compare current book files against the manifest.
+
+        Args:
+            books_dir: Root books directory (sources are stored relative to it)
+            file_paths: All discovered book files
+            force: Ignore the manifest and rebuild everything
+            digests: Known SHA-256 of book files (see ScanCache); other
+                files are read and hashed
+            options: Render options that change the output (see
+                render_environment_digest)
+
+        Returns:
+            BuildPlan listing books to parse, reuse and remove
+        """
+        output_dir = self.path.parent
+        env_digest = render_environment_digest(options)
+        plan = BuildPlan(env_digest=env_digest, full_rebuild=force or not self.loaded)
+        seen: set[str] = set()
+
+        for file_path in file_paths:
+            source = file_path.relative_to(books_dir).as_posix()
+            seen.add(source)
+            if digests is not None and file_path in digests:
+                digest = digests[file_path]
+            else:
+                digest = file_digest(file_path)
+            key = hashlib.sha256(f"{digest}:{env_digest}".encode()).hexdigest()
+            plan.keys[file_path] = key
+            plan.digests[file_path] = digest
+
+            record = None if plan.full_rebuild else self.books.get(source)
+            if (
+                record is not None
+                and record.key == key
+                and (output_dir / record.slug).is_dir()
+            ):
+                plan.unchanged[file_path] = record
+            else:
+                plan.to_parse.append(file_path)
+
+        if not plan.full_rebuild:
+            # New paths by content, to tell moved books from removed ones
+            added: dict[str, list[Path]] = {}
+            for file_path in plan.to_parse:
+                if file_path.relative_to(books_dir).as_posix() not in self.books:
+                    added.setdefault(plan.digests[file_path], []).append(file_path)
+
+            for source, record in self.books.items():
+                if source in seen:
+                    continue
+                paths = added.get(record.identity) if record.identity else None
+                if not paths:
+                    plan.removed.append(record)
+                    continue
+                # Like SlugRegistry, prefer a copy that kept its file name
+                path = next(
+                    (p for p in paths if p.name == basename(source)), paths[0]
+                )
+                paths.remove(path)
+                plan.moved.append((record, path))
+
+        return plan
+
+    def stale_slugs(self, current_slugs: set[str]) -> list[str]:
+        """Slugs of previously rendered books that are no longer in the catalog."""
+        return sorted({r.slug for r in self.books.values()} - current_slugs)
+
+
+def catalog_digest(catalog: list[tuple[str, list[BookRecord]]], env_digest: str) -> str:
+    """Hash the ordered catalog shown on index.html."""
+    data = [
+        [name, [[r.slug, r.title, r.author, r.has_cover] for r in records]]
+        for name, records in catalog
+    ]
+    payload = json.dumps(data, ensure_ascii=False) + env_digest
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,133 @@
+"""Minification of HTML templates: whitespace, attribute quotes, inline scripts.
+
+Templates are minified once, when Jinja compiles them, rather than every
+rendered page. This costs nothing per page, works with the PageShells fast
+path, and can never alter book text, which only enters through {{ }}
+expressions. The rules are conservative:
+
+- Indentation and line breaks between tags are dropped next to block-level
+  elements and collapsed to one space elsewhere, so inline elements keep
+  their gaps.
+- Quotes are dropped from literal attribute values that do not need them.
+- Inline <script> bodies lose indentation, blank lines and comment lines;
+  lines are only joined where no statement can end, and never after a
+  line that may end in a comment.
+- <pre> and <textarea> contents are left alone.
+"""
+
+import re
+
+from jinja2.ext import Extension
+
+# Jinja statements and comments, expressions, and elements whose content is
+# not HTML text
+_TOKENS = re.compile(
+    r"(?P<stmt>\{%.*?%\}|\{#.*?#\})"
+    r"|(?P<expr>\{\{.*?\}\})"
+    r"|(?P<raw><(?P<raw_tag>script|pre|textarea)\b.*?</(?P=raw_tag)>)",
+    re.S | re.I,
+)
+
+# Elements whose surrounding whitespace never renders
+_BLOCK_TAGS = frozenset(
+    "html head body title meta link script style header main nav footer "
+    "section article aside div p ul ol li dl dt dd form fieldset table tr td "
+    "th thead tbody h1 h2 h3 h4 h5 h6 br hr".split()
+)
+
+_BREAK = re.compile(r"\s*\n\s*")
+# Start tags (which may contain Jinja tags), or whole raw elements to skip
+_TAG_OR_RAW = re.compile(
+    r"<(script|pre|textarea)\b.*?</\1>|<[a-zA-Z][^<>]*>", re.S | re.I
+)
+# A quoted literal value that is safe unquoted (and not followed by "/>")
+_QUOTED_VALUE = re.compile(r'(?<=\s)([\w:-]+)="([\w.:-]+)"(?!/)')
+_TAG_NAME = re.compile(r"</?([a-zA-Z][\w-]*)")
+
+# Script line ends and starts after or before which a line break can go
+_JOIN_AFTER = tuple("{([,;")
+_JOIN_BEFORE = tuple("})]")
+
+
+def minify_template(source: str) -> str:
+    """Minify the HTML of a Jinja template, leaving its Jinja tags intact."""
+    source = _TAG_OR_RAW.sub(_unquote_attributes, source)
+
+    out = []
+    position = 0
+    for match in _TOKENS.finditer(source):
+        out.append(_collapse_breaks(source, position, match.start()))
+        text = match.group()
+        if match.group("raw") and text[:8].lower() == "<script>":
+            text = "<script>" + minify_script(text[8:-9]) + "</script>"
+        out.append(text)
+        position = match.end()
+    out.append(_collapse_breaks(source, position, len(source)))
+    return "".join(out)
+
+
+def minify_script(code: str) -> str:
+    """Drop indentation, blank lines and whole-line comments from JavaScript."""
+    lines = []
+    for line in code.splitlines():
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        # A trailing comment would swallow whatever is joined to its line
+        if lines and "//" not in lines[-1] and (
+            lines[-1].endswith(_JOIN_AFTER) or line.startswith(_JOIN_BEFORE)
+        ):
+            lines[-1] += line
+        else:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _unquote_attributes(match: re.Match) -> str:
+    if match.group(1):
+        return match.group()
+    return _QUOTED_VALUE.sub(r"\1=\2", match.group())
+
+
+def _collapse_breaks(source: str, start: int, end: int) -> str:
+    """Drop or collapse the line breaks of source[start:end], which is HTML."""
+
+    def replace(match: re.Match) -> str:
+        if _block_edge_before(source, start + match.start()) or _block_edge_after(
+            source, start + match.end()
+        ):
+            return ""
+        return " "
+
+    return _BREAK.sub(replace, source[start:end])
+
+
+def _block_edge_before(source: str, i: int) -> bool:
+    """Whether source[:i] ends with a block tag or a Jinja statement."""
+    # Jinja statements produce no text of their own where templates put
+    # them on a line of their own
+    if i == 0 or source.endswith(("%}", "#}"), 0, i):
+        return True
+    if not source.endswith(">", 0, i):
+        return False
+    match = _TAG_NAME.match(source, source.rfind("<", 0, i))
+    return match is not None and match.group(1).lower() in _BLOCK_TAGS
+
+
+def _block_edge_after(source: str, i: int) -> bool:
+    """Whether source[i:] starts with a block tag or a Jinja statement."""
+    if i == len(source) or source.startswith(("{%", "{#"), i):
+        return True
+    match = _TAG_NAME.match(source, i)
+    return match is not None and match.group(1).lower() in _BLOCK_TAGS
+
+
+class MinifyExtension(Extension):
+    """Jinja extension minifying .html templates as they are compiled."""
+
+    def preprocess(
+        self, source: str, name: str | None, filename: str | None = None
+    ) -> str:
+        if name is None or not name.endswith(".html"):
+            return source
+        return minify_template(source)
@@ -0,0 +1,123 @@
+"""Fast path for rendering reader pages from a precomputed HTML shell."""
+
+from jinja2 import Template
+from markupsafe import escape
+
+from .paginator import Page
+
+# Placeholders rendered into the shell in place of per-page fields. NUL can not
+# occur in parsed book text (XML forbids it), so they never collide with content.
+_NUMBER = "\x00number\x00"
+_PREV = "\x00prev\x00"
+_NEXT = "\x00next\x00"
+_CONTENT = "\x00content\x00"
+_FIELDS = (_NUMBER, _PREV, _NEXT, _CONTENT)
+
+
+class PageShells:
+    """Renders page.html for one book profile without running the template.
+
+    The template is rendered once per chapter and page layout (chapter start,
+    first and last page) with placeholders for the page number, neighbour
+    links and text. Every page is then produced by joining the shell's static
+    parts with its own fields. The first page rendered from each shell is
+    checked against the full template; if they differ (e.g. the template
+    computes something from a per-page field), that layout falls back to
+    the template for the rest of the book.
+    """
+
+    def __init__(self, template: Template, context: dict):
+        """Initialize with the page template and the book-wide context.
+
+        Args:
+            template: The page.html template
+            context: Template variables shared by every page of the profile
+        """
+        self.template = template
+        self.context = context
+        # Layout key -> alternating static parts and field names, or None
+        self.shells: dict[tuple, list[str] | None] = {}
+
+    def render(self, page: Page, prev_page: int | None, next_page: int | None) -> str:
+        """Render one page, byte-identical to the template path.
+
+        Args:
+            page: The page to render
+            prev_page: Number of the previous page (0 is the cover) or None
+            next_page: Number of the next page or None
+
+        Returns:
+            Page HTML
+        """
+        key = (
+            page.chapter_index,
+            page.chapter_title,
+            page.is_chapter_start,
+            prev_page is None,
+            next_page is None,
+        )
+        if key not in self.shells:
+            html = self.render_template(page, prev_page, next_page)
+            self.shells[key] = self._build_shell(page, prev_page, next_page)
+            if self._fill(self.shells[key], page, prev_page, next_page) != html:
+                self.shells[key] = None
+            return html
+
+        shell = self.shells[key]
+        if shell is None:
+            return self.render_template(page, prev_page, next_page)
+        return self._fill(shell, page, prev_page, next_page)
+
+    def render_template(
+        self, page: Page, prev_page: int | None, next_page: int | None
+    ) -> str:
+        """Render one page through the full Jinja template."""
+        return self.template.render(
+            page=page, prev_page=prev_page, next_page=next_page, **self.context
+        )
+
+    def _build_shell(
+        self, page: Page, prev_page: int | None, next_page: int | None
+    ) -> list[str]:
+        """Render the template with placeholders and split it around them."""
+        placeholder_page = Page(
+            number=_NUMBER,
+            content=_CONTENT,
+            chapter_index=page.chapter_index,
+            chapter_title=page.chapter_title,
+            is_chapter_start=page.is_chapter_start,
+        )
+        html = self.render_template(
+            placeholder_page,
+            None if prev_page is None else _PREV,
+            None if next_page is None else _NEXT,
+        )
+
+        parts = [html]
+        for field in _FIELDS:
+            split = []
+            for i, part in enumerate(parts):
+                # Odd positions already hold field names
+                if i % 2:
+                    split.append(part)
+                    continue
+                pieces = part.split(field)
+                for piece in pieces[:-1]:
+                    split.extend((piece, field))
+                split.append(pieces[-1])
+            parts = split
+        return parts
+
+    @staticmethod
+    def _fill(
+        shell: list[str], page: Page, prev_page: int | None, next_page: int | None
+    ) -> str:
+        values = {
+            _NUMBER: str(page.number),
+            _PREV: str(prev_page),
+            _NEXT: str(next_page),
+            _CONTENT: str(escape(page.content)),
+        }
+        return "".join(
+            values[part] if i % 2 else part for i, part in enumerate(shell)
+        )
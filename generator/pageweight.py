@@ -0,0 +1,89 @@
+"""Reader page sizes per book, and the page weight budget."""
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+# Reader page file names; 0.html is the cover page
+_READER_PAGE = re.compile(r"[1-9][0-9]*\.html")
+
+
+@dataclass
+class PageWeight:
+    """Sizes of the reader pages of one book, over all its profiles."""
+
+    pages: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+    max_page: str = ""  # Heaviest page, relative to the book directory
+
+    def add_page(self, page: str, size: int) -> None:
+        self.pages += 1
+        self.total_bytes += size
+        if size > self.max_bytes:
+            self.max_bytes = size
+            self.max_page = page
+
+    @property
+    def average_bytes(self) -> float:
+        return self.total_bytes / self.pages if self.pages else 0.0
+
+
+def measure_book(book_dir: Path) -> PageWeight:
+    """Measure the reader pages of a book already in the output directory.
+
+    Looks at the book directory itself (default profile) and its profile
+    subdirectories, naming pages like the renderer does.
+    """
+    weight = PageWeight()
+    pending = [("", os.fspath(book_dir))]
+    while pending:
+        prefix, directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if not prefix and entry.is_dir():
+                pending.append((f"{entry.name}/", entry.path))
+            elif _READER_PAGE.fullmatch(entry.name):
+                try:
+                    weight.add_page(prefix + entry.name, entry.stat().st_size)
+                except OSError:
+                    pass
+    return weight
+
+
+def over_budget(weights: dict[str, PageWeight], budget: int) -> dict[str, PageWeight]:
+    """Books with a reader page larger than budget bytes, heaviest first."""
+    return dict(
+        sorted(
+            ((slug, w) for slug, w in weights.items() if w.max_bytes > budget),
+            key=lambda item: item[1].max_bytes,
+            reverse=True,
+        )
+    )
+
+
+def print_page_weights(weights: dict[str, PageWeight], top: int = 10) -> None:
+    """Print average and largest reader page of the heaviest books."""
+    if not weights:
+        return
+    heaviest = sorted(weights.items(), key=lambda i: i[1].max_bytes, reverse=True)
+    print(f"Reader page sizes (bytes, {min(top, len(heaviest))} heaviest books):")
+    print(f"  {'avg':>7} {'max':>7}  book (largest page)")
+    for slug, weight in heaviest[:top]:
+        print(
+            f"  {weight.average_bytes:>7,.0f} {weight.max_bytes:>7,}  "
+            f"{slug} ({weight.max_page})"
+        )
+
+    pages = sum(w.pages for w in weights.values())
+    total = sum(w.total_bytes for w in weights.values())
+    largest = heaviest[0][1].max_bytes
+    print(
+        f"  All {len(weights)} book(s): {pages:,} pages, "
+        f"avg {total / pages if pages else 0:,.0f}, max {largest:,}"
+    )
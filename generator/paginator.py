@@ -1,9 +1,16 @@
 """Text pagination for small screens."""
 
-import textwrap
 from dataclasses import dataclass
 
-from config import DEFAULT_FONT_SIZE, FONT_SIZES
+from config import (
+    CHAR_WIDTH_EM,
+    DEFAULT_FONT_SIZE,
+    DEFAULT_SCREEN,
+    FONT_SIZES,
+    SCREENS,
+)
+
+from .linewrap import wrap
 
 
 @dataclass
@@ -17,18 +24,132 @@ class Page:
     is_chapter_start: bool = False  # True if this is the first page of a chapter
 
 
+@dataclass(frozen=True)
+class PageProfile:
+    """Page geometry for one screen and font size combination."""
+
+    screen: str
+    font_size: str
+    chars_per_line: int
+    lines_per_page: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.screen}-{self.font_size}"
+
+    @property
+    def is_default(self) -> bool:
+        return self.screen == DEFAULT_SCREEN and self.font_size == DEFAULT_FONT_SIZE
+
+
+def make_profile(
+    screen: str = DEFAULT_SCREEN, font_size: str = DEFAULT_FONT_SIZE
+) -> PageProfile:
+    """Compute page geometry for a screen and font size.
+
+    FONT_SIZES metrics are tuned for DEFAULT_SCREEN. Other screens fit as
+    many characters and lines as their text box holds at the reader font
+    size and line height style.css gives them for this font size.
+    """
+    screen = screen if screen in SCREENS else DEFAULT_SCREEN
+    font_size = font_size if font_size in FONT_SIZES else DEFAULT_FONT_SIZE
+    settings = FONT_SIZES[font_size]
+    chars_per_line = settings["chars_per_line"]
+    lines_per_page = settings["lines_per_page"]
+
+    if screen != DEFAULT_SCREEN:
+        cur = SCREENS[screen]
+        size_px, line_height = cur["reader_fonts"][font_size]
+        text_width = cur["width"] - 2 * cur["padding"]
+        chars_per_line = max(8, int(text_width / (size_px * CHAR_WIDTH_EM)))
+        lines_per_page = max(4, int(cur["text_height"] / (size_px * line_height)))
+
+    return PageProfile(screen, font_size, chars_per_line, lines_per_page)
+
+
+def page_profiles() -> list[PageProfile]:
+    """All SCREENS x FONT_SIZES profiles, the default profile first."""
+    profiles = [
+        make_profile(screen, size) for screen in SCREENS for size in FONT_SIZES
+    ]
+    profiles.sort(key=lambda p: not p.is_default)
+    return profiles
+
+
+def prepare_text(text: str, chapter_title: str) -> list[str]:
+    """Split chapter text into logical lines, independent of page geometry.
+
+    Every paragraph line is stripped and kept unwrapped; "" marks a blank line.
+    The result can be wrapped for any number of profiles.
+    """
+    # Remove chapter title from the beginning of text (it will be shown separately)
+    text = text.strip()
+    title_len = len(chapter_title)
+    if text[:title_len].lower() == chapter_title.lower():
+        text = text[title_len:].strip()
+
+    lines: list[str] = []
+
+    for para in text.split("\n\n"):
+        para = para.strip()
+        if not para:
+            lines.append("")  # Preserve paragraph breaks
+            continue
+
+        # Handle multi-line content within paragraph (like poems)
+        for line in para.split("\n"):
+            lines.append(line.strip())
+
+        # Add paragraph separator
+        lines.append("")
+
+    return lines
+
+
+def wrap_lines(lines: list[str], width: int) -> list[str]:
+    """Wrap logical lines to a screen width."""
+    all_lines: list[str] = []
+
+    for line in lines:
+        if not line:
+            all_lines.append("")
+            continue
+
+        # Wrap long lines to fit screen width
+        wrapped = wrap(line, width)
+
+        if wrapped:
+            all_lines.extend(wrapped)
+        else:
+            all_lines.append("")
+
+    # Remove trailing empty lines
+    while all_lines and all_lines[-1] == "":
+        all_lines.pop()
+
+    return all_lines
+
+
 class Paginator:
     """Splits book chapters into pages for small screens."""
 
-    def __init__(self, font_size: str = DEFAULT_FONT_SIZE):
+    def __init__(
+        self,
+        font_size: str = DEFAULT_FONT_SIZE,
+        screen: str = DEFAULT_SCREEN,
+        profile: PageProfile | None = None,
+    ):
         """Initialize paginator with font size settings.
 
         Args:
             font_size: One of 'small', 'medium', 'large'
+            screen: One of the SCREENS keys
+            profile: Ready-made page geometry (overrides font_size and screen)
         """
-        self.settings = FONT_SIZES.get(font_size, FONT_SIZES[DEFAULT_FONT_SIZE])
-        self.chars_per_line = self.settings["chars_per_line"]
-        self.lines_per_page = self.settings["lines_per_page"]
+        self.profile = profile or make_profile(screen, font_size)
+        self.settings = FONT_SIZES[self.profile.font_size]
+        self.chars_per_line = self.profile.chars_per_line
+        self.lines_per_page = self.profile.lines_per_page
 
     def paginate_text(
         self, text: str, chapter_index: int, chapter_title: str
@@ -43,104 +164,57 @@ class Paginator:
         Returns:
             List of Page objects
         """
-        # Remove chapter title from the beginning of text (it will be shown separately)
-        text = text.strip()
-        if text.lower().startswith(chapter_title.lower()):
-            text = text[len(chapter_title) :].strip()
-
-        # Split into paragraphs
-        paragraphs = text.split("\n\n")
-
-        # Wrap each paragraph and collect lines
-        all_lines: list[str] = []
-
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                all_lines.append("")  # Preserve paragraph breaks
-                continue
-
-            # Handle multi-line content within paragraph (like poems)
-            para_lines = para.split("\n")
-
-            for line in para_lines:
-                line = line.strip()
-                if not line:
-                    all_lines.append("")
-                    continue
-
-                # Wrap long lines to fit screen width
-                wrapped = textwrap.wrap(
-                    line,
-                    width=self.chars_per_line,
-                    break_long_words=True,
-                    break_on_hyphens=True,
-                )
-
-                if wrapped:
-                    all_lines.extend(wrapped)
-                else:
-                    all_lines.append("")
+        all_lines = wrap_lines(prepare_text(text, chapter_title), self.chars_per_line)
+        return self.paginate_lines(all_lines, chapter_index, chapter_title)
 
-            # Add paragraph separator
-            all_lines.append("")
+    def paginate_lines(
+        self, all_lines: list[str], chapter_index: int, chapter_title: str
+    ) -> list[Page]:
+        """Group already wrapped lines into pages.
 
-        # Remove trailing empty lines
-        while all_lines and all_lines[-1] == "":
-            all_lines.pop()
+        Args:
+            all_lines: Lines wrapped to this paginator's width
+            chapter_index: Index of the chapter
+            chapter_title: Title of the chapter
 
+        Returns:
+            List of Page objects
+        """
         # Group lines into pages
         pages: list[Page] = []
-        current_lines: list[str] = []
         page_number = 1
         is_first_page = True
 
         # First page has fewer lines because of chapter heading
         lines_for_first_page = max(1, self.lines_per_page - 3)
 
-        for line in all_lines:
-            current_lines.append(line)
-
+        total_lines = len(all_lines)
+        pos = 0
+        while pos < total_lines:
             max_lines = lines_for_first_page if is_first_page else self.lines_per_page
-            if len(current_lines) >= max_lines:
-                # Strip leading/trailing empty lines from content
-                while current_lines and current_lines[0] == "":
-                    current_lines.pop(0)
-                while current_lines and current_lines[-1] == "":
-                    current_lines.pop()
-
-                if current_lines:
-                    pages.append(
-                        Page(
-                            number=page_number,
-                            content="\n".join(current_lines),
-                            chapter_index=chapter_index,
-                            chapter_title=chapter_title,
-                            is_chapter_start=is_first_page,
-                        )
-                    )
-                    page_number += 1
-                    is_first_page = False
-
-                current_lines = []
+            end = min(pos + max_lines, total_lines)
 
-        # Don't forget the last page
-        if current_lines:
-            while current_lines and current_lines[0] == "":
-                current_lines.pop(0)
-            while current_lines and current_lines[-1] == "":
-                current_lines.pop()
+            # Strip leading/trailing empty lines from content
+            first, last = pos, end
+            while first < last and all_lines[first] == "":
+                first += 1
+            while last > first and all_lines[last - 1] == "":
+                last -= 1
 
-            if current_lines:
+            if first < last:
                 pages.append(
                     Page(
                         number=page_number,
-                        content="\n".join(current_lines),
+                        content="\n".join(all_lines[first:last]),
                         chapter_index=chapter_index,
                         chapter_title=chapter_title,
                         is_chapter_start=is_first_page,
                     )
                 )
+                page_number += 1
+                is_first_page = False
+
+            pos = end
 
         return pages
 
@@ -191,3 +265,74 @@ class Paginator:
                 ranges[ch_idx] = (first, page.number)
 
         return ranges
+
+
+class ProfilePaginator:
+    """Paginates a book chapter by chapter for several profiles at once.
+
+    Paragraph splitting and cleanup run once per chapter, wrapping once
+    per distinct line width, and only page grouping runs per profile.
+    Pages are numbered across the whole book.
+    """
+
+    def __init__(self, profiles: list[PageProfile]):
+        """Initialize the paginator.
+
+        Args:
+            profiles: Page profiles to paginate for
+        """
+        self.paginators = [Paginator(profile=profile) for profile in profiles]
+        self.page_counts = {profile.name: 0 for profile in profiles}
+
+    def add_chapter(self, chapter) -> dict[str, list[Page]]:
+        """Paginate the next chapter of the book.
+
+        Args:
+            chapter: Chapter object
+
+        Returns:
+            Dict mapping profile name to the chapter's pages
+        """
+        lines = prepare_text(chapter.content, chapter.title)
+        wrapped_by_width: dict[int, list[str]] = {}
+        chapter_pages: dict[str, list[Page]] = {}
+
+        for paginator in self.paginators:
+            width = paginator.chars_per_line
+            if width not in wrapped_by_width:
+                wrapped_by_width[width] = wrap_lines(lines, width)
+
+            name = paginator.profile.name
+            pages = paginator.paginate_lines(
+                wrapped_by_width[width], chapter.index, chapter.title
+            )
+
+            # Renumber pages globally
+            for page in pages:
+                self.page_counts[name] += 1
+                page.number = self.page_counts[name]
+            chapter_pages[name] = pages
+
+        return chapter_pages
+
+
+def paginate_profiles(
+    chapters: list, profiles: list[PageProfile]
+) -> dict[str, list[Page]]:
+    """Paginate all chapters of a book for several profiles at once.
+
+    Args:
+        chapters: List of Chapter objects
+        profiles: Page profiles to paginate for
+
+    Returns:
+        Dict mapping profile name to its list of pages
+    """
+    paginator = ProfilePaginator(profiles)
+    all_pages: dict[str, list[Page]] = {p.name: [] for p in profiles}
+
+    for chapter in chapters:
+        for name, pages in paginator.add_chapter(chapter).items():
+            all_pages[name].extend(pages)
+
+    return all_pages
@@ -0,0 +1,258 @@
+"""Build profiling: wall time, CPU time and memory peak per stage and book.
+
+Code marks its work with stage("name", book) blocks. They cost nothing
+unless a Profiler has been enabled, which build.py --profile does.
+"""
+
+import contextlib
+import cProfile
+import json
+import time
+import tracemalloc
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# Build stages, in pipeline order
+STAGES = (
+    "discover",
+    "plan",
+    "parse",
+    "paginate",
+    "covers",
+    "render",
+    "write",
+    "prune",
+    "static",
+    "index",
+    "compress",
+    "manifest",
+)
+
+# Per-book stages shown in the slowest-books table
+_BOOK_COLUMNS = ("parse", "paginate", "covers", "render", "write")
+
+
+@dataclass
+class StageTotals:
+    """Accumulated cost of one stage."""
+
+    calls: int = 0
+    wall: float = 0.0  # Seconds
+    cpu: float = 0.0  # Seconds of CPU time in this process
+    peak_bytes: int = 0  # Highest traced memory while the stage ran
+
+    def add(self, wall: float, cpu: float, peak_bytes: int) -> None:
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+
+class Profiler:
+    """Collects stage timings for one build.
+
+    Memory is measured with tracemalloc, which slows the build down (often
+    by half) but attributes the peak to the stage that caused it. Stages may
+    nest; a nested stage's time also counts towards its parent's.
+    """
+
+    def __init__(self, cprofile_stage: str | None = None):
+        """Initialize the profiler.
+
+        Args:
+            cprofile_stage: Stage to also run under cProfile (None: none)
+        """
+        self.stages: dict[str, StageTotals] = {}
+        self.books: dict[str, dict[str, StageTotals]] = {}
+        self.cprofile_stage = cprofile_stage
+        self.cprofile = cProfile.Profile() if cprofile_stage else None
+        self._peaks: list[int] = []  # Peak so far of every open stage
+        self._max_peak = 0  # Peak of all finished stages
+        self._start_wall = 0.0
+        self._start_cpu = 0.0
+        self.total = StageTotals()
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    def stop(self) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        self.total.add(
+            time.perf_counter() - self._start_wall,
+            time.process_time() - self._start_cpu,
+            max([peak, self._max_peak, *self._peaks]),
+        )
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, book: str | None = None) -> Iterator[None]:
+        # Hand the peak so far to the enclosing stage, then measure afresh
+        _, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+
+        cprofile = self.cprofile if name == self.cprofile_stage else None
+        if cprofile is not None:
+            cprofile.enable()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            if cprofile is not None:
+                cprofile.disable()
+
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._peaks.pop())
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            self._max_peak = max(self._max_peak, peak)
+            tracemalloc.reset_peak()
+
+            self.stages.setdefault(name, StageTotals()).add(wall, cpu, peak)
+            if book is not None:
+                stages = self.books.setdefault(book, {})
+                stages.setdefault(name, StageTotals()).add(wall, cpu, peak)
+
+    def report(self) -> dict:
+        """Return the collected data as a JSON-serializable dict.
+
+        Books are listed slowest first; a book's wall, CPU and peak are the
+        sum (max for the peak) over its stages.
+        """
+        books = []
+        for book, stages in self.books.items():
+            books.append(
+                {
+                    "book": book,
+                    "wall": sum(s.wall for s in stages.values()),
+                    "cpu": sum(s.cpu for s in stages.values()),
+                    "peak_bytes": max(s.peak_bytes for s in stages.values()),
+                    "stages": {name: asdict(s) for name, s in stages.items()},
+                }
+            )
+        books.sort(key=lambda b: b["wall"], reverse=True)
+
+        return {
+            "total": asdict(self.total),
+            "stages": {
+                name: asdict(self.stages[name])
+                for name in sorted(self.stages, key=_stage_order)
+            },
+            "books": books,
+        }
+
+    def write_report(self, path: Path) -> None:
+        """Write report() as JSON, and the cProfile stats next to it."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2) + "\n", encoding="utf-8")
+        print(f"Profile report written to: {path}")
+
+        if self.cprofile is not None:
+            stats_path = self.cprofile_path(path)
+            self.cprofile.dump_stats(stats_path)
+            print(f"cProfile stats of '{self.cprofile_stage}' written to: {stats_path}")
+            print(f"  (view with: python -m pstats {stats_path})")
+
+    def cprofile_path(self, report_path: Path) -> Path:
+        return report_path.with_name(f"{report_path.stem}-{self.cprofile_stage}.prof")
+
+    def print_summary(self, top: int = 10) -> None:
+        """Print stage totals and the slowest books."""
+        report = self.report()
+        print("Build profile (seconds):")
+        print(f"  {'stage':<10} {'calls':>7} {'wall':>8} {'cpu':>8} {'peak MiB':>9}")
+        for name, s in report["stages"].items():
+            print(
+                f"  {name:<10} {s['calls']:>7} {s['wall']:>8.2f} {s['cpu']:>8.2f} "
+                f"{_mib(s['peak_bytes']):>9}"
+            )
+        total = report["total"]
+        print(
+            f"  {'total':<10} {'':>7} {total['wall']:>8.2f} {total['cpu']:>8.2f} "
+            f"{_mib(total['peak_bytes']):>9}"
+        )
+
+        books = report["books"][:top]
+        if not books:
+            return
+        print()
+        print(f"Slowest books (top {len(books)}, seconds):")
+        columns = "".join(f" {name:>8}" for name in _BOOK_COLUMNS)
+        print(f"  {'wall':>7} {'cpu':>7} {'peak MiB':>8}{columns}  book")
+        for book in books:
+            stages = book["stages"]
+            cells = "".join(
+                f" {stages[name]['wall']:>8.2f}" if name in stages else f" {'-':>8}"
+                for name in _BOOK_COLUMNS
+            )
+            print(
+                f"  {book['wall']:>7.2f} {book['cpu']:>7.2f} "
+                f"{_mib(book['peak_bytes']):>8}{cells}  {book['book']}"
+            )
+
+
+# Profiler of the running build, if any
+_active: Profiler | None = None
+
+
+def enable(cprofile_stage: str | None = None) -> Profiler:
+    """Start profiling the build in this process."""
+    global _active
+    _active = Profiler(cprofile_stage)
+    _active.start()
+    return _active
+
+
+def disable() -> None:
+    """Stop profiling; the profiler keeps its data for reporting."""
+    global _active
+    if _active is not None:
+        _active.stop()
+        _active = None
+
+
+def stage(name: str, book: str | None = None) -> contextlib.AbstractContextManager:
+    """Time a block of work as part of a stage (no-op unless profiling).
+
+    Args:
+        name: Stage name from STAGES
+        book: Book the work is for (its file path), for per-book totals
+    """
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.stage(name, book)
+
+
+def timed(items: Iterable, name: str, book: str | None = None) -> Iterable:
+    """Count the time spent producing each item of a lazy iterable as a stage."""
+    if _active is None:
+        return items
+    return _timed(iter(items), name, book)
+
+
+def _timed(items: Iterator, name: str, book: str | None) -> Iterator:
+    while True:
+        with stage(name, book):
+            item = next(items, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+_DONE = object()
+
+
+def _stage_order(name: str) -> int:
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+def _mib(size: int) -> str:
+    return f"{size / 2**20:.1f}"
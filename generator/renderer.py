@@ -1,133 +1,656 @@
 """HTML renderer using Jinja2 templates."""
 
-import shutil
+import contextlib
+import io
+import itertools
+import json
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-
-from config import FONT_SIZES, NAV_KEYS, OUTPUT_DIR, STATIC_DIR, TEMPLATES_DIR
-from parsers.base import Book, Series
-
-from .paginator import Paginator
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from config import (
+    CACHE_DIR,
+    FONT_SIZES,
+    NAV_KEYS,
+    OUTPUT_DIR,
+    SCREENS,
+    STATIC_DIR,
+    TEMPLATES_DIR,
+    WRITE_THREADS,
+)
+from parsers.base import Book, BookStream, Series
+
+from . import profiling
+from .archive import ArchiveWriter, SiteArchive
+from .compress import (
+    COMPRESSED_SUFFIXES,
+    available_suffixes,
+    compress_site,
+    print_compress_summary,
+)
+from .covers import CoverProcessor
+from .manifest import MANIFEST_NAME, BookRecord
+from .minify import MinifyExtension
+from .page_shell import PageShells
+from .pageweight import PageWeight, print_page_weights
+from .paginator import (
+    Page,
+    PageProfile,
+    Paginator,
+    ProfilePaginator,
+    page_profiles,
+    paginate_profiles,
+)
+from .spool import PageSpool
+from .writer import OutputWriter, WriteStats
+
+# Per-book script listing page counts of every profile, used by app.js
+PROFILES_SCRIPT = "profiles.js"
+
+# Directory, in every profile directory, of the per-chapter page bundles
+# chapters.js turns pages with (see Renderer chapter_bundles)
+CHAPTERS_DIR = "chapters"
+
+# Pages of one profile: the pages in order, their count, and the
+# (first, last) page of every chapter
+ProfilePages = tuple[Iterable[Page], int, dict[int, tuple[int, int]]]
 
 
 class Renderer:
     """Renders books to static HTML files."""
 
-    def __init__(self, output_dir: Path = OUTPUT_DIR):
-        """Initialize renderer with Jinja2 environment."""
+    def __init__(
+        self,
+        output_dir: Path = OUTPUT_DIR,
+        jobs: int = 1,
+        cache_dir: Path | None = CACHE_DIR,
+        fast_pages: bool = True,
+        compress: bool = False,
+        write_threads: int = WRITE_THREADS,
+        output_archive: Path | None = None,
+        minify: bool = False,
+        prefetch: bool = False,
+        chapter_bundles: bool = False,
+    ):
+        """Initialize renderer with Jinja2 environment.
+
+        Args:
+            output_dir: Directory to write the site to
+            jobs: Number of worker processes used to render books
+            cache_dir: Build cache directory for compiled templates (None: off)
+            fast_pages: Render reader pages from a precomputed shell
+                instead of running page.html for every page
+            compress: Write .gz (and .br, if brotli is installed) siblings
+                of every HTML, CSS and JS file
+            write_threads: Threads writing files in the background while
+                rendering continues (0: write between pages)
+            output_archive: Write the site into this .tar or .zip file
+                instead of output_dir, which then only names the site root.
+                Books are rendered in this process, whatever jobs is, so
+                that archive entries come in a reproducible order.
+            minify: Minify the HTML and inline scripts of every template
+            prefetch: Hint browsers to prefetch the next page of every
+                reader page
+            chapter_bundles: Also write every chapter's pages into one
+                script, which chapters.js loads to turn pages within the chapter
+                without a request; page URLs stay the same
+        """
         self.output_dir = output_dir
+        self.jobs = jobs if output_archive is None else 1
+        self.cache_dir = cache_dir
+        self.fast_pages = fast_pages
+        self.compress = compress
+        self.write_threads = write_threads
+        self.minify = minify
+        self.prefetch = prefetch
+        self.chapter_bundles = chapter_bundles
+        # Compressed siblings survive pruning only while compression is on
+        self.sibling_suffixes = COMPRESSED_SUFFIXES if compress else ()
+        self.covers = CoverProcessor(cache_dir)
+        self.archive = None
+        if output_archive is not None:
+            self.archive = SiteArchive(
+                output_archive,
+                output_dir,
+                available_suffixes() if compress else (),
+            )
+
+        bytecode_cache = None
+        if cache_dir is not None:
+            # Bytecode is keyed by template source, not by how it is minified
+            jinja_cache = cache_dir / ("jinja-min" if minify else "jinja")
+            jinja_cache.mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(jinja_cache))
+
         self.env = Environment(
             loader=FileSystemLoader(TEMPLATES_DIR),
             autoescape=True,
+            bytecode_cache=bytecode_cache,
+            extensions=[MinifyExtension] if minify else [],
         )
 
         # Add global template variables
         self.env.globals["nav_keys"] = NAV_KEYS
         self.env.globals["font_sizes"] = FONT_SIZES
+        self.env.globals["site_root"] = ""
+        self.env.globals["prefetch"] = prefetch
+        self.env.globals["chapter_bundles"] = chapter_bundles
 
-    def render_site(self, series_list: list[Series], all_books: list[Book]) -> None:
+        # Default profile first: it is rendered into the book directory itself
+        self.profiles = page_profiles()
+        self.env.globals["default_profile"] = self.profiles[0].name
+
+    def render_site(
+        self,
+        series_list: list[Series],
+        all_books: list[Book],
+        *,
+        clean: bool = True,
+        removed_slugs: list[str] | None = None,
+        render_index: bool = True,
+        book_stats: WriteStats | None = None,
+    ) -> WriteStats:
         """Render the entire site.
 
         Args:
             series_list: List of Series objects (grouped books)
-            all_books: Flat list of all Book objects
+            all_books: Flat list of Book objects to render
+            clean: Remove every file the build did not produce (full rebuild)
+            removed_slugs: Book directories to delete (incremental rebuild)
+            render_index: Whether index.html needs to be rendered
+            book_stats: File counts of books already rendered with
+                render_book_files, to include in the summary
+
+        Files are only written when their content changed, so unchanged
+        pages keep their mtime between builds.
+
+        Returns:
+            File counts of the whole build; files that could not be written
+            are listed in its errors
         """
-        # Clean and create output directory
-        if self.output_dir.exists():
-            shutil.rmtree(self.output_dir)
-        self.output_dir.mkdir(parents=True)
+        if self.archive is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        if not self.covers.available and any(
+            book.has_cover for series in series_list for book in series.books
+        ):
+            print("Warning: Pillow is not installed, copying covers without resizing")
+            print("  (install with: pip install webbooks[images])")
+        stats = WriteStats()
+        with (
+            self.archive or contextlib.nullcontext(),
+            self._open_writer(self.output_dir) as writer,
+        ):
+            # Remove books that are no longer in the library
+            for slug in removed_slugs or []:
+                book_dir = self.output_dir / slug
+                if book_dir.is_dir():
+                    writer.remove_tree(book_dir)
+                    print(f"  - Removed: {slug}")
+
+            # Copy static files
+            with profiling.stage("static"):
+                self._copy_static_files(writer)
+
+            # Render each book
+            stats.add(self._render_books(all_books))
+            if book_stats is not None:
+                stats.add(book_stats)
+
+            # Render index page once every book's slug and cover are in place
+            if render_index:
+                with profiling.stage("index"):
+                    self._render_index(writer, series_list)
+
+            if clean:
+                # Book directories prune themselves; drop anything else left over
+                writer.keep(self.output_dir / MANIFEST_NAME)
+                for series in series_list:
+                    for book in series.books:
+                        writer.keep(self.output_dir / book.slug)
+                with profiling.stage("prune"):
+                    writer.prune()
+        self.covers.prune()
+        _print_write_errors(writer.stats)
+        stats.add(writer.stats)
+
+        if self.archive is not None:
+            print(f"Site archived to: {self.archive.path}")
+        else:
+            print(f"Site generated at: {self.output_dir}")
+        print(f"  Files: {stats}")
+        print_page_weights(stats.pages)
+
+        if self.compress:
+            self.compress_output()
+        return stats
+
+    def compress_output(self) -> None:
+        """Write compressed siblings and print per-book size totals."""
+        suffixes = available_suffixes()
+        if ".br" not in suffixes:
+            print("brotli is not installed, writing .gz files only")
+            print("  (install with: pip install webbooks[compress])")
+        if self.archive is not None:
+            # Siblings went into the archive along with their files
+            results = self.archive.compressed
+        else:
+            with profiling.stage("compress"):
+                results = compress_site(self.output_dir, suffixes, self.jobs)
+        print_compress_summary(results, suffixes)
+
+    def _open_writer(self, root: Path) -> OutputWriter | ArchiveWriter:
+        """Writer for a directory of the site, on disk or in the archive."""
+        if self.archive is not None:
+            return self.archive.writer(root)
+        return OutputWriter(root, self.sibling_suffixes, self.write_threads)
+
+    def _render_books(self, books: list[Book]) -> WriteStats:
+        """Render books, in parallel worker processes when jobs > 1.
+
+        Books are scheduled largest-first by text size so that one huge
+        volume is not left rendering alone after everything else is done.
+        Every book writes only into its own directory, so the output is the
+        same as a serial build; logs are printed in the order of books, so
+        they are too.
+
+        Returns:
+            Combined file counts of all books
+        """
+        stats = WriteStats()
+        if self.jobs <= 1 or len(books) <= 1:
+            for book in books:
+                stats.add(self._render_book(book))
+            return stats
+
+        sizes = [_book_text_size(book) for book in books]
+        by_size = sorted(range(len(books)), key=sizes.__getitem__, reverse=True)
+        workers = min(self.jobs, len(books))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(
+                self.output_dir,
+                self.cache_dir,
+                self.fast_pages,
+                self.compress,
+                self.write_threads,
+                self.minify,
+                self.prefetch,
+                self.chapter_bundles,
+            ),
+        ) as pool:
+            futures = {
+                i: pool.submit(_render_book_in_worker, books[i]) for i in by_size
+            }
+            # Largest first to the workers, but results in the order of books
+            for i in range(len(books)):
+                log, book_stats = futures[i].result()
+                print(log, end="")
+                stats.add(book_stats)
+        return stats
+
+    def render_book_files(
+        self,
+        books: list[tuple[Path, BookRecord]],
+        open_book: Callable[[Path], BookStream | None],
+    ) -> Iterator[tuple[Path, BookRecord | None, str, WriteStats]]:
+        """Parse and render books one at a time, with bounded memory.
 
-        # Copy static files
-        self._copy_static_files()
+        Each book is streamed from its file straight into its output
+        directory, in a worker process when jobs > 1, and only its catalog
+        record comes back. Memory use therefore depends on the largest
+        chapter, not on the size of the book or of the library.
 
-        # Render index page with series
-        self._render_index(series_list)
+        Args:
+            books: (file path, record) pairs; records carry the slug to
+                render to, and get title, author and cover filled in
+            open_book: Opens a book file for streaming, printing why and
+                returning None if it can not be read (must be picklable)
+
+        Yields:
+            (file path, record or None if the book failed, captured log
+            output, file counts) tuples, in the order of books
+        """
+        if self.jobs <= 1 or len(books) <= 1:
+            try:
+                for file_path, record in books:
+                    yield file_path, *_render_book_file(
+                        self, open_book, file_path, record
+                    )
+            except BaseException:
+                # Books are added to the archive before render_site() opens
+                # it as a context; do not leave a partial one behind
+                if self.archive is not None:
+                    self.archive.discard()
+                raise
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=min(self.jobs, len(books)),
+            initializer=_init_render_worker,
+            initargs=(
+                self.output_dir,
+                self.cache_dir,
+                self.fast_pages,
+                self.compress,
+                self.write_threads,
+                self.minify,
+                self.prefetch,
+                self.chapter_bundles,
+            ),
+        ) as pool:
+            results = pool.map(
+                _render_book_file_in_worker,
+                itertools.repeat(open_book),
+                *zip(*books),
+            )
+            for (file_path, _), result in zip(books, results):
+                yield file_path, *result
 
-        # Render each book
-        for book in all_books:
-            self._render_book(book)
+    def render_stream(self, book: BookStream) -> WriteStats:
+        """Render a book while it is being parsed.
 
-        print(f"Site generated at: {self.output_dir}")
+        Chapters are paginated as the parser yields them and their pages are
+        spooled to temporary files, so at most one chapter's text is held in
+        memory. Reader, TOC and goto pages are written once the book has
+        been read to the end and page counts and chapter ranges are known;
+        if parsing fails before that, the book directory is left untouched.
 
-    def _copy_static_files(self) -> None:
+        Returns:
+            File counts for the book directory
+        """
+        paginator = ProfilePaginator(self.profiles)
+        key = str(book.file_path)
+        with contextlib.ExitStack() as stack:
+            spools = {
+                profile.name: stack.enter_context(PageSpool())
+                for profile in self.profiles
+            }
+            for chapter in profiling.timed(book.chapters, "parse", key):
+                with profiling.stage("paginate", key):
+                    for name, pages in paginator.add_chapter(chapter).items():
+                        spools[name].extend(pages)
+
+            return self._write_book(
+                book,
+                {
+                    name: (spool, spool.count, spool.chapter_ranges)
+                    for name, spool in spools.items()
+                },
+            )
+
+    def _copy_static_files(self, writer: OutputWriter) -> None:
         """Copy static files to output directory."""
         if STATIC_DIR.exists():
-            for file in STATIC_DIR.iterdir():
+            for file in sorted(STATIC_DIR.iterdir()):
                 if file.is_file():
-                    shutil.copy(file, self.output_dir / file.name)
+                    writer.copy_file(file, self.output_dir / file.name)
 
-    def _render_index(self, series_list: list[Series]) -> None:
+    def _render_index(self, writer: OutputWriter, series_list: list[Series]) -> None:
         """Render the index page with series and books."""
         template = self.env.get_template("index.html")
         total_books = sum(len(s.books) for s in series_list)
         html = template.render(series_list=series_list, total_books=total_books)
 
-        (self.output_dir / "index.html").write_text(html, encoding="utf-8")
+        writer.write_text(self.output_dir / "index.html", html)
+
+    def _render_book(self, book: Book) -> WriteStats:
+        """Render all pages for a single book, once per page profile.
 
-    def _render_book(self, book: Book) -> None:
-        """Render all pages for a single book."""
+        Returns:
+            File counts for the book directory
+        """
+        # Paginate the book for every profile in one pass
+        with profiling.stage("paginate", str(book.file_path)):
+            profile_pages = paginate_profiles(book.chapters, self.profiles)
+
+        return self._write_book(
+            book,
+            {
+                profile.name: (
+                    pages,
+                    len(pages),
+                    Paginator(profile=profile).get_chapter_page_ranges(pages),
+                )
+                for profile in self.profiles
+                for pages in [profile_pages[profile.name]]
+            },
+        )
+
+    def _write_book(
+        self, book: Book | BookStream, profile_pages: dict[str, ProfilePages]
+    ) -> WriteStats:
+        """Write the cover and the pages of every profile of a paginated book.
+
+        The default profile is written into the book directory, so book URLs
+        stay the same; every other profile gets a subdirectory named after it.
+
+        Returns:
+            File counts for the book directory
+        """
         book_dir = self.output_dir / book.slug
-        book_dir.mkdir(parents=True, exist_ok=True)
+        key = str(book.file_path)
+        with self._open_writer(book_dir) as writer:
+            writer.make_dirs(
+                book_dir if profile.is_default else book_dir / profile.name
+                for profile in self.profiles
+            )
+
+            # Save cover images if available
+            with profiling.stage("covers", key):
+                cover_files = self._write_covers(writer, book, book_dir)
+
+            weight = PageWeight()
+            for profile in self.profiles:
+                pages, total_pages, chapter_ranges = profile_pages[profile.name]
+                self._render_profile(
+                    writer,
+                    book,
+                    book_dir,
+                    profile,
+                    pages,
+                    total_pages,
+                    chapter_ranges,
+                    cover_files.get(profile.screen),
+                    weight,
+                )
+
+            page_counts = {
+                name: count for name, (_, count, _) in profile_pages.items()
+            }
+            self._write_profiles_script(writer, book_dir, page_counts)
+
+            # Wait for files still queued for the writer threads
+            with profiling.stage("write", key):
+                writer.close()
+
+            # Drop pages left over from a previous render of this book
+            with profiling.stage("prune", key):
+                writer.prune()
+
+        has_cover = bool(cover_files)
+        total_pages = page_counts[self.profiles[0].name]
+        print(
+            f"  - {book.title}: {total_pages} pages"
+            + (" + cover" if has_cover else "")
+            + f", {len(self.profiles)} profiles"
+        )
+        _print_write_errors(writer.stats)
+        writer.stats.pages[book.slug] = weight
+        return writer.stats
+
+    def _write_covers(
+        self, writer: OutputWriter, book: Book | BookStream, book_dir: Path
+    ) -> dict[str, str]:
+        """Write the cover downscaled for each screen.
+
+        Falls back to the original image, shared by all screens, when Pillow
+        is not installed or can not read it.
+
+        Returns:
+            Dict mapping screen name to cover file name (empty: no cover)
+        """
+        if not (book.cover_data and book.cover_ext):
+            return {}
 
-        # Save cover image if available
-        has_cover = False
-        if book.cover_data and book.cover_ext:
+        screen_covers = self.covers.screen_covers(book.cover_data)
+        if screen_covers is None:
             cover_filename = f"cover.{book.cover_ext}"
-            (book_dir / cover_filename).write_bytes(book.cover_data)
-            has_cover = True
+            writer.write_bytes(book_dir / cover_filename, book.cover_data)
+            return {screen: cover_filename for screen in SCREENS}
 
-        # Paginate the book
-        paginator = Paginator()
-        pages = paginator.paginate_book(book.chapters)
-        chapter_ranges = paginator.get_chapter_page_ranges(pages)
+        cover_files = {}
+        for screen, data in screen_covers.items():
+            cover_files[screen] = f"cover-{screen}.jpg"
+            writer.write_bytes(book_dir / cover_files[screen], data)
+        return cover_files
 
-        total_pages = len(pages)
+    def _render_profile(
+        self,
+        writer: OutputWriter,
+        book: Book | BookStream,
+        book_dir: Path,
+        profile: PageProfile,
+        pages: Iterable[Page],
+        total_pages: int,
+        chapter_ranges: dict[int, tuple[int, int]],
+        cover_filename: str | None,
+        weight: PageWeight,
+    ) -> None:
+        """Render cover, TOC, goto and text pages of one profile.
 
-        # Render cover page (page 0) if cover exists
-        if has_cover:
-            self._render_cover_page(book, book_dir, cover_filename, total_pages)
+        The size of every reader page is added to weight.
+        """
+        prefix = "" if profile.is_default else f"{profile.name}/"
+        if profile.is_default:
+            profile_dir = book_dir
+            layout = {"profile": profile, "site_root": "../", "book_root": ""}
+        else:
+            profile_dir = book_dir / profile.name
+            layout = {"profile": profile, "site_root": "../../", "book_root": "../"}
+
+        has_cover = cover_filename is not None
+        key = str(book.file_path)
+
+        with profiling.stage("render", key):
+            # Render cover page (page 0) if cover exists
+            if has_cover:
+                self._render_cover_page(
+                    writer,
+                    book,
+                    profile_dir,
+                    layout["book_root"] + cover_filename,
+                    total_pages,
+                    layout,
+                )
+
+            # Render TOC
+            self._render_toc(
+                writer, book, profile_dir, chapter_ranges, has_cover, layout
+            )
 
-        # Render TOC
-        self._render_toc(book, book_dir, chapter_ranges, has_cover)
+            # Render goto page
+            self._render_goto(writer, book, profile_dir, total_pages, has_cover, layout)
 
-        # Render goto page
-        self._render_goto(book, book_dir, total_pages, has_cover)
+        if self.chapter_bundles:
+            pages = self._bundle_chapters(writer, profile_dir, pages, key)
 
         # Render each page
-        page_template = self.env.get_template("page.html")
+        for number, html in self.render_pages(
+            book, pages, total_pages, has_cover, chapter_ranges, layout
+        ):
+            data = html.encode("utf-8")
+            weight.add_page(f"{prefix}{number}.html", len(data))
+            with profiling.stage("write", key):
+                writer.write_bytes(profile_dir / f"{number}.html", data)
+
+    def render_pages(
+        self,
+        book: Book | BookStream,
+        pages: Iterable[Page],
+        total_pages: int,
+        has_cover: bool,
+        chapter_ranges: dict[int, tuple[int, int]],
+        layout: dict,
+    ) -> Iterator[tuple[int, str]]:
+        """Render the reader pages of one profile.
+
+        Yields:
+            (page number, HTML) tuples, in page order
+        """
+        shells = PageShells(
+            self.env.get_template("page.html"),
+            {
+                "book": book,
+                "total_pages": total_pages,
+                "chapter_ranges": chapter_ranges,
+                **layout,
+            },
+        )
+        render = shells.render if self.fast_pages else shells.render_template
+        key = str(book.file_path)
 
-        for i, page in enumerate(pages):
+        for page in pages:
             # Previous page: 0 (cover) for page 1 if cover exists, else normal
             if page.number == 1:
                 prev_page = 0 if has_cover else None
             else:
                 prev_page = page.number - 1
 
-            next_page = page.number + 1 if i < total_pages - 1 else None
+            next_page = page.number + 1 if page.number < total_pages else None
 
-            html = page_template.render(
-                book=book,
-                page=page,
-                total_pages=total_pages,
-                prev_page=prev_page,
-                next_page=next_page,
-                chapter_ranges=chapter_ranges,
-            )
-
-            page_file = book_dir / f"{page.number}.html"
-            page_file.write_text(html, encoding="utf-8")
+            with profiling.stage("render", key):
+                html = render(page, prev_page, next_page)
+            yield page.number, html
 
-        print(
-            f"  - {book.title}: {total_pages} pages" + (" + cover" if has_cover else "")
+    def _bundle_chapters(
+        self,
+        writer: OutputWriter,
+        profile_dir: Path,
+        pages: Iterable[Page],
+        key: str,
+    ) -> Iterator[Page]:
+        """Pass pages through, writing each chapter's bundle once it is complete.
+
+        Only one chapter's pages are held at a time.
+        """
+        for index, chapter in itertools.groupby(pages, lambda p: p.chapter_index):
+            chapter = list(chapter)
+            yield from chapter
+            data = {
+                "chapter": index,
+                "first": chapter[0].number,
+                "pages": [page.content for page in chapter],
+            }
+            payload = json.dumps(data, ensure_ascii=False)
+            # Line separators end JavaScript strings in old browsers
+            payload = payload.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+            with profiling.stage("write", key):
+                writer.write_text(
+                    profile_dir / CHAPTERS_DIR / f"{index}.js",
+                    f"webbooksChapter({payload});\n",
+                )
+
+    def _write_profiles_script(
+        self, writer: OutputWriter, book_dir: Path, page_counts: dict[str, int]
+    ) -> None:
+        """Write page counts per profile, so app.js can map positions between them."""
+        data = {"default": self.profiles[0].name, "pages": page_counts}
+        writer.write_text(
+            book_dir / PROFILES_SCRIPT,
+            f"window.webbooksProfiles = {json.dumps(data)};\n",
         )
 
     def _render_cover_page(
         self,
-        book: Book,
+        writer: OutputWriter,
+        book: Book | BookStream,
         book_dir: Path,
         cover_filename: str,
         total_pages: int,
+        layout: dict,
     ) -> None:
         """Render cover page (page 0)."""
         template = self.env.get_template("cover.html")
@@ -135,15 +658,18 @@ class Renderer:
             book=book,
             cover_filename=cover_filename,
             total_pages=total_pages,
+            **layout,
         )
-        (book_dir / "0.html").write_text(html, encoding="utf-8")
+        writer.write_text(book_dir / "0.html", html)
 
     def _render_toc(
         self,
-        book: Book,
+        writer: OutputWriter,
+        book: Book | BookStream,
         book_dir: Path,
         chapter_ranges: dict[int, tuple[int, int]],
-        has_cover: bool = False,
+        has_cover: bool,
+        layout: dict,
     ) -> None:
         """Render table of contents page."""
         template = self.env.get_template("toc.html")
@@ -164,16 +690,19 @@ class Renderer:
             book=book,
             toc=toc_with_pages,
             has_cover=has_cover,
+            **layout,
         )
 
-        (book_dir / "toc.html").write_text(html, encoding="utf-8")
+        writer.write_text(book_dir / "toc.html", html)
 
     def _render_goto(
         self,
-        book: Book,
+        writer: OutputWriter,
+        book: Book | BookStream,
         book_dir: Path,
         total_pages: int,
-        has_cover: bool = False,
+        has_cover: bool,
+        layout: dict,
     ) -> None:
         """Render go to page input."""
         template = self.env.get_template("goto.html")
@@ -181,5 +710,88 @@ class Renderer:
             book=book,
             total_pages=total_pages,
             has_cover=has_cover,
+            **layout,
         )
-        (book_dir / "goto.html").write_text(html, encoding="utf-8")
+        writer.write_text(book_dir / "goto.html", html)
+
+
+def _print_write_errors(stats: WriteStats) -> None:
+    for error in stats.errors:
+        print(f"    Error updating {error}")
+
+
+def _book_text_size(book: Book) -> int:
+    """Total number of characters in a book's chapters."""
+    return sum(len(chapter.content) for chapter in book.chapters)
+
+
+# Per-process renderer used by render workers
+_worker_renderer: Renderer | None = None
+
+
+def _init_render_worker(
+    output_dir: Path,
+    cache_dir: Path | None,
+    fast_pages: bool,
+    compress: bool,
+    write_threads: int,
+    minify: bool,
+    prefetch: bool,
+    chapter_bundles: bool,
+) -> None:
+    """Create the renderer (and its compiled templates) once per worker."""
+    global _worker_renderer
+    _worker_renderer = Renderer(
+        output_dir=output_dir,
+        cache_dir=cache_dir,
+        fast_pages=fast_pages,
+        compress=compress,
+        write_threads=write_threads,
+        minify=minify,
+        prefetch=prefetch,
+        chapter_bundles=chapter_bundles,
+    )
+
+
+def _render_book_in_worker(book: Book) -> tuple[str, WriteStats]:
+    """Render a single book in a worker, returning its captured log output."""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        stats = _worker_renderer._render_book(book)
+    return log.getvalue(), stats
+
+
+def _render_book_file(
+    renderer: Renderer,
+    open_book: Callable[[Path], BookStream | None],
+    file_path: Path,
+    record: BookRecord,
+) -> tuple[BookRecord | None, str, WriteStats]:
+    """Stream one book file into the output, returning its captured log."""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        book = open_book(file_path)
+        if book is None:
+            return None, log.getvalue(), WriteStats()
+
+        book.slug = record.slug
+        try:
+            stats = renderer.render_stream(book)
+        except Exception as e:
+            book.close()
+            print(f"  Error building {file_path.name}: {e}")
+            return None, log.getvalue(), WriteStats()
+
+    record.title = book.title
+    record.author = book.author
+    record.has_cover = book.has_cover
+    return record, log.getvalue(), stats
+
+
+def _render_book_file_in_worker(
+    open_book: Callable[[Path], BookStream | None],
+    file_path: Path,
+    record: BookRecord,
+) -> tuple[BookRecord | None, str, WriteStats]:
+    """Stream one book file into the output from a render worker."""
+    return _render_book_file(_worker_renderer, open_book, file_path, record)
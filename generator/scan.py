@@ -0,0 +1,100 @@
+"""Content hashes of book files, remembered by file metadata."""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from parsers.base import file_digest
+from parsers.cache import write_entry
+
+# Cache file layout; bump when it changes
+_FORMAT_VERSION = 1
+
+# Files modified this recently may change again within the same mtime
+# tick, so their hashes are not remembered
+_RACY_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """The metadata that identifies one version of a file."""
+
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @classmethod
+    def from_stat(cls, stat: os.stat_result) -> "FileStat":
+        return cls(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+class ScanCache:
+    """SHA-256 of book files, reused while their size, mtime and inode hold.
+
+    Hashing means reading every book on every build, which is slow on
+    network-mounted libraries. A file whose metadata matches the previous
+    scan is assumed unchanged and its hash is taken from the cache, so an
+    unchanged library is recognized without opening any book.
+    """
+
+    def __init__(self, cache_dir: Path):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Build cache directory (the cache is its scan.json)
+        """
+        self.path = cache_dir / "scan.json"
+        self.entries: dict[str, tuple[FileStat, str]] = {}
+        self.used: dict[str, tuple[FileStat, str]] = {}
+        self.hashed = 0  # Files read by digest() since loading
+
+    def load(self) -> None:
+        """Load the previous scan, treating a missing or bad file as empty."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != _FORMAT_VERSION:
+                return
+            self.entries = {
+                path: (FileStat(*stat), digest)
+                for path, (stat, digest) in data["files"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            self.entries = {}
+
+    def digest(self, file_path: Path, stat: FileStat) -> str:
+        """Return the SHA-256 of a file, hashing it only if it changed.
+
+        Args:
+            file_path: Book file
+            stat: Its current metadata, from the directory scan
+        """
+        key = os.path.abspath(file_path)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stat:
+            self.used[key] = entry
+            return entry[1]
+
+        digest = file_digest(file_path)
+        self.hashed += 1
+        if time.time() - stat.mtime_ns / 1e9 > _RACY_SECONDS:
+            self.used[key] = (stat, digest)
+        return digest
+
+    def save(self) -> None:
+        """Write the files looked up since loading; others are forgotten."""
+        if self.used == self.entries:
+            return
+        data = {
+            "version": _FORMAT_VERSION,
+            "files": {
+                path: [[stat.size, stat.mtime_ns, stat.inode], digest]
+                for path, (stat, digest) in sorted(self.used.items())
+            },
+        }
+        try:
+            write_entry(self.path, json.dumps(data, ensure_ascii=False).encode())
+        except OSError as e:
+            print(f"  Warning: Could not write scan cache: {e}")
+        self.entries = dict(self.used)
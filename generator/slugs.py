@@ -0,0 +1,132 @@
+"""Stable book slugs across rebuilds."""
+
+import hashlib
+from collections.abc import Iterable
+from posixpath import basename
+
+from parsers.base import make_slug
+
+from .manifest import BookRecord
+
+# Identity hash lengths tried, shortest first, when a new slug collides
+_HASH_LENGTHS = (6, 8, 12, 16)
+
+
+def legacy_slug(title: str, path: str) -> str:
+    """Slug of a book in sites built before slugs were recorded.
+
+    Those builds hashed the book's path, as the build spelled it, instead
+    of its content.
+    """
+    return make_slug(title, hashlib.md5(path.encode()).hexdigest())
+
+
+class SlugRegistry:
+    """Assigns each book a URL slug and keeps it stable across rebuilds.
+
+    A book keeps the slug recorded for it in the previous build, matched
+    first by source path (the file was edited in place) and then by content
+    identity (the file or its series folder was renamed). New books get
+    their title slug plus the shortest identity hash prefix that is not
+    used by any other book, current or previous, so an old URL never starts
+    pointing to a different book.
+
+    Sites built before slugs were recorded have no records: a book without
+    a record whose legacy path-based slug (see legacy_slug) is still a
+    directory in the output keeps that slug.
+    """
+
+    def __init__(
+        self, records: Iterable[BookRecord], existing_dirs: Iterable[str] = ()
+    ):
+        """Initialize from the previous build's records.
+
+        Args:
+            records: Book records from the build manifest
+            existing_dirs: Names of the directories in the output directory
+        """
+        records = list(records)
+        self.previous_by_source = {r.source: r.slug for r in records}
+        self.previous_by_identity: dict[str, BookRecord] = {}
+        for record in records:
+            if record.identity:
+                self.previous_by_identity.setdefault(record.identity, record)
+        self.recorded_slugs = {r.slug for r in records}
+        self.existing_dirs = set(existing_dirs)
+        # New slugs must not reuse a directory of unknown origin either
+        self.previous_slugs = self.recorded_slugs | self.existing_dirs
+        self.assigned: dict[str, str] = {}  # Source -> slug
+        self.owners: dict[str, str] = {}  # Slug -> source
+
+    def reserve(self, books: Iterable[tuple[str, str]]) -> None:
+        """Claim previous slugs for all books of this build up front.
+
+        Claiming them before any new slug is made means that a duplicate or
+        new book can never take a slug an existing book is still using.
+
+        Args:
+            books: (source, identity) pairs of every book in the library
+        """
+        books = list(books)
+        for source, _ in books:
+            slug = self.previous_by_source.get(source)
+            if slug is not None and slug not in self.owners:
+                self._claim(source, slug)
+
+        # Moved books; if there are several copies, the one that kept its
+        # file name wins (a renamed series folder)
+        moved = []
+        for source, identity in books:
+            record = self.previous_by_identity.get(identity)
+            if source not in self.assigned and record is not None:
+                renamed = basename(source) != basename(record.source)
+                moved.append((renamed, source, record.slug))
+        for _, source, slug in sorted(moved, key=lambda m: m[0]):
+            if slug not in self.owners:
+                self._claim(source, slug)
+
+    def slug_for(self, source: str, identity: str, title: str, path: str = "") -> str:
+        """Return the slug of a book, creating a new one if needed.
+
+        Args:
+            source: Book path relative to the books directory
+            identity: SHA-256 of the book file
+            title: Book title
+            path: Book file path as the build found it, for its legacy slug
+
+        Returns:
+            Slug unique within the library and its build history
+        """
+        slug = self.assigned.get(source)
+        if slug is not None:
+            return slug
+
+        if path:
+            slug = legacy_slug(title, path)
+            if (
+                slug not in self.owners
+                and slug not in self.recorded_slugs
+                and slug in self.existing_dirs
+            ):
+                return self._claim(source, slug)
+
+        for hash_len in _HASH_LENGTHS:
+            slug = make_slug(title, identity, hash_len)
+            if self._is_free(slug):
+                return self._claim(source, slug)
+
+        # Same content under several paths: tell the copies apart by path
+        unique = hashlib.sha256(f"{identity}:{source}".encode()).hexdigest()
+        for hash_len in _HASH_LENGTHS:
+            slug = make_slug(title, unique, hash_len)
+            if self._is_free(slug):
+                return self._claim(source, slug)
+        return self._claim(source, make_slug(title, unique, len(unique)))
+
+    def _is_free(self, slug: str) -> bool:
+        return slug not in self.owners and slug not in self.previous_slugs
+
+    def _claim(self, source: str, slug: str) -> str:
+        self.assigned[source] = slug
+        self.owners[slug] = source
+        return slug
@@ -0,0 +1,56 @@
+"""Temporary on-disk page storage for streaming renders."""
+
+import marshal
+import tempfile
+from collections.abc import Iterable, Iterator
+
+from .paginator import Page
+
+
+class PageSpool:
+    """Pages of one profile, spooled to a temporary file as they are made.
+
+    Reader pages show the book's total page count and the cover (known only
+    once an FB2 file has been read to the end) decides where page 1 links
+    back to, so pages can only be rendered after the whole book has been
+    paginated. Spooling them keeps no more than one chapter's pages in
+    memory meanwhile.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.count = 0
+        self.chapter_ranges: dict[int, tuple[int, int]] = {}
+
+    def __enter__(self) -> "PageSpool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def extend(self, pages: Iterable[Page]) -> None:
+        """Append pages, which must come in page order."""
+        for page in pages:
+            marshal.dump(
+                (
+                    page.number,
+                    page.content,
+                    page.chapter_index,
+                    page.chapter_title,
+                    page.is_chapter_start,
+                ),
+                self.file,
+            )
+            self.count += 1
+
+            first, _ = self.chapter_ranges.get(page.chapter_index, (page.number, 0))
+            self.chapter_ranges[page.chapter_index] = (first, page.number)
+
+    def __iter__(self) -> Iterator[Page]:
+        """Read the spooled pages back, in page order."""
+        self.file.seek(0)
+        for _ in range(self.count):
+            yield Page(*marshal.load(self.file))
+
+    def close(self) -> None:
+        self.file.close()
@@ -0,0 +1,262 @@
+"""Output writer that only touches files whose content changed."""
+
+import os
+import queue
+import shutil
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .pageweight import PageWeight
+
+# Files handed to a writer thread at once, and batches queued per thread
+# before write_bytes() blocks
+_BATCH_FILES = 32
+_QUEUE_PER_THREAD = 4
+
+
+@dataclass
+class WriteStats:
+    """Counts of what a build did to the output directory."""
+
+    written: int = 0
+    skipped: int = 0  # Already on disk with the same content
+    deleted: int = 0
+    errors: list[str] = field(default_factory=list)  # "path: reason" per file
+    # Reader page sizes of the books rendered, by slug
+    pages: dict[str, PageWeight] = field(default_factory=dict)
+
+    def add(self, other: "WriteStats") -> None:
+        self.written += other.written
+        self.skipped += other.skipped
+        self.deleted += other.deleted
+        self.errors.extend(other.errors)
+        self.pages.update(other.pages)
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.written} written, {self.skipped} unchanged, "
+            f"{self.deleted} deleted"
+        )
+        if self.errors:
+            text += f", {len(self.errors)} failed"
+        return text
+
+
+def _path_key(path: Path | str) -> str:
+    """Spell a path the same way however the caller wrote it."""
+    return os.path.abspath(path)
+
+
+class OutputWriter:
+    """Writes files under a root directory, skipping identical content.
+
+    Files whose bytes are already on disk keep their mtime, so deploys that
+    commit or upload the output only see what really changed. Every path
+    written (or explicitly kept) is remembered, and prune() removes
+    everything else under the root.
+
+    With threads > 0, files are handed in batches to a bounded queue and
+    compared and written by background threads, so the caller can go on
+    rendering while earlier files are flushed. A file that can not be
+    written, for whatever reason, is recorded in stats.errors instead of
+    stopping the others.
+    Call close(), or use the writer as a context manager, before reading
+    stats.
+    """
+
+    def __init__(
+        self, root: Path, sibling_suffixes: tuple[str, ...] = (), threads: int = 0
+    ):
+        """Initialize the writer.
+
+        Args:
+            root: Directory this writer owns
+            sibling_suffixes: Suffixes of derived files (e.g. ".gz") that
+                prune() keeps next to written files
+            threads: Background writer threads (0: write on the calling
+                thread)
+        """
+        self.root = root
+        self.sibling_suffixes = sibling_suffixes
+        self.threads = threads
+        self.stats = WriteStats()
+        # Plain strings, spelled by _path_key(): a large book has hundreds of
+        # thousands of pages
+        self.kept: set[str] = set()
+        self._dirs: set[Path] = set()
+        self._queue: queue.Queue | None = None
+        self._batch: list[tuple[Path, bytes]] = []
+        self._workers: list[threading.Thread] = []
+        self._lock = threading.Lock()  # Guards stats while threads run
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        """Write data to path unless the file already has this content.
+
+        Nothing is returned: with writer threads the file may not be written
+        yet. Outcomes are counted in stats, complete after close().
+        """
+        self.kept.add(_path_key(path))
+        if path.parent not in self._dirs:
+            self.make_dirs([path.parent])
+        if self.threads <= 0:
+            self._write(path, data)
+            return
+
+        self._batch.append((path, data))
+        if len(self._batch) >= _BATCH_FILES:
+            self._flush_batch()
+
+    def write_text(self, path: Path, text: str) -> None:
+        """Write UTF-8 text to path unless the file already has this content."""
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def copy_file(self, source: Path, path: Path) -> None:
+        """Copy a file to path unless the file already has this content."""
+        self.write_bytes(path, source.read_bytes())
+
+    def make_dirs(self, directories: Iterable[Path]) -> None:
+        """Create directories ahead of the files written into them.
+
+        Creating every directory a book needs in one batch, on the calling
+        thread, keeps mkdir calls out of the writer threads. A directory
+        that can not be created is reported by the writes into it.
+        """
+        for directory in sorted(set(directories) - self._dirs):
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                continue
+            self._dirs.add(directory)
+
+    def keep(self, path: Path) -> None:
+        """Protect an existing file or directory from prune()."""
+        self.kept.add(_path_key(path))
+
+    def close(self) -> None:
+        """Wait until every queued file is written and stop the threads."""
+        if self._batch:
+            self._flush_batch()
+        if self._queue is None:
+            return
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._queue = None
+        self._workers = []
+
+    def remove_tree(self, path: Path) -> None:
+        """Delete a directory, counting the files in it."""
+        deleted = sum(len(files) for _, _, files in os.walk(path))
+        try:
+            shutil.rmtree(path)
+        except OSError as e:
+            self._error(e.filename or path, e)
+            return
+        with self._lock:
+            self.stats.deleted += deleted
+
+    def prune(self) -> None:
+        """Delete files under the root that were neither written nor kept.
+
+        Kept directories are left alone entirely, and so are sibling files
+        of kept files. Directories that end up empty are removed. Queued
+        files are written first. Files that can not be deleted are recorded
+        in stats.errors.
+        """
+        self.close()
+        if not self.root.is_dir():
+            return
+
+        visited: list[str] = []
+        # Walked paths are spelled like the kept ones: joined to a normalized
+        # absolute root
+        for dirpath, dirnames, filenames in os.walk(_path_key(self.root)):
+            visited.append(dirpath)
+            dirnames[:] = [
+                d for d in dirnames if os.path.join(dirpath, d) not in self.kept
+            ]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if path not in self.kept and not self._is_kept_sibling(path):
+                    try:
+                        os.unlink(path)
+                    except OSError as e:
+                        self._error(path, e)
+                        continue
+                    self.stats.deleted += 1
+
+        # Deepest first, so parents see their subdirectories already gone
+        for directory in reversed(visited[1:]):
+            try:
+                if directory not in self.kept and not os.listdir(directory):
+                    os.rmdir(directory)
+            except OSError as e:
+                self._error(directory, e)
+
+    def _start(self) -> None:
+        self._queue = queue.Queue(maxsize=self.threads * _QUEUE_PER_THREAD)
+        self._workers = [
+            threading.Thread(target=self._drain, args=(self._queue,), daemon=True)
+            for _ in range(self.threads)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _flush_batch(self) -> None:
+        if self._queue is None:
+            self._start()
+        self._queue.put(self._batch)
+        self._batch = []
+
+    def _drain(self, batches: queue.Queue) -> None:
+        while (batch := batches.get()) is not None:
+            for path, data in batch:
+                # A dead thread would leave write_bytes() and close() waiting
+                # on the queue forever
+                try:
+                    self._write(path, data)
+                except Exception as e:
+                    self._error(path, e)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        if self._same_content(path, data):
+            with self._lock:
+                self.stats.skipped += 1
+            return
+
+        try:
+            path.write_bytes(data)
+        except OSError as e:
+            self._error(path, e)
+            return
+        with self._lock:
+            self.stats.written += 1
+
+    def _error(self, path: Path | str, error: Exception) -> None:
+        reason = getattr(error, "strerror", None) or error
+        with self._lock:
+            self.stats.errors.append(f"{path}: {reason}")
+
+    def _is_kept_sibling(self, path: str) -> bool:
+        return any(
+            path.endswith(suffix) and path[: -len(suffix)] in self.kept
+            for suffix in self.sibling_suffixes
+        )
+
+    def _same_content(self, path: Path, data: bytes) -> bool:
+        # A size mismatch settles most changes without reading the file
+        try:
+            if path.stat().st_size != len(data):
+                return False
+            return path.read_bytes() == data
+        except OSError:
+            return False
@@ -1,12 +1,26 @@
 """Base classes and data structures for book parsing."""
 
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 from typing import Protocol
 import hashlib
 import re
 
 
+# Cyrillic to Latin transliteration for slugs (applied to lowercased titles)
+TRANSLIT_TABLE = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
 @dataclass
 class TocEntry:
     """Table of contents entry."""
@@ -37,32 +51,18 @@ class Book:
     @property
     def format(self) -> str:
         """Return the book format based on file extension."""
+        if self.file_path.name.lower().endswith(".fb2.zip"):
+            return "fb2"
         return self.file_path.suffix.lower().lstrip(".")
 
-    @property
+    @cached_property
     def slug(self) -> str:
-        """Generate a URL-safe slug from the title."""
-        # Transliterate Cyrillic to Latin
-        translit_map = {
-            'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-            'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-            'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-            'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-            'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-        }
-
-        slug = self.title.lower()
-        for cyr, lat in translit_map.items():
-            slug = slug.replace(cyr, lat)
-            slug = slug.replace(cyr.upper(), lat.capitalize())
-
-        # Replace non-alphanumeric with hyphens
-        slug = re.sub(r'[^a-z0-9]+', '-', slug)
-        slug = slug.strip('-')
-
-        # Add short hash to ensure uniqueness
-        hash_suffix = hashlib.md5(str(self.file_path).encode()).hexdigest()[:6]
-        return f"{slug[:30]}-{hash_suffix}" if slug else hash_suffix
+        """URL-safe slug: transliterated title plus a content hash.
+
+        Computed once per book. The build assigns slugs through
+        generator.slugs.SlugRegistry instead, which overrides this value.
+        """
+        return make_slug(self.title, file_digest(self.file_path))
 
     @property
     def total_chapters(self) -> int:
@@ -73,6 +73,63 @@ class Book:
         return self.cover_data is not None and len(self.cover_data) > 0
 
 
+@dataclass
+class BookStream:
+    """A book whose chapters are parsed lazily, one at a time.
+
+    Title and author are known up front. The TOC and the cover are filled in
+    once `chapters` has been exhausted.
+    """
+    title: str
+    author: str
+    file_path: Path
+    chapters: Iterator[Chapter]
+    toc: list[TocEntry] = field(default_factory=list)
+    cover_data: bytes | None = None
+    cover_ext: str = ""
+    slug: str = ""
+    # Releases the source file, even if chapters was never started
+    closer: Callable[[], None] | None = field(default=None, repr=False)
+
+    @classmethod
+    def from_book(cls, book: Book) -> 'BookStream':
+        """Wrap an already parsed book."""
+        return cls(
+            title=book.title,
+            author=book.author,
+            file_path=book.file_path,
+            chapters=iter(book.chapters),
+            toc=book.toc,
+            cover_data=book.cover_data,
+            cover_ext=book.cover_ext,
+        )
+
+    def to_book(self) -> Book:
+        """Read all remaining chapters into a Book."""
+        chapters = list(self.chapters)
+        return Book(
+            title=self.title,
+            author=self.author,
+            file_path=self.file_path,
+            chapters=chapters,
+            toc=self.toc,
+            cover_data=self.cover_data,
+            cover_ext=self.cover_ext,
+        )
+
+    def close(self) -> None:
+        """Stop parsing and release the source file."""
+        close = getattr(self.chapters, 'close', None)
+        if close is not None:
+            close()
+        if self.closer is not None:
+            self.closer()
+
+    @property
+    def has_cover(self) -> bool:
+        return self.cover_data is not None and len(self.cover_data) > 0
+
+
 @dataclass
 class Series:
     """A series of books."""
@@ -87,6 +144,29 @@ class BookParser(Protocol):
         """Parse a book file and return a Book object."""
         ...
 
+    def stream(self, file_path: Path) -> BookStream:
+        """Open a book file and return a stream of its chapters."""
+        ...
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def slugify(title: str) -> str:
+    """Transliterate a title into a lowercase, hyphenated ASCII slug."""
+    slug = title.lower().translate(TRANSLIT_TABLE)
+    return _NON_ALNUM_RE.sub('-', slug).strip('-')
+
+
+def make_slug(title: str, identity: str, hash_len: int = 6) -> str:
+    """Build a book slug from its title and identity hash."""
+    slug = slugify(title)
+    suffix = identity[:hash_len]
+    return f"{slug[:30]}-{suffix}" if slug else suffix
+
 
 def clean_text(text: str) -> str:
     """Clean and normalize text content."""
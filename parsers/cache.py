@@ -0,0 +1,178 @@
+"""On-disk cache of parsed books, keyed by source file content."""
+
+from pathlib import Path
+import marshal
+import os
+import tempfile
+import zlib
+
+from .base import Book, Chapter, TocEntry, file_digest
+
+
+# Bump when parser output changes, so cached books are parsed again
+PARSER_VERSION = 1
+
+# Cache entry layout; bump when _encode changes
+_FORMAT_VERSION = 1
+
+
+class BookCache:
+    """Parsed books stored as compressed marshal blobs, one file per source.
+
+    Entries are keyed by the SHA-256 of the book file plus PARSER_VERSION, so
+    renamed or moved files still hit and any parser change misses. Reading
+    an entry refreshes its mtime; prune() evicts the least recently used
+    entries once the cache grows over max_bytes.
+    """
+
+    def __init__(
+        self, cache_dir: Path, max_bytes: int, digests: dict[Path, str] | None = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Build cache directory (entries go to its books/ folder)
+            max_bytes: Total size of entries to keep after prune()
+            digests: Known SHA-256 of book files, so key() need not read them
+        """
+        self.directory = cache_dir / 'books'
+        self.max_bytes = max_bytes
+        self.digests = digests or {}
+
+    def key(self, file_path: Path) -> str:
+        """Cache key for the current content of a book file."""
+        digest = self.digests.get(file_path) or file_digest(file_path)
+        return f"{digest}-p{PARSER_VERSION}-f{_FORMAT_VERSION}-m{marshal.version}"
+
+    def get(self, key: str, file_path: Path) -> Book | None:
+        """Return the cached book for a key, or None on a miss.
+
+        Args:
+            key: Cache key from key()
+            file_path: Path to set on the returned book
+        """
+        entry = self.directory / f"{key}.bin"
+        try:
+            data = entry.read_bytes()
+            book = _decode(zlib.decompress(data), file_path)
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            return None
+
+        try:
+            os.utime(entry)  # Mark as recently used
+        except OSError:
+            pass
+        return book
+
+    def put(self, key: str, book: Book) -> None:
+        """Store a parsed book under a key from key().
+
+        A failed write only costs a re-parse next time, so it is reported
+        and otherwise ignored.
+        """
+        data = zlib.compress(_encode(book), 6)
+        try:
+            write_entry(self.directory / f"{key}.bin", data)
+        except OSError as e:
+            print(f"  Warning: Could not write parse cache: {e}")
+
+    def prune(self) -> int:
+        """Evict least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        return prune_entries(self.directory, self.max_bytes, 'parse cache')
+
+
+def write_entry(path: Path, data: bytes) -> None:
+    """Write a cache entry atomically, leaving no temp file behind on failure.
+
+    Entries go through a temp file in the same directory, because several
+    workers may share the cache.
+
+    Raises:
+        OSError: If the entry could not be written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def prune_entries(directory: Path, max_bytes: int, name: str) -> int:
+    """Evict least recently used files of a cache directory over max_bytes.
+
+    A cache is optional, so files that can not be read or removed are
+    reported and skipped instead of failing the build.
+
+    Args:
+        directory: Cache directory
+        max_bytes: Total size of files to keep
+        name: Cache name for warnings
+
+    Returns:
+        Number of files removed
+    """
+    stats = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        stats[entry.path] = entry.stat()
+                except OSError as e:
+                    print(f"  Warning: Could not read {name} entry: {e}")
+    except FileNotFoundError:
+        return 0
+    except OSError as e:
+        print(f"  Warning: Could not prune {name}: {e}")
+        return 0
+
+    total = sum(s.st_size for s in stats.values())
+    removed = 0
+    for path in sorted(stats, key=lambda p: stats[p].st_mtime_ns):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"  Warning: Could not prune {name}: {e}")
+            continue
+        total -= stats[path].st_size
+        removed += 1
+    return removed
+
+
+def _encode(book: Book) -> bytes:
+    return marshal.dumps((
+        book.title,
+        book.author,
+        [(c.title, c.content, c.index) for c in book.chapters],
+        [(t.title, t.chapter_index, t.level) for t in book.toc],
+        book.cover_data,
+        book.cover_ext,
+    ))
+
+
+def _decode(data: bytes, file_path: Path) -> Book:
+    title, author, chapters, toc, cover_data, cover_ext = marshal.loads(data)
+    return Book(
+        title=title,
+        author=author,
+        file_path=file_path,
+        chapters=[Chapter(*c) for c in chapters],
+        toc=[TocEntry(*t) for t in toc],
+        cover_data=cover_data,
+        cover_ext=cover_ext,
+    )
@@ -0,0 +1,248 @@
+"""Lazy, zip-backed access to the parts of an EPUB the parser needs.
+
+Only the container, the OPF package document and the TOC are read up front.
+Spine documents and the cover image are read from the archive on demand, so
+fonts and illustrations are never loaded into memory.
+"""
+
+import posixpath
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote
+
+from lxml import etree
+
+NAMESPACES = {
+    'container': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'ncx': 'http://www.daisy.org/z3986/2005/ncx/',
+}
+
+DOCUMENT_MEDIA_TYPES = frozenset(['application/xhtml+xml', 'text/html'])
+IMAGE_MEDIA_TYPES = frozenset(['image/jpeg', 'image/jpg', 'image/png', 'image/gif'])
+
+# Package documents are XML; never resolve external entities
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+_HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+
+
+@dataclass
+class ManifestItem:
+    """An entry of the OPF manifest."""
+    id: str
+    href: str  # Unquoted, relative to the OPF directory
+    media_type: str
+    properties: list[str] = field(default_factory=list)
+
+
+@dataclass
+class NavPoint:
+    """A table of contents entry from the NCX or EPUB 3 navigation document."""
+    title: str
+    href: str = ''  # Relative to the OPF directory, may include a #fragment
+    children: list['NavPoint'] = field(default_factory=list)
+
+
+class EpubArchive:
+    """Read-only view of an EPUB file backed directly by its zip archive."""
+
+    def __init__(self, file_path: Path):
+        self.zf = zipfile.ZipFile(file_path)
+        try:
+            self.opf_path = self._find_opf_path()
+            package = self._parse_xml(self.opf_path)
+        except Exception:
+            self.zf.close()
+            raise
+
+        self.opf_dir = posixpath.dirname(self.opf_path)
+        self.metadata_elem = package.find('opf:metadata', NAMESPACES)
+
+        self.manifest: dict[str, ManifestItem] = {}
+        manifest = package.find('opf:manifest', NAMESPACES)
+        for elem in manifest.iterfind('opf:item', NAMESPACES) if manifest is not None else []:
+            item = ManifestItem(
+                id=elem.get('id', ''),
+                href=unquote(elem.get('href', '')),
+                media_type=elem.get('media-type', ''),
+                properties=elem.get('properties', '').split(),
+            )
+            self.manifest[item.id] = item
+
+        spine = package.find('opf:spine', NAMESPACES)
+        self.spine_ids = [
+            ref.get('idref', '') for ref in spine.iterfind('opf:itemref', NAMESPACES)
+        ] if spine is not None else []
+        self.ncx_id = spine.get('toc', '') if spine is not None else ''
+
+    def __enter__(self) -> 'EpubArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.zf.close()
+
+    def read(self, item: ManifestItem) -> bytes:
+        """Read a manifest item's bytes from the archive."""
+        return self.zf.read(self._zip_name(item.href))
+
+    def metadata(self, name: str) -> str | None:
+        """Return the first Dublin Core metadata value (e.g. 'title', 'creator')."""
+        if self.metadata_elem is None:
+            return None
+        elem = self.metadata_elem.find(f'dc:{name}', NAMESPACES)
+        if elem is not None and elem.text:
+            return elem.text
+        return None
+
+    def spine_documents(self) -> list[ManifestItem]:
+        """Manifest items of the spine's content documents, in reading order."""
+        items = []
+        for item_id in self.spine_ids:
+            item = self.manifest.get(item_id)
+            if item is not None and item.media_type in DOCUMENT_MEDIA_TYPES:
+                items.append(item)
+        return items
+
+    def cover_item(self) -> ManifestItem | None:
+        """Find the cover image in the manifest without reading any images."""
+        # Method 1: <meta name="cover" content="item-id"/> (EPUB 2)
+        if self.metadata_elem is not None:
+            for meta in self.metadata_elem.iterfind('opf:meta', NAMESPACES):
+                if meta.get('name') == 'cover':
+                    item = self.manifest.get(meta.get('content', ''))
+                    if item is not None and item.media_type in IMAGE_MEDIA_TYPES:
+                        return item
+
+        images = [i for i in self.manifest.values() if i.media_type in IMAGE_MEDIA_TYPES]
+
+        # Method 2: item with cover-image property (EPUB 3)
+        for item in images:
+            if 'cover-image' in item.properties:
+                return item
+
+        # Method 3: any image with "cover" in the name
+        for item in images:
+            if 'cover' in item.href.lower():
+                return item
+
+        return None
+
+    def toc(self) -> list[NavPoint]:
+        """Read the table of contents, preferring the EPUB 3 navigation document."""
+        for item in self.manifest.values():
+            if 'nav' in item.properties and item.media_type in DOCUMENT_MEDIA_TYPES:
+                points = self._parse_nav(item)
+                if points is not None:
+                    return points
+
+        ncx = self.manifest.get(self.ncx_id)
+        if ncx is None:
+            ncx = next(
+                (i for i in self.manifest.values()
+                 if i.media_type == 'application/x-dtbncx+xml'),
+                None,
+            )
+        if ncx is not None:
+            return self._parse_ncx(ncx)
+
+        return []
+
+    def _find_opf_path(self) -> str:
+        """Locate the OPF package document through META-INF/container.xml."""
+        container = self._parse_xml('META-INF/container.xml')
+        for rootfile in container.iter(f"{{{NAMESPACES['container']}}}rootfile"):
+            if rootfile.get('media-type') == 'application/oebps-package+xml':
+                return rootfile.get('full-path', '')
+        raise ValueError("Can not find OPF package document")
+
+    def _parse_xml(self, zip_name: str) -> etree._Element:
+        try:
+            data = self.zf.read(zip_name)
+        except KeyError:
+            raise ValueError(f"Missing {zip_name} in EPUB") from None
+        root = etree.fromstring(data, _XML_PARSER)
+        if root is None:
+            raise ValueError(f"Can not parse {zip_name}")
+        return root
+
+    def _zip_name(self, href: str) -> str:
+        return posixpath.normpath(posixpath.join(self.opf_dir, href))
+
+    @staticmethod
+    def _resolve_href(base_dir: str, href: str) -> str:
+        """Resolve a TOC link relative to the document that contains it."""
+        path, _, fragment = href.partition('#')
+        if path:
+            path = posixpath.normpath(posixpath.join(base_dir, unquote(path)))
+        return f"{path}#{fragment}" if fragment else path
+
+    def _parse_ncx(self, item: ManifestItem) -> list[NavPoint]:
+        """Parse an EPUB 2 NCX navMap."""
+        try:
+            root = etree.fromstring(self.read(item), _XML_PARSER)
+        except KeyError:
+            return []
+        if root is None:
+            return []
+        nav_map = root.find('ncx:navMap', NAMESPACES)
+        if nav_map is None:
+            return []
+
+        base_dir = posixpath.dirname(item.href)
+        ncx = f"{{{NAMESPACES['ncx']}}}"
+
+        def parse_points(parent: etree._Element) -> list[NavPoint]:
+            points = []
+            for elem in parent.iterchildren(f'{ncx}navPoint'):
+                label = elem.find(f'{ncx}navLabel')
+                content = elem.find(f'{ncx}content')
+                points.append(NavPoint(
+                    title=(label[0].text or '') if label is not None and len(label) else '',
+                    href=self._resolve_href(base_dir, content.get('src', ''))
+                    if content is not None else '',
+                    children=parse_points(elem),
+                ))
+            return points
+
+        return parse_points(nav_map)
+
+    def _parse_nav(self, item: ManifestItem) -> list[NavPoint] | None:
+        """Parse the toc <nav> of an EPUB 3 navigation document."""
+        try:
+            root = etree.fromstring(self.read(item), _HTML_PARSER)
+        except KeyError:
+            return None
+        if root is None:
+            return None
+
+        nav = next((n for n in root.iter('nav') if 'toc' in n.attrib.values()), None)
+        if nav is None or nav.find('ol') is None:
+            return None
+
+        base_dir = posixpath.dirname(item.href)
+
+        def parse_list(list_elem: etree._Element) -> list[NavPoint]:
+            points = []
+            for li in list_elem.iterchildren('li'):
+                sublist = li.find('ol')
+                link = li.find('a')
+                href = link.get('href') if link is not None else None
+                if sublist is not None:
+                    points.append(NavPoint(
+                        title=''.join(li[0].itertext()),
+                        href=self._resolve_href(base_dir, href) if href else '',
+                        children=parse_list(sublist),
+                    ))
+                elif href:
+                    points.append(NavPoint(
+                        title=''.join(link.itertext()),
+                        href=self._resolve_href(base_dir, href),
+                    ))
+            return points
+
+        return parse_list(nav.find('ol'))
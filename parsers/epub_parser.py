@@ -1,16 +1,29 @@
-"""EPUB format parser using ebooklib."""
+"""EPUB format parser."""
 
+import bisect
+import posixpath
+import re
+from collections.abc import Iterator
 from pathlib import Path
-import warnings
 
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+from lxml import etree
 
-from .base import Book, Chapter, TocEntry, clean_text
+from .base import Book, BookStream, Chapter, TocEntry, clean_text
+from .epub_archive import EpubArchive, NavPoint
 
-# Suppress XML parsing warning - we're intentionally using HTML parser for EPUB content
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+# EPUB content is XHTML, but the lenient HTML parser copes with broken markup
+_HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+
+# Elements whose text forms a paragraph
+BLOCK_TAGS = frozenset(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+# Elements whose content is never part of the book text
+SKIP_TAGS = frozenset(['script', 'style', 'head', 'meta', 'link'])
+
+# Prefixes of paragraphs that look like chapter headings
+HEADING_PREFIXES = ('глава', 'chapter', 'часть', 'part')
+TITLE_PREFIXES = ('глава', 'chapter', 'часть', 'part', 'пролог', 'эпилог',
+                  'prologue', 'epilogue', 'введение', 'заключение')
 
 
 class EpubParser:
@@ -18,174 +31,221 @@ class EpubParser:
 
     def parse(self, file_path: Path) -> Book:
         """Parse an EPUB file and return a Book object."""
-        book = epub.read_epub(str(file_path))
-
-        # Extract metadata
-        title = self._get_metadata(book, 'title') or file_path.stem
-        author = self._get_metadata(book, 'creator') or "Unknown"
-
-        # Extract chapters
-        chapters = self._extract_chapters(book)
-
-        # Extract table of contents
-        toc = self._extract_toc(book, chapters)
+        return self.stream(file_path).to_book()
 
-        # Extract cover image
-        cover_data, cover_ext = self._extract_cover(book)
-
-        return Book(
-            title=title,
-            author=author,
-            file_path=file_path,
-            chapters=chapters,
-            toc=toc,
-            cover_data=cover_data,
-            cover_ext=cover_ext,
-        )
-
-    def _get_metadata(self, book: epub.EpubBook, field: str) -> str | None:
-        """Extract metadata field from EPUB."""
+    def stream(self, file_path: Path) -> BookStream:
+        """Open an EPUB file; chapters are parsed as the stream is consumed."""
+        archive = EpubArchive(file_path)
         try:
-            values = book.get_metadata('DC', field)
-            if values:
-                return values[0][0]
-        except (IndexError, KeyError):
-            pass
-        return None
-
-    def _extract_chapters(self, book: epub.EpubBook) -> list[Chapter]:
-        """Extract all chapters from EPUB using spine order."""
-        chapters = []
+            # Extract metadata
+            title = archive.metadata('title') or file_path.stem
+            author = archive.metadata('creator') or "Unknown"
+        except Exception:
+            archive.close()
+            raise
+
+        # A generator closed before it starts never enters its `with`
+        book = BookStream(title=title, author=author, file_path=file_path,
+                          chapters=iter(()), closer=archive.close)
+        book.chapters = self._stream_chapters(archive, book)
+        return book
+
+    def _stream_chapters(self, archive: EpubArchive, book: BookStream) -> Iterator[Chapter]:
+        """Yield chapters, then fill in the book's TOC and cover."""
+        with archive:
+            # Chapters and the href -> chapter map come from one spine pass;
+            # TOC matching only needs chapter titles, not their text
+            href_to_chapter: dict[str, int] = {}
+            titles: list[Chapter] = []
+            for chapter in self._extract_chapters(archive, href_to_chapter):
+                titles.append(Chapter(title=chapter.title, content='', index=chapter.index))
+                yield chapter
+
+            # Extract table of contents
+            book.toc = self._extract_toc(archive.toc(), titles, href_to_chapter)
+
+            # Extract cover image
+            book.cover_data, book.cover_ext = self._extract_cover(archive)
+
+    def _extract_chapters(
+        self, archive: EpubArchive, href_to_chapter: dict[str, int]
+    ) -> Iterator[Chapter]:
+        """Extract all chapters from EPUB using spine order.
+
+        Args:
+            archive: Open EPUB archive
+            href_to_chapter: Filled with a map from spine document href (and
+                bare file name) to the index of the chapter it starts.
+                Documents without text map to the chapter that follows them.
+                Complete once the generator is exhausted.
+
+        Yields:
+            Chapters in reading order
+        """
+        pending_hrefs: list[str] = []
         index = 0
 
-        # Use spine to get correct reading order
-        for spine_item in book.spine:
-            item_id = spine_item[0]
-            item = book.get_item_with_id(item_id)
+        # Use spine to get correct reading order; documents are read one at a time
+        for item in archive.spine_documents():
+            href = item.href
+            pending_hrefs.append(href)
 
-            if item is None or item.get_type() != ebooklib.ITEM_DOCUMENT:
-                continue
+            try:
+                content = archive.read(item)
+            except KeyError:
+                continue  # Listed in the manifest but missing from the archive
 
-            content = item.get_content().decode('utf-8', errors='ignore')
-            soup = BeautifulSoup(content, 'lxml')
+            root = etree.fromstring(content, _HTML_PARSER)
+            if root is None:
+                continue
 
             # Get chapter title from first heading
-            title = self._extract_title(soup) or f"Chapter {index + 1}"
+            title = self._extract_title(root) or f"Chapter {index + 1}"
 
             # Get text content
-            text = self._extract_text(soup)
+            text = self._extract_text(root)
 
             if text.strip():  # Only add non-empty chapters
-                chapters.append(Chapter(
+                for pending in pending_hrefs:
+                    self._add_href(href_to_chapter, pending, index)
+                pending_hrefs = []
+                yield Chapter(
                     title=title,
                     content=clean_text(text),
                     index=index,
-                ))
+                )
                 index += 1
 
-        return chapters
+        # Trailing documents without text belong to the last chapter
+        for pending in pending_hrefs:
+            self._add_href(href_to_chapter, pending, max(index - 1, 0))
+
+    @staticmethod
+    def _add_href(href_to_chapter: dict[str, int], href: str, index: int) -> None:
+        """Map a document href, and its bare file name, to a chapter index."""
+        href = _href_key(href)
+        href_to_chapter[href] = index
+        if '/' in href:
+            href_to_chapter.setdefault(href.split('/')[-1], index)
 
-    def _extract_title(self, soup: BeautifulSoup) -> str | None:
+    def _extract_title(self, root: etree._Element) -> str | None:
         """Extract title from HTML content."""
         # Try h1, h2, h3 in order
         for tag in ['h1', 'h2', 'h3']:
-            element = soup.find(tag)
-            if element:
-                return element.get_text(strip=True)
+            element = next(root.iter(tag), None)
+            if element is not None:
+                return _element_text(element, '')
 
         # Try div/p with title class (common in FB2-converted EPUBs)
-        for selector in ['div.title1', 'div.title', 'p.title', '.title']:
-            element = soup.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
+        for tag, css_class in [('div', 'title1'), ('div', 'title'), ('p', 'title'),
+                               (None, 'title')]:
+            element = _find_by_class(root, tag, css_class)
+            if element is not None:
+                return _element_text(element, '')
 
         # Try first paragraph if it looks like a chapter title
-        first_p = soup.find('p')
-        if first_p:
-            text = first_p.get_text(strip=True)
+        first_p = next(root.iter('p'), None)
+        if first_p is not None:
+            text = _element_text(first_p, '')
             # Check if it looks like a chapter title (short, starts with common patterns)
-            if len(text) < 50 and any(text.lower().startswith(p) for p in
-                ['глава', 'chapter', 'часть', 'part', 'пролог', 'эпилог', 'prologue', 'epilogue', 'введение', 'заключение']):
+            if len(text) < 50 and text.lower().startswith(TITLE_PREFIXES):
                 return text
 
         return None
 
-    def _extract_text(self, soup: BeautifulSoup) -> str:
-        """Extract plain text from HTML content."""
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'head', 'meta', 'link']):
-            element.decompose()
+    def _extract_text(self, root: etree._Element) -> str:
+        """Extract plain text from HTML content.
+
+        Walks the document once. Each block element contributes only its own
+        text; text inside nested blocks belongs to those blocks, so nothing
+        is extracted twice. The same walk collects the raw body text with
+        <br> as line breaks, for documents that do not use <p>.
+        """
+        body = next(root.iter('body'), None)
+        if body is None:
+            return ''
+
+        paragraphs: list[str] = []
+        body_parts: list[str] = []
+        blocks: list[list[str]] = []  # Text pieces of each open block, innermost last
+
+        def add_text(text: str) -> None:
+            body_parts.append(text)
+            if blocks:
+                text = text.strip()
+                if text:
+                    blocks[-1].append(text)
+
+        def flush_block() -> None:
+            if blocks and blocks[-1]:
+                text = ' '.join(blocks[-1])
+                # Skip a heading repeated right after its title block
+                if not paragraphs or paragraphs[-1] != text:
+                    paragraphs.append(text)
+                blocks[-1].clear()
+
+        if body.text:
+            add_text(body.text)
+
+        # Iterative pre-order walk: deep nesting must not hit the recursion limit
+        stack = [(child, False) for child in reversed(body)]
+        while stack:
+            element, closing = stack.pop()
+            tag = element.tag
+
+            if closing:
+                if tag in BLOCK_TAGS:
+                    flush_block()
+                    blocks.pop()
+                if element.tail:
+                    add_text(element.tail)
+                continue
+
+            if not isinstance(tag, str) or tag in SKIP_TAGS:
+                # Comments, processing instructions, scripts: keep only the tail
+                if element.tail:
+                    add_text(element.tail)
+                continue
+
+            if tag == 'br':
+                body_parts.append('\n')
+            elif tag in BLOCK_TAGS:
+                flush_block()
+                blocks.append([])
 
-        # Get text with paragraph breaks
-        paragraphs = []
-        prev_text = None
+            if element.text:
+                add_text(element.text)
 
-        for p in soup.find_all(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            # Use separator to preserve spaces between inline elements
-            text = p.get_text(separator=' ', strip=True)
-            if text and text != prev_text:  # Skip duplicates
-                paragraphs.append(text)
-                prev_text = text
+            stack.append((element, True))
+            stack.extend((child, False) for child in reversed(element))
 
         # Check if we have actual content (not just headers)
         non_header_content = [p for p in paragraphs
-                             if len(p) > 100 or not any(p.lower().startswith(x)
-                             for x in ['глава', 'chapter', 'часть', 'part'])]
+                              if len(p) > 100 or not p.lower().startswith(HEADING_PREFIXES)]
 
         if non_header_content:
             return '\n\n'.join(paragraphs)
 
-        # Fallback: Handle HTML with <br/> tags instead of <p>
-        # Replace <br> tags with newlines, then get text
-        body = soup.find('body')
-        if body:
-            # Convert <br> to newlines
-            for br in body.find_all('br'):
-                br.replace_with('\n')
-
-            # Get text and split by newlines
-            text = body.get_text()
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            if lines:
-                return '\n\n'.join(lines)
-
-        # Last fallback
-        return soup.get_text(separator=' ')
+        # Fallback: HTML with <br/> tags instead of <p>
+        lines = [line.strip() for line in ''.join(body_parts).split('\n') if line.strip()]
+        return '\n\n'.join(lines)
 
-    def _extract_toc(self, book: epub.EpubBook, chapters: list[Chapter]) -> list[TocEntry]:
+    def _extract_toc(
+        self,
+        nav_points: list[NavPoint],
+        chapters: list[Chapter],
+        href_to_chapter: dict[str, int],
+    ) -> list[TocEntry]:
         """Extract table of contents from EPUB."""
-        # Build a map from href to chapter index
-        # We need to track which spine items became actual chapters
-        href_to_chapter: dict[str, int] = {}
-
-        chapter_idx = 0
-        for spine_item in book.spine:
-            item_id = spine_item[0]
-            item = book.get_item_with_id(item_id)
-            if item and item.get_type() == ebooklib.ITEM_DOCUMENT:
-                # Check if this item has content (was included as a chapter)
-                content = item.get_content().decode('utf-8', errors='ignore')
-                soup = BeautifulSoup(content, 'lxml')
-                text = soup.get_text(strip=True)
-
-                if text:  # Only count non-empty items
-                    href = item.get_name()
-                    href_to_chapter[href] = chapter_idx
-                    # Also store just the filename
-                    if '/' in href:
-                        href_to_chapter[href.split('/')[-1]] = chapter_idx
-                    chapter_idx += 1
-
-        # Also create a map by chapter title for fallback
-        title_to_chapter = {ch.title.lower(): ch.index for ch in chapters}
+        title_index = _ChapterTitleIndex(chapters)
 
         toc_entries = []
 
-        def find_chapter_index(item) -> int:
+        def find_chapter_index(item: NavPoint) -> int:
             """Find chapter index from TOC item href or title."""
             # Try href first
-            if hasattr(item, 'href') and item.href:
-                href = item.href.split('#')[0]  # Remove fragment
+            if item.href:
+                href = _href_key(item.href)
                 if href in href_to_chapter:
                     return href_to_chapter[href]
                 # Try just filename
@@ -194,40 +254,23 @@ class EpubParser:
                     return href_to_chapter[filename]
 
             # Fallback to title matching
-            if hasattr(item, 'title') and item.title:
-                title_lower = item.title.lower()
-                if title_lower in title_to_chapter:
-                    return title_to_chapter[title_lower]
-                # Partial match
-                for ch_title, ch_idx in title_to_chapter.items():
-                    if title_lower in ch_title or ch_title in title_lower:
-                        return ch_idx
+            if item.title:
+                chapter_idx = title_index.find(item.title)
+                if chapter_idx is not None:
+                    return chapter_idx
 
             return 0
 
-        def process_toc_item(item, level=0):
-            if isinstance(item, tuple):
-                # Section with children
-                section, children = item
-                if hasattr(section, 'title'):
-                    chapter_idx = find_chapter_index(section)
-                    toc_entries.append(TocEntry(
-                        title=section.title,
-                        chapter_index=chapter_idx,
-                        level=level,
-                    ))
-                for child in children:
-                    process_toc_item(child, level + 1)
-            elif hasattr(item, 'title'):
-                # Simple link
-                chapter_idx = find_chapter_index(item)
-                toc_entries.append(TocEntry(
-                    title=item.title,
-                    chapter_index=chapter_idx,
-                    level=level,
-                ))
-
-        for item in book.toc:
+        def process_toc_item(item: NavPoint, level: int = 0) -> None:
+            toc_entries.append(TocEntry(
+                title=item.title,
+                chapter_index=find_chapter_index(item),
+                level=level,
+            ))
+            for child in item.children:
+                process_toc_item(child, level + 1)
+
+        for item in nav_points:
             process_toc_item(item)
 
         # If no TOC found, generate from chapters
@@ -239,56 +282,134 @@ class EpubParser:
 
         return toc_entries
 
-    def _extract_cover(self, book: epub.EpubBook) -> tuple[bytes | None, str]:
-        """Extract cover image from EPUB."""
-        # Method 1: Look for cover in metadata
-        cover_id = None
+    def _extract_cover(self, archive: EpubArchive) -> tuple[bytes | None, str]:
+        """Extract cover image from EPUB, reading only that one archive entry."""
+        cover_item = archive.cover_item()
+        if cover_item is None:
+            return None, ""
+
         try:
-            meta = book.get_metadata('OPF', 'cover')
-            if meta:
-                cover_id = meta[0][0]
-        except (IndexError, KeyError):
-            pass
-
-        # Method 2: Look for item with cover-image property
-        if not cover_id:
-            for item in book.get_items():
-                if hasattr(item, 'get_name'):
-                    name = item.get_name().lower()
-                    if 'cover' in name and item.get_type() == ebooklib.ITEM_IMAGE:
-                        cover_id = item.get_id()
-                        break
-
-        # Get the cover image by ID
-        if cover_id:
-            cover_item = book.get_item_with_id(cover_id)
-            if cover_item:
-                data = cover_item.get_content()
-                # Determine extension from media type or filename
-                media_type = getattr(cover_item, 'media_type', '') or ''
-                if 'jpeg' in media_type or 'jpg' in media_type:
-                    ext = 'jpg'
-                elif 'png' in media_type:
-                    ext = 'png'
-                elif 'gif' in media_type:
-                    ext = 'gif'
-                else:
-                    # Try from filename
-                    name = cover_item.get_name().lower()
-                    if name.endswith('.png'):
-                        ext = 'png'
-                    elif name.endswith('.gif'):
-                        ext = 'gif'
-                    else:
-                        ext = 'jpg'
-                return data, ext
-
-        # Method 3: Look for any image with "cover" in the name
-        for item in book.get_items_of_type(ebooklib.ITEM_IMAGE):
-            name = item.get_name().lower()
-            if 'cover' in name:
-                data = item.get_content()
-                ext = 'png' if name.endswith('.png') else 'jpg'
-                return data, ext
-
-        return None, ""
+            data = archive.read(cover_item)
+        except KeyError:
+            return None, ""
+
+        # Determine extension from media type or filename
+        media_type = cover_item.media_type
+        if 'jpeg' in media_type or 'jpg' in media_type:
+            ext = 'jpg'
+        elif 'png' in media_type:
+            ext = 'png'
+        elif 'gif' in media_type:
+            ext = 'gif'
+        else:
+            # Try from filename
+            name = cover_item.href.lower()
+            if name.endswith('.png'):
+                ext = 'png'
+            elif name.endswith('.gif'):
+                ext = 'gif'
+            else:
+                ext = 'jpg'
+        return data, ext
+
+
+# Words of chapter titles, where contained TOC entries may start
+_WORD = re.compile(r'\w+')
+
+# Sorts after every string that starts with the same prefix
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def _href_key(href: str) -> str:
+    """Normalize a document href for lookups: no fragment, no ./ or ../ steps."""
+    href = href.split('#')[0]
+    return posixpath.normpath(href) if href else href
+
+
+def _element_text(element: etree._Element, separator: str) -> str:
+    """Join the stripped, non-empty text pieces of an element's subtree."""
+    return separator.join(t for t in (t.strip() for t in element.itertext()) if t)
+
+
+def _find_by_class(
+    root: etree._Element, tag: str | None, css_class: str
+) -> etree._Element | None:
+    """Return the first element (of the given tag) that has a CSS class."""
+    for element in root.iter(tag):
+        if not isinstance(element.tag, str):
+            continue
+        classes = element.get('class')
+        if classes and css_class in classes.split():
+            return element
+    return None
+
+
+class _ChapterTitleIndex:
+    """Chapter lookup by title for TOC entries without usable hrefs.
+
+    Matches exactly first, then a chapter title contained in the entry
+    (e.g. "Chapter 1" in "Chapter 1. The Beginning") or the entry contained
+    in a chapter title from one of its words on (e.g. "Prologue" in
+    "Prologue. The Beginning"), preferring the earliest chapter. Lookups
+    are dict probes bounded by the entry's length, and two binary searches
+    over the titles' word suffixes followed by a range minimum query, so
+    even an entry that every title contains ("chapter") never scans them.
+    """
+
+    def __init__(self, chapters: list[Chapter]):
+        titles = [ch.title.lower() for ch in chapters]
+        self.exact = {title: ch.index for title, ch in zip(titles, chapters)}
+
+        # Earliest chapter per title, for "chapter title in entry" lookups
+        self.first_index: dict[str, int] = {}
+        for title, ch in zip(titles, chapters):
+            self.first_index.setdefault(title, ch.index)
+        self.lengths = sorted({len(t) for t in self.first_index if t})
+
+        # Title tails from each word on, for "entry in chapter title" lookups;
+        # the tails starting with an entry are a contiguous sorted range
+        tails: dict[str, int] = {}
+        for title, index in self.first_index.items():
+            for start in {0} | {m.start() for m in _WORD.finditer(title)}:
+                tail = title[start:]
+                if tail not in tails or index < tails[tail]:
+                    tails[tail] = index
+        self.suffixes = sorted(tails)
+
+        # Sparse table: level k holds the earliest chapter of each run of
+        # 2**k consecutive suffixes
+        self.range_min = [[tails[tail] for tail in self.suffixes]]
+        width = 1
+        while width * 2 <= len(self.suffixes):
+            prev = self.range_min[-1]
+            self.range_min.append(
+                [min(prev[i], prev[i + width]) for i in range(len(prev) - width)]
+            )
+            width *= 2
+
+    def find(self, title: str) -> int | None:
+        """Return the chapter index for a TOC title, or None."""
+        title = title.lower()
+        if title in self.exact:
+            return self.exact[title]
+
+        best = None
+        for length in self.lengths:
+            if length > len(title):
+                break
+            for start in range(len(title) - length + 1):
+                idx = self.first_index.get(title[start:start + length])
+                if idx is not None and (best is None or idx < best):
+                    best = idx
+
+        if title:
+            lo = bisect.bisect_left(self.suffixes, title)
+            hi = bisect.bisect_left(self.suffixes, title + _MAX_CHAR, lo)
+            if lo < hi:
+                level = (hi - lo).bit_length() - 1
+                row = self.range_min[level]
+                idx = min(row[lo], row[hi - (1 << level)])
+                if best is None or idx < best:
+                    best = idx
+
+        return best
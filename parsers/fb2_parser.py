@@ -1,10 +1,17 @@
 """FB2 (FictionBook) format parser."""
 
+from contextlib import contextmanager
+from collections.abc import Iterator
 from pathlib import Path
+from typing import IO
+import base64
+import binascii
+import itertools
 import xml.etree.ElementTree as ET
+import zipfile
 import re
 
-from .base import Book, Chapter, TocEntry, clean_text
+from .base import Book, BookStream, Chapter, TocEntry, clean_text
 
 
 # FB2 namespace
@@ -12,37 +19,93 @@ FB2_NS = '{http://www.gribuser.ru/xml/fictionbook/2.0}'
 
 
 class Fb2Parser:
-    """Parser for FB2 format books."""
+    """Parser for FB2 format books.
+
+    The file is read with iterparse: each top-level <section> is turned into
+    a chapter and dropped as soon as it ends, and of all <binary> blobs only
+    the one referenced by <coverpage> is decoded. Memory use therefore does
+    not grow with the size of the book. Zipped books (.fb2.zip) are read
+    straight from the archive.
+    """
 
     def parse(self, file_path: Path) -> Book:
-        """Parse an FB2 file and return a Book object."""
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-
-        # Handle namespace
-        ns = self._detect_namespace(root)
-
-        # Extract metadata
-        title, author = self._extract_metadata(root, ns)
-        if not title:
-            title = file_path.stem
-
-        # Extract chapters
-        chapters = self._extract_chapters(root, ns)
-
-        # Build TOC from chapters
-        toc = [
-            TocEntry(title=ch.title, chapter_index=ch.index, level=0)
-            for ch in chapters
-        ]
-
-        return Book(
-            title=title,
-            author=author,
-            file_path=file_path,
-            chapters=chapters,
-            toc=toc,
-        )
+        """Parse an FB2 or FB2.zip file and return a Book object."""
+        return self.stream(file_path).to_book()
+
+    def stream(self, file_path: Path) -> BookStream:
+        """Open an FB2 or FB2.zip file; chapters are parsed as they are read.
+
+        The <description> comes before the bodies, so reading up to the first
+        chapter is enough to know the title and author.
+        """
+        book = BookStream(title="", author="Unknown", file_path=file_path,
+                          chapters=iter(()))
+        chapters = self._stream_chapters(file_path, book)
+        # The chain below can not be closed, the started generator can
+        book.closer = chapters.close
+        first = next(chapters, None)
+        book.title = book.title or fb2_stem(file_path)
+        book.chapters = itertools.chain([first] if first else [], chapters)
+        return book
+
+    def _stream_chapters(self, file_path: Path, book: BookStream) -> Iterator[Chapter]:
+        """Yield chapters, filling in the book's metadata, TOC and cover."""
+        cover_id = None
+        index = 0
+
+        with open_fb2(file_path) as source:
+            ns = ''
+            stack: list[ET.Element] = []
+            body_has_sections = False
+
+            for event, elem in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    if not stack:
+                        ns = self._detect_namespace(elem)
+                    stack.append(elem)
+                    continue
+
+                stack.pop()
+                if not stack:
+                    break  # End of the root element
+                parent = stack[-1]
+                tag = elem.tag
+                chapter = None
+
+                if len(stack) == 1:
+                    # Top-level elements: description, body, binary
+                    if tag == f'{ns}description':
+                        title, book.author = self._extract_metadata(elem, ns)
+                        book.title = title or book.title
+                        cover_id = self._find_cover_id(elem, ns)
+                    elif tag == f'{ns}body':
+                        # No sections, treat entire body as one chapter
+                        if not body_has_sections and elem.get('name', '') != 'notes':
+                            content = self._extract_section_text(elem, ns)
+                            if content.strip():
+                                chapter = Chapter(
+                                    title="Main",
+                                    content=clean_text(content),
+                                    index=0,
+                                )
+                        body_has_sections = False
+                    elif tag == f'{ns}binary' and cover_id and elem.get('id') == cover_id:
+                        book.cover_data, book.cover_ext = self._decode_binary(elem)
+                    parent.remove(elem)
+
+                elif len(stack) == 2 and tag == f'{ns}section' and parent.tag == f'{ns}body':
+                    # Process sections as chapters, skipping the notes body
+                    body_has_sections = True
+                    if parent.get('name', '') != 'notes':
+                        chapter = self._process_section(elem, ns, index)
+                    parent.remove(elem)
+
+                if chapter:
+                    # Build TOC from chapters
+                    book.toc.append(TocEntry(
+                        title=chapter.title, chapter_index=chapter.index, level=0))
+                    index += 1
+                    yield chapter
 
     def _detect_namespace(self, root: ET.Element) -> str:
         """Detect the FB2 namespace from root element."""
@@ -51,27 +114,57 @@ class Fb2Parser:
             return tag.split('}')[0] + '}'
         return ''
 
-    def _extract_metadata(self, root: ET.Element, ns: str) -> tuple[str, str]:
-        """Extract title and author from FB2 metadata."""
+    def _extract_metadata(self, description: ET.Element, ns: str) -> tuple[str, str]:
+        """Extract title and author from FB2 <description>."""
         title = ""
         author = "Unknown"
 
-        description = root.find(f'{ns}description')
-        if description is not None:
-            title_info = description.find(f'{ns}title-info')
-            if title_info is not None:
-                # Book title
-                book_title = title_info.find(f'{ns}book-title')
-                if book_title is not None and book_title.text:
-                    title = book_title.text.strip()
+        title_info = description.find(f'{ns}title-info')
+        if title_info is not None:
+            # Book title
+            book_title = title_info.find(f'{ns}book-title')
+            if book_title is not None and book_title.text:
+                title = book_title.text.strip()
 
-                # Author
-                author_elem = title_info.find(f'{ns}author')
-                if author_elem is not None:
-                    author = self._extract_author_name(author_elem, ns)
+            # Author
+            author_elem = title_info.find(f'{ns}author')
+            if author_elem is not None:
+                author = self._extract_author_name(author_elem, ns)
 
         return title, author
 
+    def _find_cover_id(self, description: ET.Element, ns: str) -> str | None:
+        """Return the <binary> id referenced by <coverpage>, without the '#'."""
+        image = description.find(f'{ns}title-info/{ns}coverpage/{ns}image')
+        if image is None:
+            return None
+        for name, value in image.attrib.items():
+            # l:href / xlink:href, whatever the prefix is bound to
+            if name == 'href' or name.endswith('}href'):
+                return value.lstrip('#') or None
+        return None
+
+    def _decode_binary(self, binary: ET.Element) -> tuple[bytes | None, str]:
+        """Decode a base64 <binary> image, returning data and file extension."""
+        try:
+            data = base64.b64decode(binary.text or '')
+        except (binascii.Error, ValueError):
+            return None, ""
+        if not data:
+            return None, ""
+
+        content_type = binary.get('content-type', '')
+        if 'png' in content_type:
+            ext = 'png'
+        elif 'gif' in content_type:
+            ext = 'gif'
+        elif 'jpeg' in content_type or 'jpg' in content_type:
+            ext = 'jpg'
+        else:
+            name = binary.get('id', '').lower()
+            ext = 'png' if name.endswith('.png') else 'gif' if name.endswith('.gif') else 'jpg'
+        return data, ext
+
     def _extract_author_name(self, author_elem: ET.Element, ns: str) -> str:
         """Extract author name from author element."""
         parts = []
@@ -91,36 +184,6 @@ class Fb2Parser:
 
         return "Unknown"
 
-    def _extract_chapters(self, root: ET.Element, ns: str) -> list[Chapter]:
-        """Extract chapters from FB2 body."""
-        chapters = []
-
-        for body in root.findall(f'{ns}body'):
-            # Skip notes body
-            body_name = body.get('name', '')
-            if body_name == 'notes':
-                continue
-
-            sections = body.findall(f'{ns}section')
-
-            if sections:
-                # Process sections as chapters
-                for i, section in enumerate(sections):
-                    chapter = self._process_section(section, ns, len(chapters))
-                    if chapter:
-                        chapters.append(chapter)
-            else:
-                # No sections, treat entire body as one chapter
-                content = self._extract_section_text(body, ns)
-                if content.strip():
-                    chapters.append(Chapter(
-                        title="Main",
-                        content=clean_text(content),
-                        index=0,
-                    ))
-
-        return chapters
-
     def _process_section(self, section: ET.Element, ns: str, index: int) -> Chapter | None:
         """Process a single section into a chapter."""
         # Get section title
@@ -220,3 +283,33 @@ class Fb2Parser:
                 paragraphs.append(f"  — {author_text}")
 
         return '\n'.join(paragraphs)
+
+
+def is_fb2_zip(file_path: Path) -> bool:
+    """Whether the file is a zipped FB2 book (name.fb2.zip)."""
+    return file_path.name.lower().endswith('.fb2.zip')
+
+
+def fb2_stem(file_path: Path) -> str:
+    """File name without .fb2 / .fb2.zip."""
+    name = file_path.name
+    if is_fb2_zip(file_path):
+        return name[:-len('.fb2.zip')]
+    return file_path.stem
+
+
+@contextmanager
+def open_fb2(file_path: Path) -> Iterator[IO[bytes]]:
+    """Open an FB2 file, or the FB2 inside a .fb2.zip, as a binary stream."""
+    if not is_fb2_zip(file_path):
+        with open(file_path, 'rb') as f:
+            yield f
+        return
+
+    with zipfile.ZipFile(file_path) as zf:
+        names = [n for n in zf.namelist() if not n.endswith('/')]
+        fb2_names = [n for n in names if n.lower().endswith('.fb2')]
+        if not (fb2_names or names):
+            raise ValueError("No FB2 file inside archive")
+        with zf.open((fb2_names or names)[0]) as f:
+            yield f
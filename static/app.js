@@ -1,137 +1,194 @@
 /**
  * WebBooks - Minimal JavaScript for Cloud Phone
  * Handles reading position storage and keyboard navigation
+ *
+ * Loaded with defer: pages describe themselves in window.webbooksPage
+ * (book pages) or window.webbooksLibrary (index). Chapter bundles are
+ * handled by chapters.js, which only their pages load.
  */
 
 (function() {
     'use strict';
 
-    var STORAGE_KEY = 'webbooks_positions';
+    // One key per book, so a page turn reads and writes only its own book
+    var POSITION_KEY = 'webbooks_pos_';
+    // All books in one JSON object, as stored before per-book keys
+    var OLD_POSITIONS_KEY = 'webbooks_positions';
+    var FONT_SIZE_KEY = 'webbooks_fontsize';
+
+    // Keys (desktop testing) -> accesskey of the link they follow
+    var NAV_KEYS = {
+        ArrowLeft: '4', '4': '4',       // Previous page
+        ArrowRight: '6', '6': '6',      // Next page
+        Enter: '5', '5': '5',           // Table of contents (center key)
+        ArrowUp: '8', ArrowDown: '8', '8': '8',  // Home / book list
+        '0': '0'                        // Go to page
+    };
 
-    /**
-     * Keyboard navigation for desktop testing
-     */
-    function setupKeyboardNavigation() {
-        document.addEventListener('keydown', function(e) {
-            var key = e.key;
-            var tag = document.activeElement.tagName.toLowerCase();
-            var inInput = (tag === 'input' || tag === 'textarea' || tag === 'select');
-
-            // Escape blurs input
-            if (key === 'Escape' && inInput) {
-                document.activeElement.blur();
-                e.preventDefault();
-                return;
-            }
+    // Book page being read: slug, page, total, profile, bookRoot
+    var pageInfo = null;
 
-            // * (star) always goes back, even in input
-            if (key === '*') {
-                var backLink = document.querySelector('a[accesskey="4"]');
-                if (backLink) {
-                    e.preventDefault();
-                    backLink.click();
-                }
-                return;
-            }
+    function accessLink(key) {
+        return document.querySelector('a[accesskey="' + key + '"]');
+    }
 
-            // Ignore other keys if in input
-            if (inInput) {
-                return;
-            }
+    document.addEventListener('keydown', function(e) {
+        var tag = document.activeElement.tagName.toLowerCase();
+        var inInput = (tag === 'input' || tag === 'textarea' || tag === 'select');
 
-            var link = null;
-
-            // Arrow keys and numeric keys for navigation
-            if (key === 'ArrowLeft' || key === '4') {
-                // Previous page
-                link = document.querySelector('a[accesskey="4"]');
-            } else if (key === 'ArrowRight' || key === '6') {
-                // Next page
-                link = document.querySelector('a[accesskey="6"]');
-            } else if (key === '5' || key === 'Enter') {
-                // Table of contents (center key)
-                link = document.querySelector('a[accesskey="5"]');
-            } else if (key === 'ArrowUp' || key === 'ArrowDown' || key === '8') {
-                // Home / book list
-                link = document.querySelector('a[accesskey="8"]');
-            } else if (key === '0') {
-                // Go to page
-                link = document.querySelector('a[accesskey="0"]');
-            }
+        // Escape blurs input
+        if (e.key === 'Escape' && inInput) {
+            document.activeElement.blur();
+            e.preventDefault();
+            return;
+        }
+
+        // * (star) always goes back, even in input
+        var key = e.key === '*' ? '4' : (inInput ? null : NAV_KEYS[e.key]);
+        var link = key && accessLink(key);
+        if (link) {
+            e.preventDefault();
+            link.click();
+        }
+    });
 
-            if (link) {
-                e.preventDefault();
-                link.click();
+    function storage(action, key, value) {
+        try {
+            return localStorage[action](key, value);
+        } catch (e) {
+            // localStorage may not be available in Cloud Phone
+            return null;
+        }
+    }
+
+    // Move positions saved under the old single key to per-book keys
+    function migratePositions() {
+        var data = storage('getItem', OLD_POSITIONS_KEY);
+        if (!data) {
+            return;
+        }
+        try {
+            var positions = JSON.parse(data);
+            for (var slug in positions) {
+                if (positions.hasOwnProperty(slug) &&
+                        storage('getItem', POSITION_KEY + slug) === null) {
+                    storage('setItem', POSITION_KEY + slug,
+                            JSON.stringify(positions[slug]));
+                }
             }
-        });
+        } catch (e) {
+            // Unreadable: nothing to keep
+        }
+        storage('removeItem', OLD_POSITIONS_KEY);
     }
 
-    // Initialize keyboard navigation
-    setupKeyboardNavigation();
+    migratePositions();
 
     /**
-     * Save reading position for a book
-     * @param {string} bookSlug - Book identifier
-     * @param {number} pageNumber - Current page number
+     * Save reading position for a book (page number within the profile)
      */
-    window.savePosition = function(bookSlug, pageNumber) {
-        try {
-            var positions = loadPositions();
-            positions[bookSlug] = {
-                page: pageNumber,
-                timestamp: Date.now()
-            };
-            localStorage.setItem(STORAGE_KEY, JSON.stringify(positions));
-        } catch (e) {
-            // localStorage may not be available in Cloud Phone
-            console.log('Could not save position:', e);
-        }
+    window.savePosition = function(bookSlug, pageNumber, profile) {
+        storage('setItem', POSITION_KEY + bookSlug, JSON.stringify({
+            page: pageNumber,
+            profile: profile,
+            timestamp: Date.now()
+        }));
     };
 
     /**
-     * Get saved reading position for a book
-     * @param {string} bookSlug - Book identifier
-     * @returns {number|null} - Page number or null if not found
+     * Saved reading position of a book: page and profile, or null
      */
-    window.getPosition = function(bookSlug) {
+    window.loadPosition = function(bookSlug) {
         try {
-            var positions = loadPositions();
-            if (positions[bookSlug]) {
-                return positions[bookSlug].page;
-            }
+            return JSON.parse(storage('getItem', POSITION_KEY + bookSlug));
         } catch (e) {
-            console.log('Could not load position:', e);
+            return null;
         }
-        return null;
     };
 
+    // Point every book link of the library at its saved position
+    function showPositions(library) {
+        var bookLinks = document.querySelectorAll('.book-link');
+        for (var i = 0; i < bookLinks.length; i++) {
+            var link = bookLinks[i];
+            // Book slug from href (e.g., "book-slug/0.html" -> "book-slug")
+            var match = /^([^/]+)\//.exec(link.getAttribute('href'));
+            var pos = match && window.loadPosition(match[1]);
+            if (!pos || !(pos.page > 1)) {
+                continue;
+            }
+            var dir = pos.profile && pos.profile !== library.defaultProfile ?
+                pos.profile + '/' : '';
+            link.setAttribute('href', match[1] + '/' + dir + pos.page + '.html');
+
+            var pageSpan = document.createElement('span');
+            pageSpan.className = 'book-page';
+            pageSpan.textContent = 'с.' + pos.page;
+            link.appendChild(pageSpan);
+        }
+
+        // Focus first book link for D-pad navigation
+        if (bookLinks.length > 0) {
+            bookLinks[0].focus();
+        }
+    }
+
+    // Screen profile matching the device (same breakpoint as style.css)
+    function currentScreen() {
+        return (window.innerWidth <= 160 || window.innerHeight <= 200) ? 'qqvga' : 'qvga';
+    }
+
+    // Page at the same relative position in a profile of targetTotal pages
+    function mapPage(page, total, targetTotal) {
+        if (total <= 1 || targetTotal <= 1) {
+            return 1;
+        }
+        var target = Math.round((page - 1) / (total - 1) * (targetTotal - 1)) + 1;
+        return Math.max(1, Math.min(targetTotal, target));
+    }
+
     /**
-     * Load all positions from storage
-     * @returns {Object} - Positions object
+     * Open the current position in another page profile, once the book's
+     * page counts per profile (profiles.js) are loaded
+     * @param {string} target - Profile name, e.g. 'qvga-large'
      */
-    function loadPositions() {
-        try {
-            var data = localStorage.getItem(STORAGE_KEY);
-            if (data) {
-                return JSON.parse(data);
-            }
-        } catch (e) {
-            console.log('Could not parse positions:', e);
+    function switchProfile(target) {
+        if (!window.webbooksProfiles) {
+            var script = document.createElement('script');
+            script.src = pageInfo.bookRoot + 'profiles.js';
+            script.onload = function() {
+                if (window.webbooksProfiles) {
+                    switchProfile(target);
+                }
+            };
+            document.getElementsByTagName('head')[0].appendChild(script);
+            return;
         }
-        return {};
+        var profiles = window.webbooksProfiles;
+        var targetTotal = profiles.pages[target];
+        if (!targetTotal) {
+            return;
+        }
+        var page = mapPage(pageInfo.page, pageInfo.total, targetTotal);
+        var dir = target === profiles['default'] ? '' : target + '/';
+        window.location.replace(pageInfo.bookRoot + dir + page + '.html');
     }
 
     /**
-     * Apply saved font size preference
+     * Set up a book page: saves the position and moves to the reader's
+     * screen and font size profile if this page belongs to another one
+     * @param {Object} info - slug, page, total, profile, bookRoot
      */
-    function applyFontSize() {
-        try {
-            var fontSize = localStorage.getItem('webbooks_fontsize');
-            if (fontSize) {
-                document.body.classList.add('font-' + fontSize);
-            }
-        } catch (e) {
-            // Ignore
+    function openPage(info) {
+        pageInfo = info;
+        window.savePosition(info.slug, info.page, info.profile);
+
+        var target = currentScreen() + '-' +
+            (storage('getItem', FONT_SIZE_KEY) || 'medium');
+        if (target !== info.profile) {
+            // Tells chapters.js not to load this profile's bundle
+            info.leaving = true;
+            switchProfile(target);
         }
     }
 
@@ -140,22 +197,35 @@
      * @param {string} size - 'small', 'medium', or 'large'
      */
     window.setFontSize = function(size) {
-        try {
-            localStorage.setItem('webbooks_fontsize', size);
-            document.body.className = '';
-            if (size !== 'medium') {
-                document.body.classList.add('font-' + size);
-            }
-        } catch (e) {
-            console.log('Could not save font size:', e);
+        storage('setItem', FONT_SIZE_KEY, size);
+        if (pageInfo) {
+            // Re-open the same position paginated for the new size
+            switchProfile(currentScreen() + '-' + size);
+            return;
         }
+        document.body.className = size !== 'medium' ? 'font-' + size : '';
     };
 
-    // Apply font size on load
+    function init() {
+        if (window.webbooksPage) {
+            // Book pages are paginated for their own font size
+            openPage(window.webbooksPage);
+            return;
+        }
+        var fontSize = storage('getItem', FONT_SIZE_KEY);
+        if (fontSize) {
+            document.body.classList.add('font-' + fontSize);
+        }
+        if (window.webbooksLibrary) {
+            showPositions(window.webbooksLibrary);
+        }
+    }
+
+    // Deferred scripts run after parsing; a plain <script> may not
     if (document.readyState === 'loading') {
-        document.addEventListener('DOMContentLoaded', applyFontSize);
+        document.addEventListener('DOMContentLoaded', init);
     } else {
-        applyFontSize();
+        init();
     }
 
 })();
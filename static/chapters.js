@@ -0,0 +1,107 @@
+/**
+ * WebBooks - Chapter bundles
+ * Turns pages within a chapter in place, from a script holding all of the
+ * chapter's pages, instead of loading every page.
+ *
+ * Loaded with defer after app.js, only by books rendered with chapter
+ * bundles, so other pages never download it.
+ */
+
+(function() {
+    'use strict';
+
+    // Book page being read (window.webbooksPage, kept up to date by app.js)
+    var pageInfo = null;
+
+    // Bundle of the current chapter once loaded: chapter, first, pages
+    var chapter = null;
+
+    function pageLinks() {
+        return [document.querySelector('a[accesskey="4"]'),
+                document.querySelector('a[accesskey="6"]')];
+    }
+
+    /**
+     * Called by a chapter bundle: from now on, page links within the
+     * chapter show its pages in place instead of loading them
+     * @param {Object} data - chapter, first (page number), pages (texts)
+     */
+    window.webbooksChapter = function(data) {
+        if (!pageInfo || data.chapter !== pageInfo.chapter) {
+            return;
+        }
+        chapter = data;
+        var links = pageLinks();
+        for (var i = 0; i < links.length; i++) {
+            if (links[i]) {
+                links[i].addEventListener('click', onPageLink);
+            }
+        }
+    };
+
+    function onPageLink(e) {
+        var match = /^(\d+)\.html$/.exec(this.getAttribute('href'));
+        if (match && showPage(parseInt(match[1], 10))) {
+            e.preventDefault();
+        }
+    }
+
+    /**
+     * Show a page of the loaded chapter without a request
+     * @param {number} page - Page number
+     * @returns {boolean} - False if the page must be loaded instead
+     */
+    function showPage(page) {
+        var index = page - chapter.first;
+        var links = pageLinks();
+        var heading = document.querySelector('.chapter-heading');
+        // First and last pages of the book have a different navigation bar,
+        // and a chapter's first page needs the heading this page may lack
+        if (index < 0 || index >= chapter.pages.length || page <= 1 ||
+                page >= pageInfo.total || !links[0] || !links[1] ||
+                (index === 0 && !heading)) {
+            return false;
+        }
+
+        if (heading) {
+            heading.style.display = index === 0 ? '' : 'none';
+        }
+        document.getElementById('reader').textContent = chapter.pages[index];
+        var counters = document.querySelectorAll('.header-page, .nav-page');
+        for (var i = 0; i < counters.length; i++) {
+            counters[i].textContent = page + '/' + pageInfo.total;
+        }
+        document.title = document.title.replace(/\d+$/, page);
+        links[0].setAttribute('href', (page - 1) + '.html');
+        links[1].setAttribute('href', (page + 1) + '.html');
+
+        pageInfo.page = page;
+        window.savePosition(pageInfo.slug, page, pageInfo.profile);
+        if (window.history && history.replaceState) {
+            // Reloading or bookmarking opens this page
+            history.replaceState(null, '', page + '.html');
+        }
+        return true;
+    }
+
+    function init() {
+        var info = window.webbooksPage;
+        // app.js marks pages it is leaving for another profile
+        if (!info || info.chapter === undefined || info.leaving) {
+            return;
+        }
+        pageInfo = info;
+        var script = document.createElement('script');
+        script.src = 'chapters/' + info.chapter + '.js';
+        document.getElementsByTagName('head')[0].appendChild(script);
+    }
+
+    // Runs after app.js: deferred scripts keep their order, and so do
+    // their DOMContentLoaded listeners
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+
+})();
@@ -0,0 +1,42 @@
+"""Smoke test of the benchmark suite on its smallest preset."""
+
+import json
+import sys
+
+import pytest
+
+from benchmarks import suite
+
+
+def run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["suite", *argv])
+    suite.main()
+
+
+def test_small_preset_results_and_compare(tmp_path, monkeypatch, capsys):
+    results = tmp_path / "results.json"
+    run(monkeypatch, "--sizes", "small", "--repeat", "1", "--output", str(results))
+
+    current = json.loads(results.read_text(encoding="utf-8"))
+    assert current["repeat"] == 1
+    assert sorted(current["cases"]) == [
+        f"{book_format}-small-{script}"
+        for book_format in ("epub", "fb2")
+        for script in ("cyrillic", "latin")
+    ]
+    for case in current["cases"].values():
+        assert case["pages"] > 0
+        assert set(case["seconds"]) == set(suite.STAGES)
+
+    run(monkeypatch, "--results", str(results), "--compare", str(results))
+    assert "No regressions." in capsys.readouterr().out
+
+    # A second slower in every stage is a regression everywhere
+    for case in current["cases"].values():
+        case["seconds"] = {s: t + 1 for s, t in case["seconds"].items()}
+    slower = tmp_path / "slower.json"
+    slower.write_text(json.dumps(current), encoding="utf-8")
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, "--results", str(slower), "--compare", str(results))
+    assert exit_info.value.code == 1
+    assert f"{4 * len(suite.STAGES)} regression(s):" in capsys.readouterr().out
@@ -0,0 +1,36 @@
+"""Cache maintenance never fails the build."""
+
+import os
+
+from parsers.base import Book
+from parsers.cache import BookCache
+
+
+def test_prune_skips_entries_it_can_not_remove(tmp_path, monkeypatch, capsys):
+    cache = BookCache(tmp_path, max_bytes=0)
+    cache.directory.mkdir(parents=True)
+    for name in ("a.bin", "b.bin"):
+        (cache.directory / name).write_bytes(b"x" * 10)
+    remove = os.remove
+
+    def fail_on_a(path):
+        if path.endswith("a.bin"):
+            raise PermissionError(13, "Permission denied", path)
+        remove(path)
+
+    monkeypatch.setattr(os, "remove", fail_on_a)
+    assert cache.prune() == 1
+    assert [p.name for p in cache.directory.iterdir()] == ["a.bin"]
+    assert "Could not prune parse cache" in capsys.readouterr().out
+
+
+def test_failed_put_leaves_no_temp_file(tmp_path, monkeypatch, capsys):
+    cache = BookCache(tmp_path, max_bytes=1 << 20)
+
+    def fail(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "replace", fail)
+    cache.put("key", Book(title="T", author="A", file_path=tmp_path / "t.fb2"))
+    assert list(cache.directory.iterdir()) == []
+    assert "Could not write parse cache" in capsys.readouterr().out
@@ -0,0 +1,29 @@
+"""Compressed siblings are replaced atomically and failures are recorded."""
+
+import os
+
+from generator.compress import compress_files
+
+
+def test_failed_sibling_is_recorded_and_others_written(tmp_path, monkeypatch):
+    (tmp_path / "a.html").write_text("a" * 100)
+    (tmp_path / "b.html").write_text("b" * 100)
+    replace = os.replace
+
+    def fail_on_a(tmp, path):
+        if str(path).endswith("a.html.gz"):
+            raise OSError(28, "No space left on device", path)
+        replace(tmp, path)
+
+    monkeypatch.setattr(os, "replace", fail_on_a)
+    stats = compress_files(
+        [str(tmp_path / "a.html"), str(tmp_path / "b.html")], (".gz",)
+    )
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "a.html",
+        "b.html",
+        "b.html.gz",
+    ]
+    assert stats.compressed == 1
+    assert stats.errors == [f"{tmp_path / 'a.html.gz'}: No space left on device"]
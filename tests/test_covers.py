@@ -0,0 +1,28 @@
+"""The cover cache is optional: failures warn, and its size is bounded."""
+
+import os
+
+from generator.covers import CoverProcessor
+
+
+def test_failed_cache_write_leaves_no_temp_file(tmp_path, monkeypatch, capsys):
+    covers = CoverProcessor(tmp_path)
+
+    def fail(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "replace", fail)
+    covers._cache_put("cover.jpg", b"jpeg")
+    assert list(covers.cache_dir.iterdir()) == []
+    assert "Could not write cover cache" in capsys.readouterr().out
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    covers = CoverProcessor(tmp_path, max_bytes=10)
+    for i, name in enumerate(["old.jpg", "used.jpg", "new.jpg"]):
+        covers._cache_put(name, b"x" * 5)
+        os.utime(covers.cache_dir / name, ns=(i * 10**9, i * 10**9))
+    assert covers._cache_get("old.jpg") == b"xxxxx"  # Now the most recent
+
+    assert covers.prune() == 1
+    assert sorted(p.name for p in covers.cache_dir.iterdir()) == ["new.jpg", "old.jpg"]
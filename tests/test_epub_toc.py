@@ -0,0 +1,63 @@
+"""TOC entries resolve to chapters through dict lookups only."""
+
+from parsers.base import Chapter
+from parsers.epub_parser import _ChapterTitleIndex, _href_key
+
+
+def test_href_key_strips_fragment_and_normalizes():
+    assert _href_key("Text/../Text/./ch1.xhtml#p3") == "Text/ch1.xhtml"
+    assert _href_key("#top") == ""
+
+
+def test_title_index_matches_exact_then_contained_titles():
+    chapters = [
+        Chapter(title=title, content="text", index=i)
+        for i, title in enumerate(["Prologue", "Chapter 1", "Chapter 2", "Chapter 1"])
+    ]
+    index = _ChapterTitleIndex(chapters)
+    assert index.find("chapter 2") == 2
+    assert index.find("Chapter 1. The Beginning") == 1  # Earliest contained
+    assert index.find("Epilogue") is None
+
+
+def test_title_index_matches_entries_contained_in_titles():
+    chapters = [
+        Chapter(title=title, content="text", index=i)
+        for i, title in enumerate(["Обложка", "Пролог. Начало", "Глава 1. Начало"])
+    ]
+    index = _ChapterTitleIndex(chapters)
+    assert index.find("Пролог") == 1
+    assert index.find("начало") == 1  # Earliest containing chapter
+    assert index.find("Глава") == 2
+    assert index.find("Эпилог") is None
+
+
+class _CountingList(list):
+    reads = 0
+
+    def __getitem__(self, i):
+        _CountingList.reads += 1
+        return super().__getitem__(i)
+
+
+def test_title_index_generic_entries_do_not_scan_chapters():
+    titles = [f"Глава {i}. Часть {i % 7}" for i in range(5000)]
+    chapters = [Chapter(title=t, content="text", index=i) for i, t in enumerate(titles)]
+    index = _ChapterTitleIndex(chapters)
+    index.suffixes = _CountingList(index.suffixes)
+
+    assert index.find("глава") == 0
+    assert index.find("часть 3") == 3
+    assert index.find("глава 4999") == 4999
+    assert index.find("том") is None
+    # Binary searches only, not one read per chapter containing the entry
+    assert _CountingList.reads < 200
+
+    for entry in ["глава 12", "часть 6", "2. часть", "Глава 77. Часть 0 и др."]:
+        lowered = entry.lower()
+        expected = min(
+            (i for i, t in enumerate(titles)
+             if t.lower() in lowered or (lowered in t.lower())),
+            default=None,
+        )
+        assert index.find(entry) == expected, entry
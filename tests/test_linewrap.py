@@ -0,0 +1,49 @@
+"""The line wrapper produces exactly the lines textwrap.wrap does."""
+
+import random
+import textwrap
+
+import pytest
+
+from generator.linewrap import wrap
+
+TEXTS = [
+    "",
+    "   ",
+    "Слово",
+    "Он сказал: «Hello, world!» и ушёл домой.",
+    "Съешь же ещё этих мягких французских булок, да выпей чаю.",
+    "The quick brown fox jumps over the lazy dog.",
+    "Достопримечательностей превысокомногорассмотрительствующий",
+    "supercalifragilisticexpialidocious and антидисэстаблишментарианство",
+    "north-east северо-восток, кое-как well-known",
+    "очень-очень-очень-длинное-слово-через-дефисы-без-пробелов",
+    "---- -- - a-- --b",
+    "Он — сказал — так--вот",
+    "  leading and trailing  ",
+    "double  spaces   here",
+    "tabs\there\tand\ttabs",
+    "line\nbreaks\r\nand\x0bvertical\x0cfeeds",
+    "x" * 100,
+    "a " * 40,
+]
+
+WIDTHS = [1, 2, 5, 10, 25, 32]
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_textwrap(text, width):
+    assert wrap(text, width) == textwrap.wrap(text, width)
+
+
+def test_matches_textwrap_on_random_text():
+    rng = random.Random(0)
+    pieces = [
+        "книга", "глава", "Пролог", "word", "text", "-", "—", " ", "  ", "\t",
+        "из-за", "e-mail", "длинноесловобезпробелов", "Latin", ",", ".",
+    ]
+    for _ in range(500):
+        text = " ".join(rng.choice(pieces) for _ in range(rng.randint(1, 30)))
+        width = rng.randint(1, 40)
+        assert wrap(text, width) == textwrap.wrap(text, width), (text, width)
@@ -0,0 +1,29 @@
+"""Rebuild plans tell moved books from removed ones."""
+
+from generator.manifest import BookRecord, BuildManifest
+from parsers.base import file_digest
+
+
+def test_moved_book_is_not_reported_as_removed(tmp_path, capsys):
+    books_dir = tmp_path / "books"
+    (books_dir / "Series").mkdir(parents=True)
+    (tmp_path / "docs").mkdir()
+    moved = books_dir / "Series" / "book.fb2"
+    moved.write_bytes(b"<FictionBook>moved</FictionBook>")
+
+    manifest = BuildManifest(tmp_path / "docs")
+    manifest.loaded = True
+    for record in [
+        BookRecord("book.fb2", "k", "Moved", "A", "moved", identity=file_digest(moved)),
+        BookRecord("gone.fb2", "k", "Gone", "A", "gone", identity="0" * 64),
+    ]:
+        manifest.books[record.source] = record
+
+    plan = manifest.plan(books_dir, [moved])
+    assert [(r.slug, p) for r, p in plan.moved] == [("moved", moved)]
+    assert [r.slug for r in plan.removed] == ["gone"]
+
+    plan.print_summary(books_dir)
+    out = capsys.readouterr().out
+    assert "Moved: 1\n    > book.fb2 -> Series/book.fb2 (moved)" in out
+    assert "Removed: 1\n    - gone.fb2 (gone)" in out
@@ -0,0 +1,53 @@
+"""Template minification keeps what renders and what scripts mean."""
+
+from generator.minify import minify_script, minify_template
+
+
+def test_script_lines_join_only_where_no_statement_ends():
+    code = """
+        // Turn the page
+        var pages = [
+            1,
+            2
+        ];
+        go(pages)
+        done()
+    """
+    assert minify_script(code) == "var pages = [1,2];go(pages)\ndone()"
+
+
+def test_script_line_with_trailing_comment_is_not_joined():
+    assert minify_script("if (a) {\n doX(); // done\n}") == (
+        "if (a) {doX(); // done\n}"
+    )
+    assert minify_script("var u = 'http://x/';\n}") == "var u = 'http://x/';\n}"
+
+
+def test_template_whitespace_and_quotes():
+    source = """<ul class="toc">
+    {% for chapter in chapters %}
+    <li><a href="{{ chapter.url }}">{{ chapter.title }}</a>
+        <b>new</b>
+        <i>!</i></li>
+    {% endfor %}
+</ul>"""
+    assert minify_template(source) == (
+        '<ul class=toc>{% for chapter in chapters %}'
+        '<li><a href="{{ chapter.url }}">{{ chapter.title }}</a> <b>new</b> '
+        "<i>!</i></li>{% endfor %}</ul>"
+    )
+
+
+def test_template_leaves_pre_and_minifies_scripts():
+    source = """<div>
+  <pre>  keep
+    this</pre>
+  <script>
+    var a = {
+      b: 1
+    };
+  </script>
+</div>"""
+    assert minify_template(source) == (
+        "<div><pre>  keep\n    this</pre><script>var a = {b: 1};</script></div>"
+    )
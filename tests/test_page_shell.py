@@ -0,0 +1,52 @@
+"""Pages rendered from the shell are byte-identical to full template renders."""
+
+from pathlib import Path
+
+import pytest
+
+from generator import renderer as renderer_module
+from generator.page_shell import PageShells
+from generator.paginator import Paginator, paginate_profiles
+from generator.renderer import Renderer
+from parsers.base import Book, Chapter
+
+
+@pytest.mark.parametrize("minify", [False, True])
+def test_shell_pages_match_template_pages(tmp_path, monkeypatch, minify):
+    created = []
+
+    class RecordedShells(PageShells):
+        def __init__(self, *args):
+            super().__init__(*args)
+            created.append(self)
+
+    monkeypatch.setattr(renderer_module, "PageShells", RecordedShells)
+    words = "Слово <и> & word " * 400
+    book = Book(
+        title="Книга",
+        author="Автор",
+        file_path=Path("book.fb2"),
+        chapters=[Chapter(title=f"Глава {i}", content=words, index=i) for i in range(3)],
+    )
+    book.slug = "kniga"
+    renderer = Renderer(tmp_path, cache_dir=None, minify=minify, prefetch=True)
+    profile = renderer.profiles[0]
+    pages = paginate_profiles(book.chapters, [profile])[profile.name]
+    ranges = Paginator(profile=profile).get_chapter_page_ranges(pages)
+    layout = {"profile": profile, "site_root": "../", "book_root": ""}
+
+    def render(fast_pages):
+        renderer.fast_pages = fast_pages
+        rendered = renderer.render_pages(
+            book, pages, len(pages), True, ranges, layout
+        )
+        return dict(rendered)
+
+    fast, slow = render(True), render(False)
+    assert len(pages) > 3
+    for number in (1, len(pages) // 2, len(pages)):
+        assert fast[number] == slow[number]
+    assert fast == slow
+    # Every layout was served from its shell, none fell back to the template
+    shells = created[0].shells
+    assert shells and None not in shells.values()
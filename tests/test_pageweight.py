@@ -0,0 +1,36 @@
+"""The page budget covers every book, not just the ones just rendered."""
+
+from build import catalog_page_weights
+from generator.manifest import BookRecord
+from generator.pageweight import PageWeight, measure_book
+
+
+def test_measure_book_counts_reader_pages_of_every_profile(tmp_path):
+    book = tmp_path / "book"
+    (book / "qvga-small" / "chapters").mkdir(parents=True)
+    (book / "0.html").write_text("cover" * 100)
+    (book / "toc.html").write_text("toc" * 100)
+    (book / "1.html").write_text("a" * 10)
+    (book / "qvga-small" / "1.html").write_text("a" * 30)
+    (book / "qvga-small" / "chapters" / "0.js").write_text("x" * 500)
+
+    assert measure_book(book) == PageWeight(2, 40, 30, "qvga-small/1.html")
+
+
+def test_unrendered_books_use_their_record_or_the_output(tmp_path):
+    (tmp_path / "old").mkdir()
+    (tmp_path / "old" / "1.html").write_text("a" * 50)
+    recorded = BookRecord("a.fb2", "k", "A", "X", "recorded")
+    recorded.set_page_weight(PageWeight(3, 30, 20, "2.html"))
+    old = BookRecord("b.fb2", "k", "B", "X", "old")
+    rendered = BookRecord("c.fb2", "k", "C", "X", "rendered")
+
+    weights = catalog_page_weights(
+        [recorded, old, rendered], {"rendered": PageWeight(1, 5, 5, "1.html")}, tmp_path
+    )
+    assert {slug: w.max_bytes for slug, w in weights.items()} == {
+        "recorded": 20,
+        "old": 50,
+        "rendered": 5,
+    }
+    assert old.max_page_bytes == 50  # Saved with the manifest from now on
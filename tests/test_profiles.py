@@ -0,0 +1,81 @@
+"""Page profiles fit the reader text box that style.css lays out."""
+
+import re
+
+from config import CHAR_WIDTH_EM, DEFAULT_SCREEN, SCREENS, STATIC_DIR
+from generator.paginator import page_profiles
+
+_BLOCK = re.compile(
+    r"(?P<media>@media[^{]*)\{(?P<rules>(?:[^{}]*\{[^{}]*\})*)\s*\}"
+    r"|(?P<selector>[^{}@]+)\{(?P<body>[^{}]*)\}"
+)
+_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+
+
+def css_rules(css: str) -> list[tuple[str, str, dict[str, str]]]:
+    """(media query, selector, properties) of every rule, in source order."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    rules = []
+    for block in _BLOCK.finditer(css):
+        if block.group("media"):
+            media = block.group("media").strip()
+            found = _RULE.findall(block.group("rules"))
+        else:
+            media = ""
+            found = [(block.group("selector"), block.group("body"))]
+        for selectors, body in found:
+            props = dict(
+                (name.strip(), value.strip())
+                for name, _, value in (p.partition(":") for p in body.split(";"))
+                if value.strip()
+            )
+            for selector in selectors.split(","):
+                rules.append((media, " ".join(selector.split()), props))
+    return rules
+
+
+def screen_css(rules, screen: str, selectors: list[str]) -> dict[str, str]:
+    """Properties the selectors get on a screen, later selectors winning."""
+    props: dict[str, str] = {}
+    for selector in selectors:
+        for media, rule_selector, rule_props in rules:
+            # Media queries of this stylesheet only ever match small screens
+            if rule_selector == selector and (not media or screen != DEFAULT_SCREEN):
+                props.update(rule_props)
+    return props
+
+
+def px(value: str) -> float:
+    return float(value.removesuffix("px"))
+
+
+def test_profiles_fit_the_css_text_box():
+    rules = css_rules((STATIC_DIR / "style.css").read_text(encoding="utf-8"))
+    for profile in page_profiles():
+        screen = SCREENS[profile.screen]
+        body = screen_css(rules, profile.screen, ["html"])
+        content = screen_css(rules, profile.screen, [".content"])
+        # More specific selectors last, as the cascade orders them
+        text = screen_css(
+            rules,
+            profile.screen,
+            [".reader-text", f".font-{profile.font_size} .reader-text"],
+        )
+        padding = px(content["padding"])
+        text_width = px(body["width"]) - 2 * padding
+        text_height = px(content["height"]) - 2 * padding
+        size = px(text["font-size"])
+        line = size * float(text["line-height"])
+        char = size * CHAR_WIDTH_EM
+
+        # Exact fits may come out a rounding error over
+        assert profile.chars_per_line * char <= text_width + 1e-9, profile
+        assert profile.lines_per_page * line <= text_height + 1e-9, profile
+        if profile.screen != DEFAULT_SCREEN:
+            # Derived profiles use the whole box, not a scaled guess
+            assert (profile.chars_per_line + 1) * char > text_width, profile
+            assert (profile.lines_per_page + 1) * line > text_height, profile
+            assert screen["reader_fonts"][profile.font_size] == (
+                size,
+                float(text["line-height"]),
+            )
@@ -0,0 +1,31 @@
+"""The scan cache is optional: a failed save warns and leaves no temp file."""
+
+import os
+
+from generator.scan import FileStat, ScanCache
+
+
+def test_failed_save_leaves_no_temp_file(tmp_path, monkeypatch, capsys):
+    book = tmp_path / "book.fb2"
+    book.write_bytes(b"<FictionBook/>")
+    cache = ScanCache(tmp_path / "cache")
+    stat = FileStat.from_stat(os.stat(book))
+    digest = cache.digest(book, stat)
+    cache.used[os.path.abspath(book)] = (stat, digest)  # However recent
+
+    def fail(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "replace", fail)
+    cache.save()
+    assert list((tmp_path / "cache").iterdir()) == []
+    assert "Could not write scan cache" in capsys.readouterr().out
+
+    monkeypatch.undo()
+    cache.used[os.path.abspath(book)] = (stat, digest)
+    cache.entries = {}
+    cache.save()
+    loaded = ScanCache(tmp_path / "cache")
+    loaded.load()
+    assert loaded.digest(book, stat) == digest
+    assert loaded.hashed == 0
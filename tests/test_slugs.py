@@ -0,0 +1,88 @@
+"""Slugs surviving upgrades: old manifests and sites built without one."""
+
+import hashlib
+import json
+
+from build import output_subdirs
+from generator.manifest import MANIFEST_NAME, BookRecord, BuildManifest
+from generator.slugs import SlugRegistry, legacy_slug
+from parsers.base import file_digest
+
+
+def test_render_version_change_keeps_slugs(tmp_path):
+    books_dir = tmp_path / "books"
+    output_dir = tmp_path / "docs"
+    books_dir.mkdir()
+    (output_dir / "old-book-abc123").mkdir(parents=True)
+    book = books_dir / "book.fb2"
+    book.write_bytes(b"<FictionBook/>")
+    identity = file_digest(book)
+    record = BookRecord(
+        source="book.fb2",
+        key="stale",
+        title="Old Book",
+        author="A",
+        slug="old-book-abc123",
+        identity=identity,
+    )
+    (output_dir / MANIFEST_NAME).write_text(
+        json.dumps(
+            {"render_version": 1, "index_key": "x", "books": [record.__dict__]}
+        )
+    )
+
+    manifest = BuildManifest(output_dir)
+    manifest.load()
+    plan = manifest.plan(books_dir, [book])
+    assert plan.full_rebuild
+    assert plan.to_parse == [book]
+    assert manifest.books["book.fb2"].key == ""
+    assert manifest.index_key == ""
+
+    slugs = SlugRegistry(manifest.books.values(), ["old-book-abc123"])
+    slugs.reserve([("book.fb2", identity)])
+    assert slugs.slug_for("book.fb2", identity, "Old Book", str(book)) == (
+        "old-book-abc123"
+    )
+    assert manifest.stale_slugs({"old-book-abc123"}) == []
+
+
+def test_site_without_manifest_keeps_path_slugs():
+    path = "/site/books/Серия/book.fb2"
+    # As the first releases named books: title plus a hash of the file path
+    expected = "testovaya-kniga-" + hashlib.md5(path.encode()).hexdigest()[:6]
+    assert legacy_slug("Тестовая книга", path) == expected
+
+    # Only while the old directory is still in the output
+    slugs = SlugRegistry([], [expected])
+    slugs.reserve([("Серия/book.fb2", "f" * 64)])
+    assert slugs.slug_for("Серия/book.fb2", "f" * 64, "Тестовая книга", path) == (
+        expected
+    )
+
+
+def test_fresh_site_gets_identity_slugs(tmp_path):
+    output_dir = tmp_path / "docs"
+    output_dir.mkdir()
+    manifest = BuildManifest(output_dir)
+    manifest.load()
+
+    slugs = SlugRegistry(manifest.books.values(), output_subdirs(output_dir))
+    slugs.reserve([("Серия/book.fb2", "cce937" + "0" * 58)])
+    path = str(tmp_path / "books" / "Серия" / "book.fb2")
+    assert slugs.slug_for(
+        "Серия/book.fb2", "cce937" + "0" * 58, "Тестовая книга", path
+    ) == "testovaya-kniga-cce937"
+
+
+def test_legacy_slug_needs_its_directory():
+    other = BookRecord("other.fb2", "k", "Other", "A", "other-111111", identity="1")
+    legacy = legacy_slug("New", "books/new.fb2")
+
+    slugs = SlugRegistry([other], ["other-111111"])
+    assert slugs.slug_for("new.fb2", "2" * 64, "New", "books/new.fb2") == (
+        "new-222222"
+    )
+
+    slugs = SlugRegistry([other], ["other-111111", legacy])
+    assert slugs.slug_for("new.fb2", "2" * 64, "New", "books/new.fb2") == legacy
@@ -0,0 +1,42 @@
+"""Closing a book stream releases its file, whether or not it was read."""
+
+import contextlib
+
+from benchmarks.corpus import BookSpec, write_book
+from parsers import EpubParser, Fb2Parser
+from parsers import epub_parser, fb2_parser
+
+SPEC = BookSpec(chapters=3, paragraphs=2, paragraph_words=5, images=0)
+
+
+def test_unread_epub_stream_closes_its_archive(tmp_path, monkeypatch):
+    opened = []
+
+    class RecordedArchive(epub_parser.EpubArchive):
+        def __init__(self, *args):
+            super().__init__(*args)
+            opened.append(self)
+
+    monkeypatch.setattr(epub_parser, "EpubArchive", RecordedArchive)
+    book = EpubParser().stream(write_book(tmp_path, SPEC, "epub"))
+    assert book.title
+    book.close()
+    assert opened[0].zf.fp is None
+
+
+def test_fb2_stream_closes_its_file(tmp_path, monkeypatch):
+    opened = []
+    open_fb2 = fb2_parser.open_fb2
+
+    @contextlib.contextmanager
+    def recorded(path):
+        with open_fb2(path) as f:
+            opened.append(f)
+            yield f
+
+    monkeypatch.setattr(fb2_parser, "open_fb2", recorded)
+    book = Fb2Parser().stream(write_book(tmp_path, SPEC, "fb2"))
+    assert book.title
+    next(book.chapters)
+    book.close()
+    assert opened[0].closed
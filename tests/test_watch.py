@@ -0,0 +1,77 @@
+"""Watch builds reuse parsed books without mixing them up."""
+
+import argparse
+import json
+
+import build
+from generator.manifest import MANIFEST_NAME
+
+
+def fb2(title: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<FictionBook xmlns="http://www.gribuser.ru/xml/fictionbook/2.0">'
+        "<description><title-info>"
+        "<author><first-name>A</first-name><last-name>B</last-name></author>"
+        f"<book-title>{title}</book-title>"
+        "</title-info></description>"
+        f"<body><section><title><p>{title}</p></title><p>Text.</p></section></body>"
+        "</FictionBook>"
+    )
+
+
+def build_args(tmp_path, **options) -> argparse.Namespace:
+    args = argparse.Namespace(
+        books_dir=tmp_path / "books",
+        output_dir=tmp_path / "docs",
+        force=False,
+        dry_run=False,
+        no_parse_cache=True,
+        compress=False,
+        minify=False,
+        prefetch=False,
+        chapter_bundles=False,
+        page_budget=None,
+        stream=False,
+        output_archive=None,
+        jobs=1,
+        write_threads=0,
+    )
+    vars(args).update(options)
+    return args
+
+
+def test_identical_files_are_parsed_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "CACHE_DIR", tmp_path / "cache")
+    books_dir = tmp_path / "books"
+    books_dir.mkdir()
+    (books_dir / "a.fb2").write_text(fb2("Same"))
+    (books_dir / "b.fb2").write_text(fb2("Same"))
+    (books_dir / "c.fb2").write_text(fb2("Other"))
+    args = build_args(tmp_path)
+
+    parsed_books = {}
+    assert build.build(args, parsed_books) == 0
+
+    manifest = json.loads((args.output_dir / MANIFEST_NAME).read_text())
+    titles = {b["source"]: b["title"] for b in manifest["books"]}
+    assert titles == {"a.fb2": "Same", "b.fb2": "Same", "c.fb2": "Other"}
+    assert len(parsed_books) == 2
+
+
+def test_failed_builds_are_reported_unlike_empty_libraries(
+    tmp_path, monkeypatch, capsys
+):
+    monkeypatch.setattr(build, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "books").mkdir()
+
+    build._watch_build(build_args(tmp_path), {})
+    out = capsys.readouterr().out
+    assert "No books found!" in out
+    assert "Build failed" not in out
+
+    (tmp_path / "books" / "a.fb2").write_text(fb2("Heavy"))
+    build._watch_build(build_args(tmp_path, page_budget=10), {})
+    out = capsys.readouterr().out
+    assert "Page budget of 10 bytes exceeded:" in out
+    assert "Build failed, see the errors above." in out
@@ -0,0 +1,73 @@
+"""OutputWriter: what prune() keeps, and failures that must not stop a build."""
+
+import os
+import threading
+from pathlib import Path
+
+from generator.writer import OutputWriter
+
+
+def test_prune_keeps_kept_directories_and_siblings(tmp_path, monkeypatch):
+    site = tmp_path / "docs"
+    (site / "old-book").mkdir(parents=True)
+    (site / "old-book" / "1.html").write_text("old")
+    (site / "kept-book").mkdir()
+    (site / "kept-book" / "1.html").write_text("kept")
+    (site / "index.html.gz").write_bytes(b"gz")
+    (site / "stale.html").write_text("stale")
+    (site / "stale.html.gz").write_bytes(b"gz")
+
+    # A relative root, and kept paths spelled differently
+    monkeypatch.chdir(tmp_path)
+    writer = OutputWriter(Path("docs/"), sibling_suffixes=(".gz",))
+    writer.write_text(site / "index.html", "index")
+    writer.keep(Path("docs") / "kept-book")
+    writer.prune()
+
+    assert sorted(p.relative_to(site).as_posix() for p in site.rglob("*")) == [
+        "index.html",
+        "index.html.gz",
+        "kept-book",
+        "kept-book/1.html",
+    ]
+    assert writer.stats.deleted == 3
+    assert writer.stats.errors == []
+
+
+def test_prune_records_files_it_can_not_delete(tmp_path, monkeypatch):
+    (tmp_path / "stuck.html").write_text("stuck")
+    (tmp_path / "stale.html").write_text("stale")
+    unlink = os.unlink
+
+    def fail_on_stuck(path):
+        if path.endswith("stuck.html"):
+            raise PermissionError(13, "Permission denied", path)
+        unlink(path)
+
+    monkeypatch.setattr(os, "unlink", fail_on_stuck)
+    writer = OutputWriter(tmp_path)
+    writer.prune()
+
+    assert (tmp_path / "stuck.html").exists()
+    assert not (tmp_path / "stale.html").exists()
+    assert writer.stats.deleted == 1
+    assert writer.stats.errors == [f"{tmp_path / 'stuck.html'}: Permission denied"]
+
+
+def test_writer_threads_survive_bad_payloads(tmp_path):
+    writer = OutputWriter(tmp_path, threads=1)
+    done = threading.Event()
+
+    def write_all():
+        # Far more batches than the queue holds
+        for i in range(500):
+            data = "not bytes" if i == 3 else b"ok"
+            writer.write_bytes(tmp_path / f"{i}.html", data)
+        writer.close()
+        done.set()
+
+    threading.Thread(target=write_all, daemon=True).start()
+    assert done.wait(10)
+    assert writer.stats.written == 499
+    assert len(writer.stats.errors) == 1
+    assert writer.stats.errors[0].startswith(f"{tmp_path / '3.html'}: ")